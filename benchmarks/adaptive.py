@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+# compares trying the types one after another in the fixed FileTypes.IMAGE
+# order and in the order an AdaptiveMatcher learned from a skewed stream of
+# files, then the compiled signature table of image_match against one
+# compiled in the learned order
+#
+#   python -m benchmarks.adaptive [--files N] [--seed S]
+
+import argparse
+import random
+import timeit
+
+import imagetype
+from imagetype.adaptive import AdaptiveMatcher
+from imagetype.FileTypes import IMAGE
+
+from .corpus import SAMPLES
+
+
+# share of the stream taken by each type, the rest is split evenly
+DISTRIBUTIONS = {
+    "web": {"jpg": 0.6, "png": 0.25, "webp": 0.12},
+    "camera": {"jpg": 0.5, "heic": 0.3, "cr2": 0.15},
+    "uniform": {},
+}
+
+
+def make_stream(weights, count, rng):
+
+    names = list(SAMPLES)
+
+    rest = (1 - sum(weights.values())) / (len(names) - len(weights))
+
+    return rng.choices(
+        [bytearray(SAMPLES[name]) for name in names],
+        weights=[weights.get(name, rest) for name in names],
+        k=count,
+    )
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    # a list rather than IMAGE itself, so match() tries each type in turn
+    fixed = list(IMAGE)
+
+    print(
+        "{:<8} {:>10} {:>12} {:>10} {:>15}   {}".format(
+            "stream",
+            "fixed/s",
+            "adaptive/s",
+            "table/s",
+            "adaptive table/s",
+            "learned order",
+        )
+    )
+
+    for name, weights in DISTRIBUTIONS.items():
+
+        stream = make_stream(weights, args.files, rng)
+
+        adaptive = AdaptiveMatcher(compile=False)
+
+        for data in stream:
+            adaptive.match(data)
+
+        adaptive.freeze()
+
+        compiled = AdaptiveMatcher(compile=True)
+        compiled.set_profile(adaptive.get_profile())
+        compiled.freeze()
+
+        for data in stream[:1000]:
+            assert adaptive.match(data) is imagetype.image_match(data)
+            assert compiled.match(data) is imagetype.image_match(data)
+
+        timings = [
+            timeit.timeit(lambda: [match(data) for data in stream], number=1)
+            for match in (
+                lambda data: imagetype.match(data, fixed),
+                adaptive.match,
+                imagetype.image_match,
+                compiled.match,
+            )
+        ]
+
+        print(
+            "{:<8} {:>10.0f} {:>12.0f} {:>10.0f} {:>15.0f}   {}".format(
+                name,
+                *(args.files / seconds for seconds in timings),
+                " ".join(matcher.extension for matcher in adaptive.order[:6])
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
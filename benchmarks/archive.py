@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+# measures the files/s of scan_archive against extracting an archive to disk
+# and calling get_info on every file, for stored and deflated zips and a tar
+#
+#   python -m benchmarks.archive [--files N] [--padding BYTES]
+
+import argparse
+import io
+import os
+import tarfile
+import tempfile
+import time
+import zipfile
+
+import imagetype
+
+from .corpus import SAMPLES
+
+
+def write_archives(directory, files: int, padding: int):
+    """
+    Writes the samples of the corpus in turn, padded like image data,
+    into a zip of each compression and a gzip compressed tar.
+
+    Returns:
+        dict of the archive name to its path.
+    """
+    samples = list(SAMPLES.items())
+    members = []
+
+    for i in range(files):
+        name, data = samples[i % len(samples)]
+        members.append(("{:06}.{}".format(i, name), data + os.urandom(padding)))
+
+    paths = {}
+
+    for name, compression in (
+        ("stored zip", zipfile.ZIP_STORED),
+        ("deflated zip", zipfile.ZIP_DEFLATED),
+    ):
+        path = paths[name] = os.path.join(directory, name.replace(" ", "-"))
+
+        with zipfile.ZipFile(path, "w", compression) as archive:
+            for member, data in members:
+                archive.writestr(member, data)
+
+    path = paths["tar.gz"] = os.path.join(directory, "archive.tar.gz")
+
+    with tarfile.open(path, "w:gz") as archive:
+        for member, data in members:
+            info = tarfile.TarInfo(member)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+    return paths
+
+
+def extract(path, directory):
+
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            archive.extractall(directory)
+    else:
+        with tarfile.open(path) as archive:
+            archive.extractall(directory)
+
+    return [
+        (name, imagetype.get_info(os.path.join(directory, name)))
+        for name in os.listdir(directory)
+    ]
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--padding", type=int, default=65536)
+    args = parser.parse_args()
+
+    print("{:16} {:>16} {:>16}".format("files/s", "extract, get_info", "scan_archive"))
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        archives = write_archives(directory, args.files, args.padding)
+
+        for name, path in archives.items():
+
+            with tempfile.TemporaryDirectory() as output:
+
+                start = time.perf_counter()
+                extracted = extract(path, output)
+                extract_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            scanned = list(imagetype.scan_archive(path))
+            scan_time = time.perf_counter() - start
+
+            if sorted(scanned) != sorted(extracted):
+                raise SystemExit("scan_archive disagrees on the " + name)
+
+            print(
+                "{:16} {:16.0f} {:16.0f}".format(
+                    name, args.files / extract_time, args.files / scan_time
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+# measures the MB/s of carve.carve over a synthetic disk image, corpus files
+# placed at random offsets between runs of random bytes and zeros, and how
+# many of the placed files it finds with their exact length
+#
+#   python -m benchmarks.carve [--megabytes N] [--files N] [--seed N]
+
+import argparse
+import random
+import tempfile
+import time
+
+from imagetype.carve import carve, CARVE_MATCHERS
+
+from .corpus import SAMPLES
+
+
+def make_image(size: int, files: int, seed=0):
+    """
+    Returns:
+        Tuple of the bytes and a dict of the offset of every placed file
+        to its sample name.
+    """
+    rng = random.Random(seed)
+
+    extensions = {matcher.extension for matcher in CARVE_MATCHERS}
+    samples = [(name, data) for name, data in SAMPLES.items() if name in extensions]
+
+    gap = size // files
+
+    image = bytearray()
+    placed = {}
+
+    for i in range(files):
+
+        # half of the gaps look like free space, the other half like data,
+        # drawn from the seeded generator so every run places the same bytes
+        if i % 2:
+            filler = bytes(gap)
+        else:
+            filler = rng.getrandbits(8 * gap).to_bytes(gap, "little")
+        image += filler[: rng.randrange(gap)]
+
+        name, data = rng.choice(samples)
+
+        placed[len(image)] = name
+        image += data
+
+    return bytes(image), placed
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, default=256)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    image, placed = make_image(args.megabytes << 20, args.files, args.seed)
+
+    with tempfile.NamedTemporaryFile() as fp:
+
+        fp.write(image)
+        fp.flush()
+
+        start = time.perf_counter()
+        found = list(carve(fp.name))
+        elapsed = time.perf_counter() - start
+
+    offsets = {offset: length for offset, length, _, _ in found}
+
+    lengths = [
+        (offsets[offset], len(SAMPLES[name]))
+        for offset, name in placed.items()
+        if offset in offsets
+    ]
+
+    print("{:.0f} MB/s".format(len(image) / elapsed / (1 << 20)))
+    print("{} of {} files found".format(len(lengths), len(placed)))
+    print(
+        "{} with their exact length, {} with no length, {} found elsewhere".format(
+            sum(1 for carved, length in lengths if carved == length),
+            sum(1 for carved, _ in lengths if carved is None),
+            len(set(offsets) - set(placed)),
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
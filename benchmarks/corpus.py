@@ -0,0 +1,626 @@
+# -*- coding: utf-8 -*-
+
+# deterministic synthetic headers for every matcher in FileTypes.IMAGE
+# the files only need to be valid up to what the matchers and sizers read,
+# so the pixel data is stubbed out
+
+import os
+import struct
+import zlib
+
+
+def png_chunk(chunk_type: bytes, data: bytes):
+
+    crc = zlib.crc32(chunk_type + data)
+
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+
+def box(box_type: bytes, data: bytes):
+
+    return struct.pack(">I", 8 + len(data)) + box_type + data
+
+
+def full_box(box_type: bytes, data: bytes, version=0, flags=0):
+
+    return box(box_type, bytes([version]) + flags.to_bytes(3, "big") + data)
+
+
+def make_png(width=640, height=480, depth=8, color_type=6, interlace=0, chunks=()):
+
+    ihdr = struct.pack(">IIBBBBB", width, height, depth, color_type, 0, 0, interlace)
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + png_chunk(b"IHDR", ihdr)
+        + b"".join(chunks)
+        + png_chunk(b"IDAT", zlib.compress(b"\x00" * 64))
+        + png_chunk(b"IEND", b"")
+    )
+
+
+def make_apng(width=64, height=32, frames=3, chunks=()):
+
+    actl = png_chunk(b"acTL", struct.pack(">II", frames, 0))
+
+    return make_png(width, height, chunks=tuple(chunks) + (actl,))
+
+
+def make_jpeg(width=800, height=600, progressive=False, exif=0, icc=False):
+
+    jpeg = b"\xff\xd8"
+    jpeg += b"\xff\xe0" + struct.pack(">H", 16)
+    jpeg += b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+
+    if exif:
+        jpeg += b"\xff\xe1" + struct.pack(">H", exif) + b"Exif\x00\x00"
+        jpeg += b"\x00" * (exif - 8)
+
+    if icc:
+        jpeg += b"\xff\xe2" + struct.pack(">H", 16) + b"ICC_PROFILE\x00\x01\x01"
+
+    marker = 0xC2 if progressive else 0xC0
+
+    jpeg += bytes([0xFF, marker]) + struct.pack(">HBHHB", 17, 8, height, width, 3)
+    jpeg += b"\x01\x22\x00\x02\x11\x01\x03\x11\x01"
+    jpeg += b"\xff\xda" + struct.pack(">H", 8) + b"\x01\x01\x00\x00\x3f\x00"
+    jpeg += b"\x12\x34" * 32 + b"\xff\xd9"
+
+    return jpeg
+
+
+def make_jpx(width=640, height=480):
+
+    ihdr = box(b"ihdr", struct.pack(">IIHBBBB", height, width, 3, 7, 7, 0, 0))
+
+    return (
+        b"\x00\x00\x00\x0cjP  \r\n\x87\n"
+        + box(b"ftyp", b"jp2 \x00\x00\x00\x00jp2 ")
+        + box(b"jp2h", ihdr)
+        + b"\x00" * 16
+    )
+
+
+def make_gif(width=320, height=200, transparent=True, interlace=False):
+
+    # global color table with 256 entries
+    gif = b"GIF89a" + struct.pack("<HHBBB", width, height, 0x87, 0, 0)
+    gif += b"\x00" * (3 * 256)
+
+    if transparent:
+        gif += b"\x21\xf9\x04\x01\x00\x00\x00\x00"
+
+    flags = 0x40 if interlace else 0
+    gif += b"\x2c" + struct.pack("<HHHHB", 0, 0, width, height, flags)
+    gif += b"\x08\x02\x4c\x01\x00\x3b"
+
+    return gif
+
+
+def make_webp(width=400, height=300, kind="VP8 ", flags=0x30):
+
+    if kind == "VP8 ":
+        chunk = b"\x00\x00\x00\x9d\x01\x2a" + struct.pack("<HH", width, height)
+
+    elif kind == "VP8L":
+        bits = (width - 1) | ((height - 1) << 14) | (1 << 28)
+        chunk = b"\x2f" + struct.pack("<I", bits)
+
+    else:
+        chunk = bytes([flags, 0, 0, 0])
+        chunk += (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+
+    chunk += b"\x00" * 10
+
+    data = b"WEBP" + kind.encode() + struct.pack("<I", len(chunk)) + chunk
+
+    return b"RIFF" + struct.pack("<I", len(data)) + data
+
+
+def make_tiff(width=1024, height=768, endian="<", ifds=1, cr2=False):
+
+    magic = b"II*\x00" if endian == "<" else b"MM\x00*"
+
+    tiff = bytearray(magic + struct.pack(endian + "I", 16 if cr2 else 8))
+
+    if cr2:
+        tiff += b"CR\x02\x00\x00\x00\x00\x00"
+
+    # tag, type, count, value
+    fields = (
+        (256, 4, 1, width),
+        (257, 4, 1, height),
+        (258, 3, 3, None),
+        (262, 3, 1, 2),
+        (277, 3, 1, 3),
+    )
+
+    for n in range(ifds):
+
+        bits_offset = len(tiff) + 2 + 12 * len(fields) + 4
+
+        tiff += struct.pack(endian + "H", len(fields))
+
+        for tag, field_type, count, value in fields:
+
+            if value is None:
+                tiff += struct.pack(
+                    endian + "HHII", tag, field_type, count, bits_offset
+                )
+
+            elif field_type == 3:
+                tiff += struct.pack(endian + "HHIHH", tag, field_type, count, value, 0)
+
+            else:
+                tiff += struct.pack(endian + "HHII", tag, field_type, count, value)
+
+        next_ifd = bits_offset + 6 if n + 1 < ifds else 0
+
+        tiff += struct.pack(endian + "I", next_ifd)
+        tiff += struct.pack(endian + "HHH", 8, 8, 8)
+
+    return bytes(tiff + b"\x00" * 64)
+
+
+def make_bmp(width=300, height=200, bit_count=24):
+
+    header = struct.pack(
+        "<IiiHHIIiiII", 40, width, height, 1, bit_count, 0, 0, 2835, 2835, 0, 0
+    )
+    data = b"\x00" * 64
+
+    file_size = 14 + len(header) + len(data)
+
+    return b"BM" + struct.pack("<IHHI", file_size, 0, 0, 54) + header + data
+
+
+def make_jxr():
+
+    return b"II\xbc\x01" + struct.pack("<I", 32) + b"\x00" * 56
+
+
+def make_psd(width=500, height=400, channels=4, depth=8, mode=3):
+
+    psd = b"8BPS" + struct.pack(">H6xHIIHH", 1, channels, height, width, depth, mode)
+
+    # empty color mode data, one resource and empty layer data
+    resource = b"8BIM" + struct.pack(">H", 1005) + b"\x00\x00" + struct.pack(">I", 16)
+    resource += b"\x00" * 16
+
+    psd += struct.pack(">I", 0)
+    psd += struct.pack(">I", len(resource)) + resource
+    psd += struct.pack(">I", 0) + b"\x00\x00" + b"\x00" * 32
+
+    return psd
+
+
+def make_ico(entries=((16, 16, 32), (32, 32, 32), (48, 48, 8)), magic=1):
+
+    count = len(entries)
+
+    directory = bytearray(struct.pack("<HHH", 0, magic, count))
+    data = bytearray()
+
+    for width, height, bit_count in entries:
+
+        if width >= 256:
+            image = make_png(width, height)
+
+        else:
+            image = struct.pack(
+                "<IiiHHIIiiII", 40, width, height * 2, 1, bit_count, 0, 0, 0, 0, 0, 0
+            )
+            image += b"\x00" * 16
+
+        offset = 6 + 16 * count + len(data)
+
+        directory += struct.pack(
+            "<BBBBHHII",
+            width % 256,
+            height % 256,
+            0,
+            0,
+            1,
+            bit_count,
+            len(image),
+            offset,
+        )
+        data += image
+
+    return bytes(directory + data)
+
+
+def make_isobmff(
+    brand=b"heic",
+    compatible=(b"mif1", b"heic"),
+    width=4032,
+    height=3024,
+    alpha=False,
+    meta_padding=0,
+):
+
+    ftyp = box(b"ftyp", brand + b"\x00\x00\x00\x00" + b"".join(compatible))
+
+    ipco = full_box(b"ispe", struct.pack(">II", width, height))
+    ipco += full_box(b"pixi", b"\x03\x08\x08\x08")
+    ipco += box(b"colr", b"nclx" + b"\x00\x01\x00\x0d\x00\x06\x80")
+
+    if alpha:
+        ipco += full_box(b"auxC", b"urn:mpeg:mpegB:cicp:systems:auxiliary:alpha\x00")
+
+    hdlr = full_box(b"hdlr", b"\x00" * 4 + b"pict" + b"\x00" * 12 + b"\x00")
+
+    meta = full_box(
+        b"meta",
+        hdlr + box(b"free", b"\x00" * meta_padding) + box(b"iprp", box(b"ipco", ipco)),
+    )
+
+    return ftyp + meta + box(b"mdat", b"\x00" * 64)
+
+
+def make_mp4(
+    width=1920,
+    height=1080,
+    seconds=10,
+    rotation=0,
+    moov_at_end=False,
+    payload=1 << 20,
+    chunks=16,
+    large_offsets=False,
+    brand=b"isom",
+    compatible=(b"isom", b"iso2", b"avc1", b"mp41"),
+):
+    """
+    Returns:
+        An mp4 with a video and an audio track whose chunks alternate
+        through the media data, which is random bytes of the payload size.
+        Every chunk holds one sample.
+    """
+    # | a     | b     | u | c     | d     | v | x | y | w
+    matrices = {
+        0: (1, 0, 0, 1),
+        90: (0, 1, -1, 0),
+        180: (-1, 0, 0, -1),
+        270: (0, -1, 1, 0),
+    }
+    a, b, c, d = (value << 16 for value in matrices[rotation])
+    matrix = struct.pack(">9i", a, b, 0, c, d, 0, 0, 0, 1 << 30)
+
+    chunk_size = payload // (2 * chunks)
+
+    def trak(track_id, handler, entry, timescale, offsets):
+
+        tkhd = full_box(
+            b"tkhd",
+            struct.pack(">IIIII", 0, 0, track_id, 0, seconds * timescale)
+            + bytes(16)
+            + matrix
+            + struct.pack(">II", width << 16, height << 16),
+            flags=3,
+        )
+        mdhd = full_box(
+            b"mdhd", struct.pack(">IIIIHH", 0, 0, timescale, seconds * timescale, 0, 0)
+        )
+        hdlr = full_box(b"hdlr", b"\x00" * 4 + handler + b"\x00" * 12 + b"\x00")
+
+        if large_offsets:
+            chunk_offsets = full_box(
+                b"co64",
+                struct.pack(">I", len(offsets))
+                + b"".join(struct.pack(">Q", offset) for offset in offsets),
+            )
+        else:
+            chunk_offsets = full_box(
+                b"stco",
+                struct.pack(">I", len(offsets))
+                + b"".join(struct.pack(">I", offset) for offset in offsets),
+            )
+
+        stbl = box(
+            b"stbl",
+            full_box(b"stsd", struct.pack(">I", 1) + entry)
+            + full_box(
+                b"stts", struct.pack(">III", 1, chunks, seconds * timescale // chunks)
+            )
+            + full_box(b"stsc", struct.pack(">IIII", 1, 1, 1, 1))
+            + full_box(b"stsz", struct.pack(">II", chunk_size, chunks))
+            + chunk_offsets,
+        )
+        dref = full_box(b"dref", struct.pack(">I", 1) + full_box(b"url ", b"", flags=1))
+        minf = box(b"minf", box(b"dinf", dref) + stbl)
+
+        return box(b"trak", tkhd + box(b"mdia", mdhd + hdlr + minf))
+
+    avc1 = box(
+        b"avc1",
+        bytes(6)
+        + struct.pack(">H", 1)
+        + bytes(16)
+        + struct.pack(">HHIIIH", width, height, 0x480000, 0x480000, 0, 1)
+        + bytes(32)
+        + struct.pack(">Hh", 24, -1)
+        + box(b"avcC", b"\x01\x64\x00\x28\xff\xe0\x00"),
+    )
+    mp4a = box(
+        b"mp4a",
+        bytes(6)
+        + struct.pack(">H", 1)
+        + bytes(8)
+        + struct.pack(">HHHHI", 2, 16, 0, 0, 44100 << 16),
+    )
+
+    def moov(mdat_start):
+
+        offsets = [mdat_start + i * chunk_size for i in range(2 * chunks)]
+
+        mvhd = full_box(
+            b"mvhd",
+            struct.pack(">IIII", 0, 0, 1000, seconds * 1000)
+            + struct.pack(">IH", 0x10000, 0x100)
+            + bytes(10)
+            + struct.pack(">9i", 1 << 16, 0, 0, 0, 1 << 16, 0, 0, 0, 1 << 30)
+            + bytes(24)
+            + struct.pack(">I", 3),
+        )
+
+        return box(
+            b"moov",
+            mvhd
+            + trak(1, b"vide", avc1, 30000, offsets[0::2])
+            + trak(2, b"soun", mp4a, 44100, offsets[1::2]),
+        )
+
+    ftyp = box(b"ftyp", brand + b"\x00\x00\x00\x00" + b"".join(compatible))
+
+    media = os.urandom(payload)
+
+    if moov_at_end:
+        return ftyp + box(b"mdat", media) + moov(len(ftyp) + 8)
+
+    size = len(moov(0))
+
+    return ftyp + moov(len(ftyp) + size + 8) + box(b"mdat", media)
+
+
+def make_dcm():
+
+    return b"\x00" * 128 + b"DICM" + b"\x02\x00\x00\x00UL\x04\x00" + b"\x00" * 64
+
+
+def make_dwg():
+
+    return b"AC1018" + b"\x00" * 122
+
+
+def make_xcf():
+
+    return b"gimp xcf v011\x00" + struct.pack(">II", 100, 50) + b"\x00" * 64
+
+
+def make_cr2():
+
+    return make_tiff(cr2=True)
+
+
+def _jxl_size_header(width, height):
+
+    # (value, bit count) fields of the SizeHeader, packed from the least
+    # significant bit, using the aspect ratio or small form where possible
+    ratios = ((1, 1), (12, 10), (4, 3), (3, 2), (16, 9), (5, 4), (2, 1))
+
+    def dimension(value):
+        for selector, count in enumerate((9, 13, 18, 30)):
+            if value - 1 < 1 << count:
+                return [(selector, 2), (value - 1, count)]
+
+    small = height % 8 == 0 and height <= 256 and width % 8 == 0 and width <= 256
+
+    fields = [(small, 1)]
+    fields += [(height // 8 - 1, 5)] if small else dimension(height)
+
+    ratio = next(
+        (
+            index + 1
+            for index, (numerator, denominator) in enumerate(ratios)
+            if height * numerator // denominator == width
+        ),
+        0,
+    )
+
+    fields.append((ratio, 3))
+
+    if not ratio:
+        fields += [(width // 8 - 1, 5)] if small else dimension(width)
+
+    bits = 0
+    position = 0
+
+    for value, count in fields:
+        bits |= value << position
+        position += count
+
+    return bits.to_bytes((position + 7) // 8, "little")
+
+
+def make_jxl(width=1000, height=517, container=False):
+
+    codestream = b"\xff\x0a" + _jxl_size_header(width, height) + b"\x00" * 64
+
+    if not container:
+        return codestream
+
+    return (
+        b"\x00\x00\x00\x0cJXL \r\n\x87\n"
+        + box(b"ftyp", b"jxl \x00\x00\x00\x00jxl ")
+        + box(b"jxll", b"\x05")
+        + box(b"jxlp", b"\x80\x00\x00\x00" + codestream)
+    )
+
+
+def make_qoi(width=256, height=128, channels=4):
+
+    return (
+        b"qoif"
+        + struct.pack(">IIBB", width, height, channels, 0)
+        + b"\x00" * 64
+        + b"\x00" * 7
+        + b"\x01"
+    )
+
+
+def make_pcx(width=320, height=240):
+
+    header = struct.pack("<BBBBHHHH", 0x0A, 5, 1, 8, 0, 0, width - 1, height - 1)
+    header += struct.pack("<HH", 72, 72) + b"\x00" * 48 + b"\x00\x03"
+    header += struct.pack("<HH", width, 1)
+
+    return header + b"\x00" * (128 - len(header)) + b"\xc1\x00" * 32
+
+
+def exr_attribute(name: bytes, attribute_type: bytes, value: bytes):
+
+    size = struct.pack("<I", len(value))
+
+    return name + b"\x00" + attribute_type + b"\x00" + size + value
+
+
+def make_exr(width=1920, height=1080):
+
+    window = struct.pack("<iiii", 0, 0, width - 1, height - 1)
+
+    header = exr_attribute(b"channels", b"chlist", b"R\x00" + b"\x00" * 16 + b"\x00")
+    header += exr_attribute(b"compression", b"compression", b"\x00")
+    header += exr_attribute(b"dataWindow", b"box2i", window)
+    header += exr_attribute(b"displayWindow", b"box2i", window)
+
+    return b"\x76\x2f\x31\x01\x02\x00\x00\x00" + header + b"\x00" + b"\x00" * 64
+
+
+def make_hdr(width=768, height=512):
+
+    header = b"#?RADIANCE\nFORMAT=32-bit_rle_rgbe\nEXPOSURE=1.0\n\n"
+    header += "-Y {} +X {}\n".format(height, width).encode()
+
+    return header + b"\x02\x02" + b"\x00" * 64
+
+
+def make_dds(width=512, height=256):
+
+    header = struct.pack("<4sIIIIII", b"DDS ", 124, 0x1007, height, width, 0, 0)
+
+    return header + b"\x00" * (128 - len(header)) + b"\x00" * 64
+
+
+def make_ktx2(width=1024, height=1024, layers=0, faces=6):
+
+    header = b"\xabKTX 20\xbb\r\n\x1a\n"
+    header += struct.pack("<IIIIIIIII", 37, 1, width, height, 0, layers, faces, 1, 0)
+
+    return header + b"\x00" * 64
+
+
+def make_tga(width=200, height=100):
+
+    header = struct.pack("<BBBHHBHHHHBB", 0, 0, 2, 0, 0, 0, 0, 0, width, height, 32, 8)
+
+    return header + b"\x00" * 64
+
+
+def make_svg(width="640", height="480", view_box=None, data=0):
+
+    svg = b'<?xml version="1.0" encoding="UTF-8"?>\n<!-- synthetic -->\n'
+    svg += b'<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN"\n'
+    svg += b' "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">\n'
+    svg += b'<svg xmlns="http://www.w3.org/2000/svg"'
+
+    for name, value in (("width", width), ("height", height), ("viewBox", view_box)):
+        if value is not None:
+            svg += ' {}="{}"'.format(name, value).encode()
+
+    svg += b'><image href="data:image/png;base64,' + b"A" * data + b'"/></svg>\n'
+
+    return svg
+
+
+# one sample per matcher, keyed by the matcher extension
+SAMPLES = {
+    "dwg": make_dwg(),
+    "xcf": make_xcf(),
+    "jpg": make_jpeg(),
+    "jpx": make_jpx(),
+    "apng": make_apng(),
+    "png": make_png(),
+    "gif": make_gif(),
+    "webp": make_webp(),
+    "tif": make_tiff(),
+    "cr2": make_cr2(),
+    "bmp": make_bmp(),
+    "jxr": make_jxr(),
+    "psd": make_psd(),
+    "ico": make_ico(),
+    "cur": make_ico(((32, 32, 32),), magic=2),
+    "heic": make_isobmff(),
+    "dcm": make_dcm(),
+    "avif": make_isobmff(b"avif", (b"mif1", b"avif"), alpha=True),
+    "jxl": make_jxl(),
+    "qoi": make_qoi(),
+    "pcx": make_pcx(),
+    "exr": make_exr(),
+    "hdr": make_hdr(),
+    "dds": make_dds(),
+    "ktx2": make_ktx2(),
+    "svg": make_svg(),
+    "tga": make_tga(),
+}
+
+# shapes which push the headers past the first read, or make the
+# matchers and sizers walk further than usual
+EDGE_CASES = {
+    # the largest possible APP1 segment before the frame header
+    "jpg-exif64k": make_jpeg(exif=0xFFFF),
+    # text chunks filling most of the first 8192 bytes before acTL
+    "apng-chunks": make_apng(
+        chunks=[png_chunk(b"tEXt", b"comment\x00" + b"x" * 96) for _ in range(64)]
+    ),
+    # a meta box which moves ispe far past the first read
+    "heic-meta": make_isobmff(meta_padding=1 << 17),
+    "tif-ifds": make_tiff(ifds=8),
+    "tif-be": make_tiff(endian=">"),
+    "webp-lossless": make_webp(kind="VP8L"),
+    "webp-extended": make_webp(kind="VP8X"),
+    "jpg-progressive": make_jpeg(progressive=True, icc=True),
+    # the container with the codestream split into parts, and the
+    # aspect ratio and small forms of the codestream size header
+    "jxl-container": make_jxl(container=True),
+    "jxl-ratio": make_jxl(1024, 768),
+    "jxl-small": make_jxl(64, 32),
+    # an entry past the 255 pixels the icon directory can hold
+    "ico-large": make_ico(((16, 16, 32), (512, 512, 32))),
+    # the size from the view box, and inline data far past the root element
+    "svg-viewbox": make_svg(width=None, height="3in", view_box="0 0 400 300"),
+    "svg-inline": make_svg(data=1 << 17),
+}
+
+# every sample, keyed by a name starting with the matcher extension
+CORPUS = dict(SAMPLES, **EDGE_CASES)
+
+
+def write_corpus(directory):
+    """
+    Writes every sample of the corpus to a file in the given directory.
+
+    Returns:
+        dict of the sample name to the path of its file.
+    """
+    paths = {}
+
+    for name, data in CORPUS.items():
+
+        path = os.path.join(directory, name)
+
+        with open(path, "wb") as fp:
+            fp.write(data)
+
+        paths[name] = path
+
+    return paths
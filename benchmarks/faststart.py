@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# measures the MB/s of faststart rewriting an mp4 with its moov box after
+# the media data, and the peak memory python allocates while doing it,
+# which stays the size of the moov box whatever the size of the file
+#
+#   python -m benchmarks.faststart [--megabytes N]
+
+import argparse
+import os
+import struct
+import tempfile
+import time
+import tracemalloc
+
+import imagetype
+from imagetype.faststart import faststart
+
+from .corpus import make_mp4
+
+
+def write_source(path, megabytes: int):
+    """
+    Writes an mp4 with a minute of chunks and its moov box after a media
+    data box of the given size, a block at a time.
+
+    Returns:
+        The size of the moov box.
+    """
+    template = make_mp4(moov_at_end=True, payload=1 << 16, chunks=30 * 60)
+
+    ftyp_size = struct.unpack(">I", template[:4])[0]
+    mdat_size = struct.unpack(">I", template[ftyp_size : ftyp_size + 4])[0]
+
+    moov = template[ftyp_size + mdat_size :]
+
+    block = os.urandom(1 << 20)
+
+    with open(path, "wb") as fp:
+
+        fp.write(template[:ftyp_size])
+        fp.write(struct.pack(">I", 8 + (megabytes << 20)) + b"mdat")
+
+        for _ in range(megabytes):
+            fp.write(block)
+
+        fp.write(moov)
+
+    return len(moov)
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, nargs="+", default=[64, 256, 1024])
+    args = parser.parse_args()
+
+    print(
+        "{:>10} {:>10} {:>16} {:>12}".format("MB", "MB/s", "peak memory KB", "moov KB")
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        source = os.path.join(directory, "source.mp4")
+        destination = os.path.join(directory, "destination.mp4")
+
+        for megabytes in args.megabytes:
+
+            moov = write_source(source, megabytes)
+
+            tracemalloc.start()
+
+            start = time.perf_counter()
+            faststart(source, destination)
+            elapsed = time.perf_counter() - start
+
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            if imagetype.probe_video(destination) is None:
+                raise SystemExit("the rewritten file has no moov box")
+
+            os.remove(destination)
+
+            print(
+                "{:10} {:10.0f} {:16.0f} {:12.0f}".format(
+                    megabytes, megabytes / elapsed, peak / 1024, moov / 1024
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+
+# feeds hostile files, with lengths and counts crafted to make the parsers
+# loop or allocate without end, and seeded mutations of the corpus to every
+# entry point, checking that nothing but a ValueError escapes and reporting
+# the slowest calls with and without a budget
+#
+#   python -m benchmarks.fuzz [--mutations N] [--seed N]
+
+import argparse
+import os
+import random
+import struct
+import tempfile
+import time
+
+from imagetype import get_info, identify, probe_video
+from imagetype.budget import Budget, BudgetExceeded
+from imagetype.validate import validate
+from imagetype.FileTypes.libisobmff import MediaFile
+
+from .corpus import SAMPLES, box, full_box, png_chunk, make_png
+
+
+def jpeg_segments(count=250000):
+    """
+    A jpeg of empty comment segments, without a frame header.
+    """
+    return b"\xff\xd8" + b"\xff\xfe\x00\x02" * count
+
+
+def tiff_fields(count=65535):
+    """
+    A tiff whose directory declares the most fields, all of them present.
+    """
+    field = struct.pack("<HHII", 256, 4, 1, 1)
+
+    return b"II*\x00" + struct.pack("<IH", 8, count) + field * count + bytes(4)
+
+
+def tiff_chain(count=50000):
+    """
+    A tiff with a chain of empty directories.
+    """
+    directories = b"".join(
+        struct.pack("<HI", 0, 8 + 6 * (i + 1) if i + 1 < count else 0)
+        for i in range(count)
+    )
+
+    return b"II*\x00" + struct.pack("<I", 8) + directories
+
+
+def ico_count(count=65535):
+    """
+    An ico declaring the most images, all of them pointing at one header.
+    """
+    offset = 6 + 16 * count
+    entry = struct.pack("<BBBBHHII", 16, 16, 0, 0, 1, 32, 40, offset)
+    header = struct.pack("<IiiHHIIiiII", 40, 16, 32, 1, 32, 0, 0, 0, 0, 0, 0)
+
+    return struct.pack("<HHH", 0, 1, count) + entry * count + header
+
+
+def apng_chunks(count=100000):
+    """
+    A png whose acTL chunk follows many empty chunks.
+    """
+    chunks = (png_chunk(b"tEXt", b""),) * count
+
+    return make_png(chunks=chunks + (png_chunk(b"acTL", struct.pack(">II", 2, 0)),))
+
+
+def heic_boxes(count=100000):
+    """
+    A heic whose meta box holds many empty boxes.
+    """
+    ftyp = box(b"ftyp", b"heic\x00\x00\x00\x00mif1heic")
+
+    return ftyp + full_box(b"meta", box(b"free", b"") * count)
+
+
+def heic_iloc(count=65535):
+    """
+    A heic whose iloc box declares the most items and extents.
+    """
+    ftyp = box(b"ftyp", b"heic\x00\x00\x00\x00mif1heic")
+
+    item = struct.pack(">HHH", 1, 0, count)
+
+    iloc = full_box(b"iloc", b"\x44\x00" + struct.pack(">H", count) + item)
+
+    return ftyp + full_box(b"meta", iloc)
+
+
+def mp4_stsz(count=(1 << 32) - 1):
+    """
+    An mp4 whose stsz box declares the most samples, none of them present.
+    """
+    ftyp = box(b"ftyp", b"isom\x00\x00\x00\x00isomavc1")
+
+    stsz = full_box(b"stsz", struct.pack(">II", 0, count))
+
+    nested = stsz
+
+    for box_type in (b"stbl", b"minf", b"mdia", b"trak", b"moov"):
+        nested = box(box_type, nested)
+
+    return ftyp + nested
+
+
+def mp4_boxes(count=100000):
+    """
+    An mp4 whose moov box holds many empty boxes.
+    """
+    ftyp = box(b"ftyp", b"isom\x00\x00\x00\x00isomavc1")
+
+    return ftyp + box(b"moov", box(b"free", b"") * count)
+
+
+HOSTILE = {
+    "jpeg segments": jpeg_segments,
+    "tiff fields": tiff_fields,
+    "tiff chain": tiff_chain,
+    "ico count": ico_count,
+    "apng chunks": apng_chunks,
+    "heic boxes": heic_boxes,
+    "heic iloc": heic_iloc,
+    "mp4 stsz": mp4_stsz,
+    "mp4 boxes": mp4_boxes,
+}
+
+
+def mutate(data: bytes, rng: random.Random):
+    """
+    Returns:
+        The data with a few random bytes flipped, a random field set to all
+        ones, or cut short.
+    """
+    data = bytearray(data)
+
+    kind = rng.randrange(3)
+
+    if kind == 0:
+        for _ in range(rng.randrange(1, 8)):
+            data[rng.randrange(len(data))] ^= 1 << rng.randrange(8)
+
+    elif kind == 1:
+        at = rng.randrange(max(1, len(data) - 4))
+        data[at : at + 4] = b"\xff\xff\xff\xff"
+
+    else:
+        del data[rng.randrange(1, len(data)) :]
+
+    return bytes(data)
+
+
+def make_inputs(mutations: int, seed=0):
+    """
+    Returns:
+        list of (name, bytes) of the hostile files and the mutated samples.
+    """
+    rng = random.Random(seed)
+
+    inputs = [(name, make()) for name, make in HOSTILE.items()]
+
+    samples = sorted(SAMPLES.items())
+
+    for i in range(mutations):
+        name, data = rng.choice(samples)
+        inputs.append(("{} mutation {}".format(name, i), mutate(data, rng)))
+
+    return inputs
+
+
+def read_media_file(path: str):
+
+    MediaFile().read(path)
+
+
+def run(calls, inputs, budget):
+    """
+    Returns:
+        Tuple of the seconds of every call, the calls stopped by the budget,
+        and the (call, input, exception) of every other exception than a
+        ValueError.
+    """
+    times = []
+    exceeded = 0
+    escaped = []
+
+    for name, data, path in inputs:
+
+        for call_name, call in calls.items():
+
+            start = time.perf_counter()
+
+            try:
+                if budget is None:
+                    call(data, path)
+                else:
+                    with budget:
+                        call(data, path)
+
+            except BudgetExceeded:
+                exceeded += 1
+
+            except ValueError:
+                pass
+
+            except Exception as e:
+                escaped.append((call_name, name, repr(e)))
+
+            times.append(time.perf_counter() - start)
+
+    return times, exceeded, escaped
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mutations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    calls = {
+        "identify": lambda data, path: identify(data),
+        "get_info": lambda data, path: get_info(data),
+        "validate": lambda data, path: validate(data, check_crc=True),
+        "probe_video": lambda data, path: probe_video(data),
+        "MediaFile": lambda data, path: read_media_file(path),
+    }
+
+    budgets = {
+        "no budget": None,
+        "budget": Budget(
+            max_iterations=20000, max_bytes=4 << 20, max_entries=20000, max_seconds=0.05
+        ),
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        inputs = []
+
+        for i, (name, data) in enumerate(make_inputs(args.mutations, args.seed)):
+
+            path = os.path.join(directory, str(i))
+
+            with open(path, "wb") as fp:
+                fp.write(data)
+
+            inputs.append((name, data, path))
+
+        # the entry counts of libisobmff, up to 2 ** 32, only end early
+        # with a budget
+        unbounded = {name: call for name, call in calls.items() if name != "MediaFile"}
+
+        print(
+            "{:10} {:>8} {:>10} {:>10} {:>9} {:>8}".format(
+                "", "calls", "p99 ms", "max ms", "exceeded", "escaped"
+            )
+        )
+
+        for label, budget in budgets.items():
+
+            times, exceeded, escaped = run(
+                calls if budget is not None else unbounded, inputs, budget
+            )
+
+            times.sort()
+
+            print(
+                "{:10} {:>8} {:>10.2f} {:>10.2f} {:>9} {:>8}".format(
+                    label,
+                    len(times),
+                    times[int(len(times) * 0.99)] * 1000,
+                    times[-1] * 1000,
+                    exceeded,
+                    len(escaped),
+                )
+            )
+
+            for call_name, name, error in escaped[:20]:
+                print("  {} on {}: {}".format(call_name, name, error))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+# compares the fused identify() against image_match() followed by get_size(),
+# and against image_match() followed by probe() which returns the same details
+#
+#   python -m benchmarks.identify [--number N]
+
+import argparse
+import timeit
+
+import imagetype
+
+from .corpus import SAMPLES
+
+
+def two_calls(data):
+
+    matcher = imagetype.image_match(data)
+
+    if matcher is None:
+        return None
+
+    return matcher, matcher.get_size(imagetype.get_bytes(data))
+
+
+def match_and_probe(data):
+
+    matcher = imagetype.image_match(data)
+
+    if matcher is None:
+        return None
+
+    return matcher, matcher.probe(imagetype.get_bytes(data))
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(
+        "{:<6} {:>14} {:>15} {:>14}".format(
+            "type", "match+size/s", "match+probe/s", "identify/s"
+        )
+    )
+
+    for extension, data in SAMPLES.items():
+
+        data = bytearray(data)
+
+        assert imagetype.identify(data)[0].extension == extension
+
+        sized = timeit.timeit(lambda: two_calls(data), number=args.number)
+        probed = timeit.timeit(lambda: match_and_probe(data), number=args.number)
+        fused = timeit.timeit(lambda: imagetype.identify(data), number=args.number)
+
+        print(
+            "{:<6} {:>14.0f} {:>15.0f} {:>14.0f}".format(
+                extension,
+                args.number / sized,
+                args.number / probed,
+                args.number / fused,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# checks the cold import of imagetype against a time budget, using the
+# cumulative time python -X importtime reports for it in a fresh interpreter,
+# and that modules which are slow to import are left out
+#
+#   python -m benchmarks.importtime [--budget MS] [--runs N]
+
+import argparse
+import subprocess
+import sys
+
+
+# modules import imagetype must not pull in, each costs a few milliseconds
+FORBIDDEN = (
+    "re",
+    "typing",
+    "pathlib",
+    "contextlib",
+    "imagetype.FileTypes.libisobmff",
+)
+
+
+def import_times():
+    """
+    Returns:
+        dict of every module imported by import imagetype, including itself,
+        to its cumulative import time in microseconds.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import imagetype"],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stderr
+
+    lines = [
+        line.split("|")
+        for line in output.splitlines()
+        if line.startswith("import time:") and "cumulative" not in line
+    ]
+
+    def depth(module):
+        return len(module) - len(module.lstrip())
+
+    # imports nested under imagetype are printed right before it, indented
+    # deeper, while those of site and the interpreter start come earlier
+    end = next(i for i, line in enumerate(lines) if line[2].strip() == "imagetype")
+
+    times = {"imagetype": int(lines[end][1])}
+
+    for _, cumulative, module in reversed(lines[:end]):
+
+        if depth(module) <= depth(lines[end][2]):
+            break
+
+        times[module.strip()] = int(cumulative)
+
+    return times
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=float, default=10, help="milliseconds")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # the fastest run, as the others only add noise
+    runs = [import_times() for _ in range(args.runs)]
+    times = min(runs, key=lambda times: times["imagetype"])
+
+    total = times["imagetype"] / 1000
+
+    print("import imagetype: {:.2f} ms, budget {:.2f} ms".format(total, args.budget))
+
+    failed = total > args.budget
+
+    for module in FORBIDDEN:
+        if module in times:
+            print("imports {} ({:.2f} ms)".format(module, times[module] / 1000))
+            failed = True
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+# measures the memory and pickling cost per record of bulk detection output:
+# (type, (width, height)) tuples, ImageInfo records and an ImageInfoArray
+#
+#   python -m benchmarks.info [--records N]
+
+import argparse
+import pickle
+import time
+import tracemalloc
+
+from imagetype import get_info
+from imagetype.info import ImageInfoArray
+
+from .corpus import SAMPLES
+
+
+def measure(build):
+    """
+    Returns:
+        Tuple of the built object and the bytes it allocated.
+    """
+    tracemalloc.start()
+
+    before = tracemalloc.get_traced_memory()[0]
+    built = build()
+    after = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.stop()
+
+    return built, after - before
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200000)
+    args = parser.parse_args()
+
+    infos = [get_info(data) for data in SAMPLES.values()]
+    infos = [info for info in infos if info is not None]
+
+    count = args.records
+
+    # distinct sizes, so no two records share their width and height ints
+    def sized(i):
+        info = infos[i % len(infos)]
+        return info.mime, info.extension, 1000 + i, 2000 + i, info.frames, info.flags
+
+    types = {info.extension: info for info in infos}
+
+    contenders = {
+        "tuples": lambda: [
+            (types[fields[1]], (fields[2], fields[3]))
+            for fields in map(sized, range(count))
+        ],
+        "ImageInfo": lambda: [
+            type(infos[0])(*fields) for fields in map(sized, range(count))
+        ],
+        "ImageInfoArray": lambda: ImageInfoArray(
+            type(infos[0])(*fields) for fields in map(sized, range(count))
+        ),
+    }
+
+    print(
+        "{:16} {:>12} {:>14} {:>12} {:>12}".format(
+            "records", "bytes/record", "pickled/record", "dumps ns", "loads ns"
+        )
+    )
+
+    for name, build in contenders.items():
+
+        built, allocated = measure(build)
+
+        start = time.perf_counter_ns()
+        pickled = pickle.dumps(built, protocol=pickle.HIGHEST_PROTOCOL)
+        dumps = time.perf_counter_ns() - start
+
+        start = time.perf_counter_ns()
+        pickle.loads(pickled)
+        loads = time.perf_counter_ns() - start
+
+        print(
+            "{:16} {:12.1f} {:14.1f} {:12.1f} {:12.1f}".format(
+                name,
+                allocated / count,
+                len(pickled) / count,
+                dumps / count,
+                loads / count,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+# measures the ops/s, bytes read and memory allocated per call of the
+# match, get_size and file path entry points over the synthetic corpus,
+# writing the results as JSON so runs of different commits can be compared
+#
+#   python -m benchmarks.run [--number N] [--output FILE] [--compare FILE]
+
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import timeit
+import tracemalloc
+
+import imagetype
+from imagetype import utils
+
+from .corpus import CORPUS, write_corpus
+
+
+class CountingFile(object):
+    """
+    Wraps a binary file, adding up the bytes read through it.
+    """
+
+    total = 0
+
+    def __init__(self, file):
+        self.file = file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.file.close()
+
+    def read(self, *args):
+
+        data = self.file.read(*args)
+
+        CountingFile.total += len(data)
+
+        return data
+
+
+def counting_open(path, mode="r", *args, **kwargs):
+    return CountingFile(open(path, mode, *args, **kwargs))
+
+
+def entry_points(data, path):
+
+    buf = imagetype.get_bytes(bytearray(data))
+    matcher = imagetype.image_match(buf)
+
+    return {
+        "match": lambda: imagetype.image_match(buf),
+        "get_size": lambda: matcher.get_size(buf),
+        "identify": lambda: imagetype.identify(buf),
+        "path_match": lambda: imagetype.image_match(path),
+        "path_identify": lambda: imagetype.identify(path),
+    }
+
+
+def measure(call, number):
+
+    seconds = timeit.timeit(call, number=number)
+
+    # the file reads of the path entry points go through utils.open
+    utils.open = counting_open
+    CountingFile.total = 0
+
+    try:
+        call()
+        bytes_read = CountingFile.total
+    finally:
+        del utils.open
+
+    tracemalloc.start()
+
+    try:
+        call()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops": number / seconds,
+        "bytes_read": bytes_read,
+        "peak_alloc": peak,
+    }
+
+
+def git_commit():
+
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(number):
+
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        paths = write_corpus(directory)
+
+        for name, data in CORPUS.items():
+
+            calls = entry_points(data, paths[name])
+
+            results[name] = {
+                entry: measure(call, number) for entry, call in calls.items()
+            }
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "number": number,
+        "results": results,
+    }
+
+
+def compare(old, new, threshold):
+
+    print(
+        "{:<16} {:<14} {:>12} {:>12} {:>8}".format(
+            "sample", "entry", "old ops/s", "new ops/s", "change"
+        )
+    )
+
+    regressions = 0
+
+    for name, entries in new["results"].items():
+        for entry, result in entries.items():
+
+            before = old["results"].get(name, {}).get(entry)
+
+            if before is None:
+                continue
+
+            change = result["ops"] / before["ops"] - 1
+
+            flag = ""
+
+            if change < -threshold:
+                flag = "  slower"
+                regressions += 1
+
+            print(
+                "{:<16} {:<14} {:>12.0f} {:>12.0f} {:>+7.1%}{}".format(
+                    name, entry, before["ops"], result["ops"], change, flag
+                )
+            )
+
+    return regressions
+
+
+def report(results):
+
+    print(
+        "{:<16} {:<14} {:>12} {:>11} {:>11}".format(
+            "sample", "entry", "ops/s", "bytes read", "peak alloc"
+        )
+    )
+
+    for name, entries in results["results"].items():
+        for entry, result in entries.items():
+            print(
+                "{:<16} {:<14} {:>12.0f} {:>11} {:>11}".format(
+                    name,
+                    entry,
+                    result["ops"],
+                    result["bytes_read"],
+                    result["peak_alloc"],
+                )
+            )
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown reported as a regression",
+    )
+    args = parser.parse_args()
+
+    results = run(args.number)
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2, sort_keys=True)
+
+    if args.compare:
+
+        with open(args.compare) as fp:
+            old = json.load(fp)
+
+        regressions = compare(old, results, args.threshold)
+
+        raise SystemExit(1 if regressions else 0)
+
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+# measures the files/s of scan.scan against calling get_info on every path,
+# over a tree of corpus files whose names are in a different order than
+# their inodes, with the page cache of the files dropped before each run
+#
+#   python -m benchmarks.scan [--files N] [--padding BYTES] [--directory DIR]
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import imagetype
+from imagetype.scan import scan, iter_files
+
+from .corpus import SAMPLES
+
+
+def write_tree(directory, files: int, padding: int):
+    """
+    Writes the samples of the corpus in turn, padded to fill more than a
+    header read, to files created in a shuffled order of their names.
+
+    Returns:
+        list of the paths sorted by name.
+    """
+    samples = list(SAMPLES.values())
+    names = ["{:08}".format(i) for i in range(files)]
+
+    random.Random(0).shuffle(names)
+
+    for i, name in enumerate(names):
+
+        subdirectory = os.path.join(directory, name[:5])
+        os.makedirs(subdirectory, exist_ok=True)
+
+        with open(os.path.join(subdirectory, name), "wb") as fp:
+            fp.write(samples[i % len(samples)])
+            fp.write(bytes(padding))
+
+    return sorted(iter_files(directory))
+
+
+def drop_cache(paths):
+    """
+    Evicts the files from the page cache, through /proc when allowed,
+    otherwise file by file.
+
+    Returns:
+        Whether the cache could be dropped.
+    """
+    os.sync()
+
+    try:
+        with open("/proc/sys/vm/drop_caches", "w") as fp:
+            fp.write("3")
+        return True
+    except OSError:
+        pass
+
+    if not hasattr(os, "posix_fadvise"):
+        return False
+
+    for path in paths:
+
+        fd = os.open(path, os.O_RDONLY)
+
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+    return True
+
+
+def naive(paths):
+    return [(path, imagetype.get_info(path)) for path in paths]
+
+
+def scheduled(paths, workers: int, window: int):
+    return list(scan(paths, workers=workers, window=window))
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--padding", type=int, default=32768)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--window", type=int, default=64)
+    parser.add_argument(
+        "--directory", help="scan an existing tree instead of a generated one"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        if args.directory:
+            paths = sorted(iter_files(args.directory))
+        else:
+            paths = write_tree(directory, args.files, args.padding)
+
+        contenders = {
+            "get_info loop": lambda: naive(paths),
+            "scan": lambda: scheduled(paths, args.workers, args.window),
+        }
+
+        expected = sorted(naive(paths), key=lambda item: item[0])
+
+        print("{:16} {:>14} {:>14}".format("files/s", "cold", "warm"))
+
+        for name, run in contenders.items():
+
+            cold = drop_cache(paths)
+
+            start = time.perf_counter()
+            results = run()
+            cold_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            run()
+            warm_time = time.perf_counter() - start
+
+            if sorted(results, key=lambda item: item[0]) != expected:
+                raise SystemExit("{} disagrees with get_info".format(name))
+
+            print(
+                "{:16} {:>14} {:14.0f}".format(
+                    name,
+                    "{:.0f}".format(len(paths) / cold_time) if cold else "n/a",
+                    len(paths) / warm_time,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+# measures probe_video on mp4 files with the moov box before and after the
+# media data, against reading the top level boxes straight through to the
+# moov box like libisobmff.MediaFile.read does, and counts its reads
+#
+#   python -m benchmarks.video [--megabytes N] [--number N]
+
+import argparse
+import os
+import struct
+import tempfile
+import time
+
+import imagetype
+from imagetype.rangereader import FileRangeReader
+
+from .corpus import make_mp4
+
+
+class CountingReader(FileRangeReader):
+    def __init__(self, file):
+        super(CountingReader, self).__init__(file)
+        self.reads = 0
+
+    def read_at(self, offset: int, length: int):
+        self.reads += 1
+        return super(CountingReader, self).read_at(offset, length)
+
+
+def read_through(path):
+
+    # every box is read whole, the media data included
+    with open(path, "rb") as file:
+
+        while True:
+
+            header = file.read(8)
+
+            if len(header) < 8:
+                return None
+
+            size, box_type = struct.unpack(">I4s", header)
+            body = file.read(size - 8)
+
+            if box_type == b"moov":
+                return body
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, default=256)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        "{:12} {:>16} {:>16} {:>8}".format(
+            "moov", "read through ms", "probe_video ms", "reads"
+        )
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        for name, moov_at_end in (("start", False), ("end", True)):
+
+            path = os.path.join(directory, name + ".mp4")
+
+            with open(path, "wb") as fp:
+                fp.write(
+                    make_mp4(
+                        moov_at_end=moov_at_end,
+                        payload=args.megabytes << 20,
+                        chunks=30 * 60,
+                    )
+                )
+
+            start = time.perf_counter()
+            for _ in range(args.number):
+                read_through(path)
+            through_time = (time.perf_counter() - start) / args.number
+
+            start = time.perf_counter()
+            for _ in range(args.number):
+                imagetype.probe_video(path)
+            probe_time = (time.perf_counter() - start) / args.number
+
+            with CountingReader(path) as reader:
+                imagetype.probe_video(reader)
+
+            print(
+                "{:12} {:16.3f} {:16.3f} {:8}".format(
+                    name, through_time * 1000, probe_time * 1000, reader.reads
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
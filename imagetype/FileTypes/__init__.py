@@ -1,5 +1,7 @@
 from .image import *
-from .libisobmff import *
+from .video import *
+from .registry import Registry
+from .signature import SignatureTable
 
 # Supported image types
 IMAGE = (
@@ -17,7 +19,57 @@ IMAGE = (
     Jxr(),
     Psd(),
     Ico(),
+    Cur(),
     Heic(),
     Dcm(),
     Avif(),
+    Heif(),
+    Cr3(),
+    Jxl(),
+    Qoi(),
+    Pcx(),
+    Exr(),
+    Hdr(),
+    Dds(),
+    Ktx2(),
+    Svg(),
+    Tga(),
 )
+
+# the signatures of every image type compiled into one matcher
+IMAGE_SIGNATURES = SignatureTable(IMAGE)
+
+# lookups of the image types by MIME type and extension
+IMAGE_REGISTRY = Registry(IMAGE)
+
+# Supported video types, all ISO-BMFF based and told apart by their brands
+VIDEO = (
+    Mov(),
+    M4v(),
+    ThreeGpp2(),
+    ThreeGpp(),
+    Mp4(),
+)
+
+
+def __getattr__(name):
+
+    # libisobmff and its box classes are only imported on first use,
+    # as the matchers don't need them and they are slow to import
+    import importlib
+
+    libisobmff = importlib.import_module(".libisobmff", __name__)
+
+    if name == "libisobmff":
+        return libisobmff
+
+    try:
+        value = getattr(libisobmff, name)
+    except AttributeError:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        ) from None
+
+    globals()[name] = value
+
+    return value
@@ -1,3 +1,55 @@
+from .. import instrument
+
+
+class ProbeResult(object):
+    """
+    Compact record of the image characteristics found in a header.
+    Fields a format does not carry, or that could not be reached
+    within the given buffer, are left as None.
+    """
+
+    __slots__ = (
+        "width",
+        "height",
+        "bit_depth",
+        "channels",
+        "color_type",
+        "interlaced",
+        "has_alpha",
+        "has_icc",
+    )
+
+    def __init__(
+        self,
+        width=0,
+        height=0,
+        bit_depth=None,
+        channels=None,
+        color_type=None,
+        interlaced=None,
+        has_alpha=None,
+        has_icc=None,
+    ):
+        self.width = width
+        self.height = height
+        self.bit_depth = bit_depth
+        self.channels = channels
+        self.color_type = color_type
+        self.interlaced = interlaced
+        self.has_alpha = has_alpha
+        self.has_icc = has_icc
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    def __repr__(self):
+        fields = ", ".join(
+            "{}: {}".format(name, getattr(self, name)) for name in self.__slots__
+        )
+        return "<{} {}>".format(self.__class__.__name__, fields)
+
+
 class FileType(object):
     """
     Represents the file type object inherited by
@@ -23,10 +75,148 @@ class FileType(object):
         return self.__extension_alternate
 
     def is_extension(self, extension):
-        return self.__extension is extension
+        return self.__extension == extension
 
     def is_mime(self, mime):
-        return self.__mime is mime
+        return self.__mime == mime
+
+    # the magic bytes of the type, see signature.Signature
+    SIGNATURES = ()
 
     def match(self, buf):
-        raise NotImplementedError
+        for signature in self.SIGNATURES:
+            if signature.match(buf):
+                return True
+
+        return False
+
+    def can_overlap(self, other):
+        """
+        Checks whether some buffer could match both types, see
+        signature.Signature.can_overlap.
+        """
+        # types matched by their own code can't be compared, so assume the worst
+        if type(self).match is not FileType.match:
+            return True
+
+        if type(other).match is not FileType.match:
+            return True
+
+        for x in self.SIGNATURES:
+            for y in other.SIGNATURES:
+                if x.can_overlap(y):
+                    return True
+
+        return False
+
+    def get_size(self, buf, limits=None):
+        """
+        Reads the image dimensions from the header.
+
+        Args:
+            buf: bytearray holding the start of the file.
+            limits: optional limits.Limits every image the header declares
+            is checked against. The pixels per byte limit needs the file
+            size, which only identify knows.
+
+        Returns:
+            Tuple of (width, height), or (0, 0) if the size is unknown.
+
+        Raises:
+            DecompressionBombError: if the header declares more than limits allow.
+        """
+        if instrument._active is not None:
+            start = instrument.clock()
+            size = self._get_size(buf) if self.match(buf) else (0, 0)
+            instrument._active.record_time("get_size", start)
+
+        elif not self.match(buf):
+            return (0, 0)
+
+        else:
+            size = self._get_size(buf)
+
+        if limits is not None and size != (0, 0):
+            limits.enforce(self, buf)
+
+        return size
+
+    def probe(self, buf):
+        """
+        Reads the image characteristics from the header in a single pass.
+
+        Args:
+            buf: bytearray holding the start of the file.
+
+        Returns:
+            ProbeResult if the buffer matches this type. Otherwise None.
+        """
+        if not self.match(buf):
+            return None
+
+        return self._probe(buf)
+
+    def _get_size(self, buf):
+        # the buffer is known to match, so no signature checks are needed
+        return (0, 0)
+
+    def _probe(self, buf):
+        # the buffer is known to match, so no signature checks are needed
+        return ProbeResult(*self._get_size(buf))
+
+    def _get_images(self, buf):
+        """
+        Reads the (width, height) of every image the header declares, which
+        limits are checked against. By default the one size of the type.
+        """
+        return [self._get_size(buf)]
+
+    def _get_frames(self, buf):
+        # the number of frames when it is not the number of images
+        return None
+
+    def _is_animated(self, buf):
+        # whether the header marks the file as animated, None if it doesn't tell
+        return None
+
+    def _read_size(self, head):
+        """
+        Generator reading the size through range requests, see rangereader.
+        It yields lists of (offset, length) ranges, is sent back a list with
+        the bytes read for each, and returns the (width, height).
+
+        By default the size is read from the already matched head alone.
+        """
+        yield from ()
+
+        return self._get_size(head)
+
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
+        """
+        Checks the structure of a file matching this type by skipping
+        from header to header, without decoding anything, see validate.
+
+        Args:
+            read: function taking an offset and a length, returning the
+            bytes there, which are shorter than length past the end.
+            start: the offset of the file.
+            limit: the offset the file can't extend past.
+            check_crc: whether to also check the checksums the format has.
+
+        Returns:
+            Tuple of the failure reason, or None if the structure is valid,
+            and the offset where the structure ended or the failure was found.
+            None if the type has no structure to check.
+        """
+        return None
+
+    def _find_end(self, read, start: int, limit: int):
+        """
+        Finds where a file of this type embedded in a larger one ends, see
+        carve. Unlike _validate, limit only bounds the search, and whatever
+        follows the structure is not part of the file.
+
+        Returns:
+            Like _validate.
+        """
+        return self._validate(read, start, limit, False)
@@ -1,4 +1,6 @@
-from typing import BinaryIO
+# typing is only needed by type checkers and is slow to import
+if False:
+    from typing import BinaryIO
 
 
 def read_bytes(buf: bytearray, length: int, offset: int = 0):
@@ -22,10 +24,10 @@ def read_str(buf: bytearray, length: int, offset: int = 0):
     return read_bytes(buf, length, offset).decode("utf-8", errors="ignore")
 
 
-def buffer_read_int(buffer: BinaryIO, length: int, byteorder="big", signed=False):
+def buffer_read_int(buffer: "BinaryIO", length: int, byteorder="big", signed=False):
     return int.from_bytes(buffer.read(length), byteorder=byteorder, signed=signed)
 
 
-def buffer_read_str(buffer: BinaryIO, length: int):
+def buffer_read_str(buffer: "BinaryIO", length: int):
 
     return buffer.read(length).decode("utf-8", errors="ignore")
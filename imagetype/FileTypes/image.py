@@ -1,5 +1,410 @@
-from .isobmff import IsoBmff
-from .base import FileType
+import os
+import zlib
+
+from ..budget import BudgetExceeded, get_active
+from .isobmff import IsoBmff, _is_family, _validate_boxes
+from .base import FileType, ProbeResult
+from .signature import Signature
+from . import bytereader as br
+
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+def _has_actl(buf: bytearray):
+
+    budget = get_active()
+
+    # cursor in buf, skip already readed 8 bytes
+    i = 8
+    while len(buf) > i:
+
+        if budget is not None:
+            budget.step()
+
+        data_length = int.from_bytes(buf[i : i + 4], byteorder="big")
+        i += 4
+
+        chunk_type = buf[i : i + 4]
+        i += 4
+
+        # acTL chunk in APNG should appears first than IDAT
+        # IEND is end of PNG
+        if chunk_type == b"IDAT" or chunk_type == b"IEND":
+            return False
+        elif chunk_type == b"acTL":
+            return True
+
+        # move to the next chunk by skipping data and crc (4 bytes)
+        i += data_length + 4
+
+    return False
+
+
+def _is_not_cr2(buf: bytearray):
+
+    # cr2 files are tiff files with CR after the header
+    return not (buf[8] == 0x43 and buf[9] == 0x52)
+
+
+def _has_entries(buf: bytearray):
+
+    # the number of images in the directory of ico and cur files
+    return buf[4] != 0 or buf[5] != 0
+
+
+def _is_tga(buf: bytearray):
+
+    # tga has no magic bytes, so the header fields have to be plausible
+    # | id length | color map type | image type | color map spec | image spec
+    # | 1         | 1              | 1          | 5 bytes        | 10 bytes
+    colormap_type = buf[1]
+    image_type = buf[2]
+
+    if image_type not in (1, 2, 3, 9, 10, 11):
+        return False
+
+    # color mapped images need a color map
+    if colormap_type == 1:
+        if buf[7] not in (15, 16, 24, 32):
+            return False
+
+    elif image_type & 7 == 1:
+        return False
+
+    # the two top bits of the image descriptor are reserved
+    if buf[16] not in (8, 15, 16, 24, 32) or buf[17] & 0xC0:
+        return False
+
+    width = br.read_int(buf, 2, 12, byteorder="little")
+    height = br.read_int(buf, 2, 14, byteorder="little")
+
+    return width > 0 and height > 0
+
+
+def _is_pcx(buf: bytearray):
+
+    # | manufacturer | version | encoding | bits per plane
+    return buf[1] in (0, 2, 3, 4, 5) and buf[3] in (1, 2, 4, 8)
+
+
+# jpeg xl aspect ratios which let the codestream leave out the width
+_JXL_RATIOS = (None, (1, 1), (12, 10), (4, 3), (3, 2), (16, 9), (5, 4), (2, 1))
+
+
+def _read_jxl_dimension(bits: int, position: int):
+
+    # 2 bits choose how many bits the dimension minus 1 takes
+    length = (9, 13, 18, 30)[bits >> position & 3]
+
+    position += 2
+
+    return 1 + (bits >> position & ((1 << length) - 1)), position + length
+
+
+def _get_jxl_size(buf: bytearray, i: int):
+
+    # the SizeHeader follows the 0xFF0A codestream signature, its fields
+    # are packed starting from the least significant bit, 68 bits at most
+    if len(buf) < i + 11 or buf[i : i + 2] != b"\xff\x0a":
+        return (0, 0)
+
+    bits = int.from_bytes(buf[i + 2 : i + 11], byteorder="little")
+
+    # small images have dimensions which are multiples of 8 up to 256
+    small = bits & 1
+
+    if small:
+        height = 8 * (1 + (bits >> 1 & 0x1F))
+        position = 6
+
+    else:
+        height, position = _read_jxl_dimension(bits, 1)
+
+    ratio = bits >> position & 7
+
+    position += 3
+
+    if ratio:
+        numerator, denominator = _JXL_RATIOS[ratio]
+        width = height * numerator // denominator
+
+    elif small:
+        width = 8 * (1 + (bits >> position & 0x1F))
+
+    else:
+        width, _ = _read_jxl_dimension(bits, position)
+
+    return width, height
+
+
+class _SvgRoot(Exception):
+    # raised from the expat handler to stop parsing at the root element
+    pass
+
+
+def _create_svg_parser():
+
+    # expat is only imported once an svg candidate shows up
+    from xml.parsers import expat
+
+    def start(name, attributes):
+        raise _SvgRoot(name, attributes)
+
+    # entity declarations only serve to expand into huge documents
+    def entity(*args):
+        raise expat.ExpatError("entity declarations are not allowed")
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.EntityDeclHandler = entity
+
+    return parser
+
+
+def _feed_svg_parser(parser, data, final=False):
+    """
+    Parses the next part of a document, up to its root element.
+
+    Returns:
+        The attributes of the root element if it is svg. None if it is
+        another element or the document is not xml. False if the root
+        element was not reached yet.
+    """
+    from xml.parsers import expat
+
+    try:
+        parser.Parse(data, final)
+
+    except _SvgRoot as root:
+
+        name, attributes = root.args
+
+        if name == "svg" or name.endswith(":svg"):
+            return attributes
+
+        return None
+
+    # also unknown encodings named by the xml declaration
+    except (expat.ExpatError, LookupError, ValueError):
+        return None
+
+    return None if final else False
+
+
+# absolute svg length units in pixels, at 96 pixels per inch
+_SVG_UNITS = (
+    ("px", 1),
+    ("pt", 4 / 3),
+    ("pc", 16),
+    ("mm", 96 / 25.4),
+    ("cm", 96 / 2.54),
+    ("in", 96),
+)
+
+
+def _get_svg_length(value):
+
+    # relative lengths such as percentages can't be resolved, so are None
+    if value is None:
+        return None
+
+    value = value.strip()
+    scale = 1
+
+    for unit, factor in _SVG_UNITS:
+        if value.endswith(unit):
+            value = value[:-2]
+            scale = factor
+            break
+
+    try:
+        length = float(value) * scale
+    except ValueError:
+        return None
+
+    # also rules out nan
+    if not 0 < length < float("inf"):
+        return None
+
+    return length
+
+
+def _get_svg_size(attributes):
+
+    width = _get_svg_length(attributes.get("width"))
+    height = _get_svg_length(attributes.get("height"))
+
+    # | min x | min y | width | height, separated by spaces or commas
+    view_box = attributes.get("viewBox", "").replace(",", " ").split()
+
+    if len(view_box) == 4 and (width is None or height is None):
+
+        box_width = _get_svg_length(view_box[2])
+        box_height = _get_svg_length(view_box[3])
+
+        if box_width is not None and box_height is not None:
+
+            # a missing dimension follows the aspect ratio of the view box
+            if width is None and height is None:
+                width, height = box_width, box_height
+
+            elif width is None:
+                width = height * box_width / box_height
+
+            else:
+                height = width * box_height / box_width
+
+    if width is None or height is None:
+        return (0, 0)
+
+    return int(width + 0.5), int(height + 0.5)
+
+
+# how many bytes the structure checks scan at once
+_SCAN_SIZE = 1 << 16
+
+# how many bytes the jpeg sizer reads at once, which holds the segments
+# following a large one, such as the tables after an EXIF block
+_SEGMENT_WINDOW = 512
+
+
+def _find_eoi(read, i: int, limit: int):
+
+    budget = get_active()
+
+    # scans the entropy coded data for the EOI marker, skipping the stuffed
+    # 0x00 bytes, restart markers and the segments between progressive scans
+    while i < limit:
+
+        if budget is not None:
+            budget.step()
+
+        block = read(i, min(_SCAN_SIZE, limit - i))
+
+        if len(block) < 2:
+            return None
+
+        j = block.find(b"\xff", 0, len(block) - 1)
+
+        if j == -1:
+            # the last byte could be the start of a marker
+            i += len(block) - 1
+            continue
+
+        marker = block[j + 1]
+
+        if marker == 0xD9:
+            return i + j + 2
+
+        if marker == 0x00 or marker == 0xFF or 0xD0 <= marker <= 0xD7:
+            i += j + 1
+            continue
+
+        length = read(i + j + 2, 2)
+
+        if len(length) < 2:
+            return None
+
+        i += j + 2 + br.read_int(length, 2)
+
+    return None
+
+
+def _validate_tiff(read, start: int, limit: int):
+
+    header = read(start, 8)
+
+    if len(header) < 8:
+        return "truncated header", start
+
+    endian = "little" if header[0:2] == b"II" else "big"
+
+    # offsets are relative to the start of the file
+    end = start + 8
+    ifd = br.read_int(header, 4, 4, endian)
+
+    seen = set()
+
+    budget = get_active()
+
+    while ifd:
+
+        if budget is not None:
+            budget.step()
+
+        if ifd in seen:
+            return "image file directory loop", start + ifd
+
+        seen.add(ifd)
+
+        i = start + ifd
+
+        count = read(i, 2)
+
+        if len(count) < 2 or i + 2 > limit:
+            return "image file directory out of bounds", i
+
+        count = br.read_int(count, 2, 0, endian)
+
+        if budget is not None:
+            budget.allocate(count)
+
+        fields = read(i + 2, 12 * count + 4)
+
+        if len(fields) < 12 * count + 4 or i + 6 + 12 * count > limit:
+            return "truncated image file directory", i
+
+        end = max(end, i + 6 + 12 * count)
+
+        # StripOffsets, StripByteCounts, TileOffsets and TileByteCounts
+        data = {}
+
+        for k in range(0, 12 * count, 12):
+
+            tag = br.read_int(fields, 2, k, endian)
+            field_size = Tiff.FIELD_SIZES.get(br.read_int(fields, 2, k + 2, endian))
+
+            # readers skip fields of unknown types
+            if field_size is None:
+                continue
+
+            length = field_size * br.read_int(fields, 4, k + 4, endian)
+
+            if length <= 4:
+                values = fields[k + 8 : k + 8 + length]
+
+            else:
+                offset = start + br.read_int(fields, 4, k + 8, endian)
+
+                if offset + length > limit:
+                    return "field data out of bounds", i + 2 + k
+
+                end = max(end, offset + length)
+
+                values = read(offset, length) if tag in (273, 279, 324, 325) else b""
+
+            if tag in (273, 279, 324, 325):
+
+                if budget is not None:
+                    budget.allocate(len(values) // field_size)
+
+                data[tag] = [
+                    br.read_int(values, field_size, n, endian)
+                    for n in range(0, len(values), field_size)
+                ]
+
+        for offsets, counts in ((273, 279), (324, 325)):
+            for offset, count in zip(data.get(offsets, ()), data.get(counts, ())):
+
+                if start + offset + count > limit:
+                    return "truncated image data", start + offset
+
+                end = max(end, start + offset + count)
+
+        ifd = br.read_int(fields, 4, 12 * count, endian)
+
+    return None, end
 
 
 class Jpeg(FileType):
@@ -11,6 +416,12 @@ class Jpeg(FileType):
     EXTENSION = "jpg"
     EXTENSION_ALTERNATE = ["jpeg", "jfif", "jpe", "jif", "jfi"]
 
+    # every start of frame marker, DHT (0xC4), JPG (0xC8) and DAC (0xCC) excluded
+    SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+    PROGRESSIVE_MARKERS = (0xC2, 0xC6, 0xCA, 0xCE)
+
+    SIGNATURES = (Signature(b"\xff\xd8\xff"),)
+
     def __init__(self):
         super(Jpeg, self).__init__(
             mime=self.MIME,
@@ -18,20 +429,19 @@ class Jpeg(FileType):
             extension_alternate=self.EXTENSION_ALTERNATE,
         )
 
-    def match(self, buf: bytearray):
-        return len(buf) > 2 and buf[0] == 0xFF and buf[1] == 0xD8 and buf[2] == 0xFF
-
-    def get_size(self, buf: bytearray):
-
-        if not self.match(buf):
-            return (0, 0)
+    def _get_size(self, buf: bytearray):
 
         length = len(buf)
 
         i = 2
 
+        budget = get_active()
+
         while i + 8 < length and buf[i] == 0xFF:
 
+            if budget is not None:
+                budget.step()
+
             marker = buf[i + 1]
             chunk_length = int.from_bytes(
                 [buf[i + 2], buf[i + 3]], byteorder="big", signed=True
@@ -39,7 +449,7 @@ class Jpeg(FileType):
 
             i += 4
 
-            if marker == 0xC0 or marker == 0xC2:
+            if marker in self.SOF_MARKERS:
 
                 # make sure to read height before width
                 height = int.from_bytes([buf[i + 1], buf[i + 2]], byteorder="big")
@@ -60,626 +470,2203 @@ class Jpeg(FileType):
 
         return (0, 0)
 
+    def _read_size(self, head: bytearray):
 
-class Jpx(FileType):
-    """
-    Implements the JPEG2000 image type matcher.
-    """
+        i = 2
 
-    MIME = "image/jpx"
-    EXTENSION = "jpx"
+        # the last bytes read, the segments are walked within it before
+        # reading more
+        window_offset = 0
+        window = head
 
-    def __init__(self):
-        super(Jpx, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+        while True:
 
-    def match(self, buf: bytearray):
-        return (
-            len(buf) > 50
-            and buf[0] == 0x00
-            and buf[1] == 0x00
-            and buf[2] == 0x00
-            and buf[3] == 0x0C
-            and buf[16:24] == b"ftypjp2 "
-        )
+            # | marker  | length  | precision | height  | width
+            # | 2 bytes | 2 bytes | 1 byte    | 2 bytes | 2 bytes
+            if not window_offset <= i <= window_offset + len(window) - 9:
+                (window,) = yield [(i, _SEGMENT_WINDOW)]
+                window_offset = i
 
+            segment = window[i - window_offset : i - window_offset + 9]
 
-class Png(FileType):
-    """
-    Implements the PNG image type matcher.
-    """
+            if len(segment) < 4 or segment[0] != 0xFF:
+                return (0, 0)
 
-    MIME = "image/png"
-    EXTENSION = "png"
+            if segment[1] in self.SOF_MARKERS:
 
-    def __init__(self):
-        super(Png, self).__init__(mime=Png.MIME, extension=Png.EXTENSION)
+                if len(segment) < 9:
+                    return (0, 0)
 
-    def match(self, buf: bytearray):
-        return (
-            len(buf) > 7
-            and buf[0] == 0x89
-            and buf[1] == 0x50
-            and buf[2] == 0x4E
-            and buf[3] == 0x47
-            and buf[4] == 0x0D
-            and buf[5] == 0x0A
-            and buf[6] == 0x1A
-            and buf[7] == 0x0A
-        )
+                return (br.read_int(segment, 2, 7), br.read_int(segment, 2, 5))
 
-    def get_size(self, buf: bytearray):
+            i += 2 + br.read_int(segment, 2, 2)
 
-        if not self.match(buf) or len(buf) < 24:
-            return (0, 0)
+    def _validate_segments(self, read, start: int, limit: int):
+        """
+        Returns:
+            Like _validate, where the offset of a valid file is the start of
+            the entropy coded data of the first scan.
+        """
+        if read(start, 2) != b"\xff\xd8":
+            return "missing SOI marker", start
 
-        return (
-            int.from_bytes([buf[16], buf[17], buf[18], buf[19]], byteorder="big"),
-            int.from_bytes([buf[20], buf[21], buf[22], buf[23]], byteorder="big"),
-        )
+        i = start + 2
 
+        budget = get_active()
 
-class Apng(Png):
-    """
-    Implements the APNG image type matcher.
-    """
+        # the segments up to the first scan all have a length
+        while True:
 
-    MIME = "image/apng"
-    EXTENSION = "apng"
-    EXTENSION_ALTERNATE = ["png"]
+            if budget is not None:
+                budget.step()
 
-    def __init__(self):
-        super(Png, self).__init__(
-            mime=self.MIME,
-            extension=self.EXTENSION,
-            extension_alternate=self.EXTENSION_ALTERNATE,
-        )
+            segment = read(i, 4)
 
-    def match(self, buf: bytearray):
+            if len(segment) < 2 or i + 2 > limit:
+                return "truncated before SOS marker", i
 
-        # png magick bytes check
-        if not super().match(buf):
-            return False
+            if segment[0] != 0xFF:
+                return "expected a marker", i
 
-        # cursor in buf, skip already readed 8 bytes
-        i = 8
-        while len(buf) > i:
-            data_length = int.from_bytes(buf[i : i + 4], byteorder="big")
-            i += 4
+            marker = segment[1]
 
-            chunk_type = buf[i : i + 4].decode("ascii", errors="ignore")
-            i += 4
+            # fill bytes before a marker
+            if marker == 0xFF:
+                i += 1
+                continue
 
-            # acTL chunk in APNG should appears first than IDAT
-            # IEND is end of PNG
-            if chunk_type == "IDAT" or chunk_type == "IEND":
-                return False
-            elif chunk_type == "acTL":
-                return True
+            if marker == 0xD9:
+                return "EOI marker before SOS marker", i
 
-            # move to the next chunk by skipping data and crc (4 bytes)
-            i += data_length + 4
+            # markers without a length
+            if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                i += 2
+                continue
 
-        return False
+            if len(segment) < 4:
+                return "truncated segment", i
 
+            length = br.read_int(segment, 2, 2)
 
-class Gif(FileType):
-    """
-    Implements the GIF image type matcher.
-    """
+            if length < 2:
+                return "invalid segment length", i
 
-    MIME = "image/gif"
-    EXTENSION = "gif"
+            if i + 2 + length > limit:
+                return "truncated segment", i
 
-    def __init__(self):
-        super(Gif, self).__init__(
-            mime=Gif.MIME,
-            extension=Gif.EXTENSION,
-        )
+            i += 2 + length
 
-    def match(self, buf: bytearray):
-        return (
-            len(buf) > 5
-            and buf[0] == 0x47
-            and buf[1] == 0x49
-            and buf[2] == 0x46
-            and buf[3] == 0x38
-            and (buf[4] in (0x39, 0x37))
-            and buf[5] == 0x61
-        )
+            if marker == 0xDA:
+                return None, i
 
-    def get_size(self, buf: bytearray):
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
 
-        if not self.match(buf):
-            return (0, 0)
+        reason, i = self._validate_segments(read, start, limit)
 
-        return (
-            int.from_bytes([buf[6], buf[7]], byteorder="little"),
-            int.from_bytes([buf[8], buf[9]], byteorder="little"),
-        )
+        if reason is not None:
+            return reason, i
 
+        # almost every file ends right after the EOI marker,
+        # only scan for it when there is something else at the end
+        if read(limit - 2, 2) == b"\xff\xd9":
+            return None, limit
 
-class Webp(FileType):
-    """
-    Implements the WEBP image type matcher.
-    """
+        end = _find_eoi(read, i, limit)
 
-    MIME = "image/webp"
-    EXTENSION = "webp"
+        if end is None:
+            return "missing EOI marker", limit
 
-    TYPE_INVALID_UNKNOWN = -1
-    TYPE_LOSSY = 0
-    TYPE_LOESSLESS = 1
-    TYPE_EXTENDED = 2
+        return None, end
 
-    def __init__(self):
-        super(Webp, self).__init__(
-            mime=self.MIME,
-            extension=self.EXTENSION,
-        )
+    def _find_end(self, read, start: int, limit: int):
 
-    def match(self, buf: bytearray):
-        return (
-            len(buf) > 15
-            # RIFF
-            and buf[0] == 0x52
-            and buf[1] == 0x49
-            and buf[2] == 0x46
-            and buf[3] == 0x46
-            # WEBP
-            and buf[8] == 0x57
-            and buf[9] == 0x45
-            and buf[10] == 0x42
-            and buf[11] == 0x50
-            # VP8
-            and buf[12] == 0x56
-            and buf[13] == 0x50
-            and buf[14] == 0x38
-            # ' ' or 'L' or 'X'
-            and (buf[15] in (0x20, 0x4C, 0x58))
-        )
+        reason, i = self._validate_segments(read, start, limit)
 
-    def get_type(self, buf: bytearray):
+        if reason is not None:
+            return reason, i
 
-        if not self.match(buf):
-            return self.TYPE_INVALID_UNKNOWN
+        end = _find_eoi(read, i, limit)
 
-        if buf[15] == 0x20:
-            return self.TYPE_LOSSY
+        if end is None:
+            return "missing EOI marker", limit
 
-        if buf[15] == 0x4C:
+        return None, end
+
+    def _probe(self, buf: bytearray):
+
+        result = ProbeResult(has_alpha=False)
+
+        adobe_transform = None
+
+        length = len(buf)
+
+        i = 2
+
+        budget = get_active()
+
+        while i + 4 <= length and buf[i] == 0xFF:
+
+            if budget is not None:
+                budget.step()
+
+            marker = buf[i + 1]
+            chunk_length = br.read_int(buf, 2, i + 2)
+
+            i += 4
+
+            # APP2 carries the (possibly split) ICC profile
+            if marker == 0xE2 and buf[i : i + 12] == b"ICC_PROFILE\x00":
+                result.has_icc = True
+
+            # APP14 tells apart RGB / YCbCr and CMYK / YCCK
+            elif marker == 0xEE and buf[i : i + 5] == b"Adobe" and i + 11 < length:
+                adobe_transform = buf[i + 11]
+
+            elif marker in self.SOF_MARKERS:
+
+                if i + 6 > length:
+                    break
+
+                result.bit_depth = buf[i]
+                result.height = br.read_int(buf, 2, i + 1)
+                result.width = br.read_int(buf, 2, i + 3)
+                result.channels = buf[i + 5]
+                result.interlaced = marker in self.PROGRESSIVE_MARKERS
+                result.color_type = self._get_color_type(
+                    result.channels, adobe_transform
+                )
+
+                # the ICC profile has to come before the frame header
+                if result.has_icc is None:
+                    result.has_icc = False
+
+                return result
+
+            i += chunk_length - 2
+
+        return result
+
+    def _get_color_type(self, channels: int, adobe_transform: int):
+
+        if channels == 1:
+            return "gray"
+
+        if channels == 3:
+            return "rgb" if adobe_transform == 0 else "ycbcr"
+
+        if channels == 4:
+            return "ycck" if adobe_transform == 2 else "cmyk"
+
+        return None
+
+
+class Jpx(FileType):
+    """
+    Implements the JPEG2000 image type matcher.
+    """
+
+    MIME = "image/jpx"
+    EXTENSION = "jpx"
+
+    # the jp2 signature box, then the file type box
+    SIGNATURES = (
+        Signature(
+            b"\x00\x00\x00\x0c" + b"\x00" * 12 + b"ftypjp2 ",
+            mask=b"\xff" * 4 + b"\x00" * 12 + b"\xff" * 8,
+            min_length=51,
+        ),
+    )
+
+    def __init__(self):
+        super(Jpx, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+
+    def _get_size(self, buf: bytearray):
+
+        # the image header box inside the jp2 header box
+        # | size (22) | type (ihdr) | height | width
+        # | 4 byte    | 4 byte      | 4 byte | 4 byte
+        offset = buf.find(b"ihdr", 32)
+
+        if offset == -1 or offset + 12 > len(buf):
+            return (0, 0)
+
+        return br.read_int(buf, 4, offset + 8), br.read_int(buf, 4, offset + 4)
+
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
+
+        # jpeg 2000 files are a sequence of boxes like ISO-BMFF
+        return _validate_boxes(read, start, limit)
+
+    def _find_end(self, read, start: int, limit: int):
+        return _validate_boxes(read, start, limit, embedded=True)
+
+
+class Png(FileType):
+    """
+    Implements the PNG image type matcher.
+    """
+
+    MIME = "image/png"
+    EXTENSION = "png"
+
+    # IHDR color type -> (color type, channels)
+    COLOR_TYPES = {
+        0: ("gray", 1),
+        2: ("rgb", 3),
+        3: ("palette", 1),
+        4: ("gray-alpha", 2),
+        6: ("rgba", 4),
+    }
+
+    SIGNATURES = (Signature(PNG_MAGIC),)
+
+    def __init__(self):
+        super(Png, self).__init__(mime=Png.MIME, extension=Png.EXTENSION)
+
+    def _get_size(self, buf: bytearray):
+
+        if len(buf) < 24:
+            return (0, 0)
+
+        return (
+            int.from_bytes([buf[16], buf[17], buf[18], buf[19]], byteorder="big"),
+            int.from_bytes([buf[20], buf[21], buf[22], buf[23]], byteorder="big"),
+        )
+
+    def _probe(self, buf: bytearray):
+
+        # IHDR is always the first chunk and is 13 bytes long
+        if len(buf) < 29:
+            return ProbeResult()
+
+        color_type = buf[25]
+
+        result = ProbeResult(
+            width=br.read_int(buf, 4, 16),
+            height=br.read_int(buf, 4, 20),
+            bit_depth=buf[24],
+            interlaced=buf[28] == 1,
+        )
+        result.color_type, result.channels = self.COLOR_TYPES.get(
+            color_type, (None, None)
+        )
+
+        if color_type == 4 or color_type == 6:
+            result.has_alpha = True
+
+        length = len(buf)
+
+        budget = get_active()
+
+        # skip the signature and IHDR, iCCP and tRNS must appear before IDAT
+        i = 33
+        while i + 8 <= length:
+
+            if budget is not None:
+                budget.step()
+
+            data_length = br.read_int(buf, 4, i)
+            chunk_type = buf[i + 4 : i + 8]
+
+            if chunk_type == b"IDAT" or chunk_type == b"IEND":
+
+                if result.has_alpha is None:
+                    result.has_alpha = False
+
+                if result.has_icc is None:
+                    result.has_icc = False
+
+                break
+
+            if chunk_type == b"iCCP":
+                result.has_icc = True
+
+            elif chunk_type == b"tRNS":
+                result.has_alpha = True
+
+            # skip length, type, data and crc
+            i += data_length + 12
+
+        return result
+
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
+
+        if read(start, 8) != PNG_MAGIC:
+            return "missing signature", start
+
+        i = start + 8
+
+        budget = get_active()
+
+        # | length  | type    | data          | crc
+        # | 4 bytes | 4 bytes | length bytes  | 4 bytes
+        while True:
+
+            if budget is not None:
+                budget.step()
+
+            header = read(i, 8)
+
+            if len(header) < 8 or i + 8 > limit:
+                return "missing IEND chunk", i
+
+            length = br.read_int(header, 4)
+            chunk_type = header[4:8]
+
+            if not chunk_type.isalpha() or length > 0x7FFFFFFF:
+                return "invalid chunk", i
+
+            if i == start + 8 and chunk_type != b"IHDR":
+                return "IHDR is not the first chunk", i
+
+            end = i + 12 + length
+
+            if end > limit:
+                return "truncated chunk", i
+
+            if check_crc and not self._check_crc(read, i, length):
+                return "chunk CRC mismatch", i
+
+            if chunk_type == b"IEND":
+                return None, end
+
+            i = end
+
+    def _check_crc(self, read, i: int, length: int):
+
+        # the crc covers the chunk type and data
+        crc = 0
+        offset = i + 4
+
+        while offset < i + 8 + length:
+            data = read(offset, min(_SCAN_SIZE, i + 8 + length - offset))
+            crc = zlib.crc32(data, crc)
+            offset += len(data)
+
+        return br.read_int(read(i + 8 + length, 4), 4) == crc
+
+
+class Apng(Png):
+    """
+    Implements the APNG image type matcher.
+    """
+
+    MIME = "image/apng"
+    EXTENSION = "apng"
+    EXTENSION_ALTERNATE = ["png"]
+
+    SIGNATURES = (Signature(PNG_MAGIC, priority=1, check=_has_actl),)
+
+    def __init__(self):
+        super(Png, self).__init__(
+            mime=self.MIME,
+            extension=self.EXTENSION,
+            extension_alternate=self.EXTENSION_ALTERNATE,
+        )
+
+    def _get_frames(self, buf: bytearray):
+
+        i = 8
+
+        budget = get_active()
+
+        while i + 12 <= len(buf):
+
+            if budget is not None:
+                budget.step()
+
+            length = br.read_int(buf, 4, i)
+
+            if buf[i + 4 : i + 8] == b"acTL":
+                return br.read_int(buf, 4, i + 8)
+
+            if buf[i + 4 : i + 8] in (b"IDAT", b"IEND"):
+                break
+
+            i += 12 + length
+
+        return None
+
+    def _is_animated(self, buf: bytearray):
+
+        frames = self._get_frames(buf)
+
+        return frames is not None and frames > 1
+
+
+class Gif(FileType):
+    """
+    Implements the GIF image type matcher.
+    """
+
+    MIME = "image/gif"
+    EXTENSION = "gif"
+
+    SIGNATURES = (Signature(b"GIF87a"), Signature(b"GIF89a"))
+
+    def __init__(self):
+        super(Gif, self).__init__(
+            mime=Gif.MIME,
+            extension=Gif.EXTENSION,
+        )
+
+    def _get_size(self, buf: bytearray):
+
+        if len(buf) < 10:
+            return (0, 0)
+
+        return (
+            int.from_bytes([buf[6], buf[7]], byteorder="little"),
+            int.from_bytes([buf[8], buf[9]], byteorder="little"),
+        )
+
+    def _probe(self, buf: bytearray):
+
+        if len(buf) < 13:
+            return ProbeResult()
+
+        packed = buf[10]
+
+        result = ProbeResult(
+            width=br.read_int(buf, 2, 6, byteorder="little"),
+            height=br.read_int(buf, 2, 8, byteorder="little"),
+            bit_depth=(packed & 0x07) + 1,
+            channels=1,
+            color_type="palette",
+        )
+
+        length = len(buf)
+
+        i = 13
+
+        # skip the global color table
+        if packed & 0x80:
+            i += 3 << ((packed & 0x07) + 1)
+
+        budget = get_active()
+
+        # walk the extension blocks up to the first image descriptor
+        while i < length:
+
+            if budget is not None:
+                budget.step()
+
+            block = buf[i]
+
+            if block == 0x2C:
+
+                if i + 10 > length:
+                    break
+
+                result.interlaced = bool(buf[i + 9] & 0x40)
+
+                if result.has_alpha is None:
+                    result.has_alpha = False
+
+                if result.has_icc is None:
+                    result.has_icc = False
+
+                break
+
+            if block != 0x21 or i + 2 > length:
+                break
+
+            label = buf[i + 1]
+
+            i += 2
+
+            # graphic control extension, packed field holds the transparency flag
+            if label == 0xF9 and i + 2 <= length:
+                if buf[i + 1] & 0x01:
+                    result.has_alpha = True
+
+            # application extension carrying an ICC profile
+            elif label == 0xFF and buf[i + 1 : i + 12] == b"ICCRGBG1012":
+                result.has_icc = True
+
+            # skip the data sub-blocks up to the block terminator
+            while i < length and buf[i] != 0:
+                i += buf[i] + 1
+
+            i += 1
+
+        return result
+
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
+
+        header = read(start, 13)
+
+        if len(header) < 13:
+            return "truncated header", start
+
+        i = start + 13
+
+        # skip the global color table
+        if header[10] & 0x80:
+            i += 3 << ((header[10] & 0x07) + 1)
+
+        budget = get_active()
+
+        while True:
+
+            if budget is not None:
+                budget.step()
+
+            block = read(i, 10)
+
+            if not block or i >= limit:
+                return "missing trailer", i
+
+            # trailer
+            if block[0] == 0x3B:
+                return None, i + 1
+
+            # extension, its label then the data sub-blocks
+            if block[0] == 0x21:
+                i += 2
+
+            # image descriptor, local color table, LZW code size then sub-blocks
+            elif block[0] == 0x2C:
+
+                if len(block) < 10:
+                    return "truncated image descriptor", i
+
+                i += 10
+
+                if block[9] & 0x80:
+                    i += 3 << ((block[9] & 0x07) + 1)
+
+                i += 1
+
+            else:
+                return "invalid block", i
+
+            # sub-blocks, each starting with its size, up to an empty one
+            while True:
+
+                if budget is not None:
+                    budget.step()
+
+                data = read(i, min(_SCAN_SIZE, limit - i))
+
+                if not data:
+                    return "truncated data sub-block", i
+
+                j = 0
+
+                while j < len(data) and data[j]:
+                    j += 1 + data[j]
+
+                if j < len(data):
+                    i += j + 1
+                    break
+
+                i += j
+
+
+class Webp(FileType):
+    """
+    Implements the WEBP image type matcher.
+    """
+
+    MIME = "image/webp"
+    EXTENSION = "webp"
+
+    TYPE_INVALID_UNKNOWN = -1
+    TYPE_LOSSY = 0
+    TYPE_LOESSLESS = 1
+    TYPE_EXTENDED = 2
+
+    # RIFF, the file size, then WEBP and the VP8 chunk, lossy, lossless or extended
+    SIGNATURES = tuple(
+        Signature(
+            b"RIFF\x00\x00\x00\x00WEBPVP8" + kind,
+            mask=b"\xff" * 4 + b"\x00" * 4 + b"\xff" * 8,
+        )
+        for kind in (b" ", b"L", b"X")
+    )
+
+    def __init__(self):
+        super(Webp, self).__init__(
+            mime=self.MIME,
+            extension=self.EXTENSION,
+        )
+
+    def get_type(self, buf: bytearray):
+
+        if not self.match(buf):
+            return self.TYPE_INVALID_UNKNOWN
+
+        return self._get_type(buf)
+
+    def _get_type(self, buf: bytearray):
+
+        if buf[15] == 0x20:
+            return self.TYPE_LOSSY
+
+        if buf[15] == 0x4C:
             return self.TYPE_LOESSLESS
 
-        if buf[15] == 0x58:
-            return self.TYPE_EXTENDED
+        if buf[15] == 0x58:
+            return self.TYPE_EXTENDED
+
+    def _get_size(self, buf: bytearray):
+
+        # https://developers.google.com/speed/webp/docs/riff_container
+        # https://datatracker.ietf.org/doc/html/rfc6386
+        # https://wiki.tcl-lang.org/page/Reading+WEBP+image+dimensions
+
+        webp_type = self._get_type(buf)
+
+        if webp_type == self.TYPE_LOSSY:
+
+            # must read at least 30 bytes, and 3 byte sig
+            if len(buf) < 30 or buf[23] != 0x9D or buf[24] != 0x1 or buf[25] != 0x2A:
+                return (0, 0)
+
+            return (
+                int.from_bytes([buf[26], buf[27]], byteorder="little"),
+                int.from_bytes([buf[28], buf[29]], byteorder="little"),
+            )
+
+        # # lossless webp
+        if webp_type == self.TYPE_LOESSLESS:
+
+            # must read at least 25 bytes, and 1 byte sig
+            if len(buf) < 25 or buf[20] != 0x2F:
+                return (0, 0)
+
+            return (
+                1 + (((buf[22] & 63) << 8) | buf[21]),
+                1 + (((buf[24] & 15) << 10) | (buf[23] << 2) | ((buf[22] & 192) >> 6)),
+            )
+
+        # # extended webp
+        if webp_type == self.TYPE_EXTENDED:
+
+            # must read at least 30 bytes
+            if len(buf) < 30:
+                return (0, 0)
+
+            return (
+                1 + int.from_bytes([buf[24], buf[25], buf[26]], byteorder="little"),
+                1 + int.from_bytes([buf[27], buf[28], buf[29]], byteorder="little"),
+            )
+
+        return (0, 0)
+
+    def _is_animated(self, buf: bytearray):
+
+        # the animation bit of the VP8X flags, the other types are still images
+        if self._get_type(buf) == self.TYPE_EXTENDED and len(buf) >= 21:
+            return bool(buf[20] & 0x02)
+
+        return False
+
+    def _probe(self, buf: bytearray):
+
+        webp_type = self._get_type(buf)
+
+        result = ProbeResult(*self._get_size(buf), bit_depth=8, interlaced=False)
+
+        if webp_type == self.TYPE_LOSSY:
+            result.channels = 3
+            result.color_type = "ycbcr"
+            result.has_alpha = False
+            result.has_icc = False
+
+        # lossless webp, alpha_is_used is the 29th bit of the image header
+        elif webp_type == self.TYPE_LOESSLESS and len(buf) >= 25:
+            result.has_alpha = bool(buf[24] & 0x10)
+            result.has_icc = False
+
+        # extended webp, the VP8X flags byte follows the chunk size
+        elif webp_type == self.TYPE_EXTENDED and len(buf) >= 21:
+            result.has_alpha = bool(buf[20] & 0x10)
+            result.has_icc = bool(buf[20] & 0x20)
+
+        if result.has_alpha is not None and result.channels is None:
+            result.channels = 4 if result.has_alpha else 3
+            result.color_type = "rgba" if result.has_alpha else "rgb"
+
+        return result
+
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
+
+        header = read(start, 12)
+
+        if len(header) < 12:
+            return "truncated header", start
+
+        # the RIFF chunk holds the whole file, after its 8 byte header
+        size = br.read_int(header, 4, 4, "little")
+
+        if size < 4:
+            return "invalid RIFF chunk size", start
+
+        if start + 8 + size > limit:
+            return "truncated RIFF chunk", start
+
+        return None, start + 8 + size
+
+
+class Tiff(FileType):
+    """
+    Implements the TIFF image type matcher.
+    """
+
+    MIME = "image/tiff"
+    EXTENSION = "tif"
+
+    TYPE_TIFF_INVALID_UNKNOWN = -1
+    TYPE_TIFF_LITTLE_ENDIAN = 0
+    TYPE_TIFF_BIG_ENDIAN = 1
+
+    # PhotometricInterpretation -> color type
+    PHOTOMETRIC = {
+        0: "gray",
+        1: "gray",
+        2: "rgb",
+        3: "palette",
+        4: "mask",
+        5: "cmyk",
+        6: "ycbcr",
+        8: "lab",
+    }
+
+    # field type -> byte size of a single value
+    FIELD_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 6: 1, 7: 1, 8: 2, 9: 4}
+
+    # fields in a typical image file directory
+    EXPECTED_FIELDS = 24
+
+    SIGNATURES = (
+        Signature(b"II*\x00", min_length=10, check=_is_not_cr2),
+        Signature(b"MM\x00*", min_length=10, check=_is_not_cr2),
+    )
+
+    def __init__(self):
+        super(Tiff, self).__init__(
+            mime=self.MIME,
+            extension=self.EXTENSION,
+        )
+
+    def get_type(self, buf: bytearray):
+
+        if not self.match(buf):
+            return self.TYPE_TIFF_INVALID_UNKNOWN
+
+        return self._get_type(buf)
+
+    def _get_type(self, buf: bytearray):
+
+        if buf[0] == 0x4D and buf[1] == 0x4D and buf[2] == 0x0 and buf[3] == 0x2A:
+            return self.TYPE_TIFF_BIG_ENDIAN
+
+        if buf[0] == 0x49 and buf[1] == 0x49 and buf[2] == 0x2A and buf[3] == 0x0:
+            return self.TYPE_TIFF_LITTLE_ENDIAN
+
+    def _get_size(self, buf: bytearray):
+
+        # https://www.awaresystems.be/imaging/tiff/tifftags/baseline.html
+
+        tiff_type = self._get_type(buf)
+
+        endian = "little"
+
+        if tiff_type == self.TYPE_TIFF_BIG_ENDIAN:
+            endian = "big"
+
+        length = len(buf)
+
+        idf_start = int.from_bytes([buf[4], buf[5], buf[6], buf[7]], byteorder=endian)
+
+        i = idf_start
+
+        if i >= length:
+            return (0, 0)
+
+        number_of_idf = int.from_bytes([buf[i], buf[i + 1]], byteorder=endian)
+
+        i += 2
+
+        width = 0
+        height = 0
+
+        budget = get_active()
+
+        if budget is not None:
+            budget.allocate(number_of_idf)
+
+        for _ in range(number_of_idf):
+
+            if i + 12 > length:
+                return (width, height)
+
+            field = int.from_bytes([buf[i], buf[i + 1]], byteorder=endian)
+
+            i += 2
+
+            if field == 256:
+                width = int.from_bytes(
+                    [buf[i + 6], buf[i + 7], buf[i + 8], buf[i + 9]], byteorder=endian
+                )
+
+            elif field == 257:
+                height = int.from_bytes(
+                    [buf[i + 6], buf[i + 7], buf[i + 8], buf[i + 9]], byteorder=endian
+                )
+
+            i += 10
+
+            if width > 0 and height > 0:
+
+                return (width, height)
+
+        return (width, height)
+
+    def _get_field_value(self, buf: bytearray, i: int, endian: str):
+
+        # | tag     | type    | count   | value or offset
+        # | 2 bytes | 2 bytes | 4 bytes | 4 bytes
+        field_size = self.FIELD_SIZES.get(br.read_int(buf, 2, i + 2, endian), 4)
+        count = br.read_int(buf, 4, i + 4, endian)
+
+        offset = i + 8
+
+        # values which do not fit in 4 bytes are stored elsewhere
+        if field_size * count > 4:
+            offset = br.read_int(buf, 4, offset, endian)
+
+            if offset + field_size > len(buf):
+                return None
+
+        return br.read_int(buf, field_size, offset, endian)
+
+    def _read_size(self, head: bytearray):
+
+        endian = "little"
+
+        if self._get_type(head) == self.TYPE_TIFF_BIG_ENDIAN:
+            endian = "big"
+
+        idf_start = br.read_int(head, 4, 4, endian)
+
+        # guess at the field count so most directories come in a single read
+        (idf,) = yield [(idf_start, 2 + 12 * self.EXPECTED_FIELDS)]
+
+        if len(idf) < 2:
+            return (0, 0)
+
+        number_of_idf = br.read_int(idf, 2, 0, endian)
+
+        budget = get_active()
+
+        if budget is not None:
+            budget.allocate(number_of_idf)
+
+        if number_of_idf > self.EXPECTED_FIELDS:
+            end = idf_start + 2 + 12 * number_of_idf
+            (rest,) = yield [(idf_start + len(idf), end - idf_start - len(idf))]
+            idf += rest
+
+        width = 0
+        height = 0
+
+        for i in range(2, min(len(idf) - 11, 2 + 12 * number_of_idf), 12):
+
+            field = br.read_int(idf, 2, i, endian)
+
+            if field == 256:
+                width = self._get_field_value(idf, i, endian) or 0
+
+            elif field == 257:
+                height = self._get_field_value(idf, i, endian) or 0
+
+            if width > 0 and height > 0:
+                break
+
+        return (width, height)
+
+    def _probe(self, buf: bytearray):
+
+        tiff_type = self._get_type(buf)
+
+        endian = "big" if tiff_type == self.TYPE_TIFF_BIG_ENDIAN else "little"
+
+        result = ProbeResult(interlaced=False)
+
+        length = len(buf)
+
+        i = br.read_int(buf, 4, 4, endian)
+
+        if i + 2 > length:
+            return result
+
+        number_of_idf = br.read_int(buf, 2, i, endian)
+
+        i += 2
+
+        budget = get_active()
+
+        if budget is not None:
+            budget.allocate(number_of_idf)
+
+        photometric = None
+
+        for _ in range(number_of_idf):
+
+            if i + 12 > length:
+                break
+
+            field = br.read_int(buf, 2, i, endian)
+
+            if field == 256:
+                result.width = self._get_field_value(buf, i, endian) or 0
+
+            elif field == 257:
+                result.height = self._get_field_value(buf, i, endian) or 0
+
+            elif field == 258:
+                result.bit_depth = self._get_field_value(buf, i, endian)
+
+            elif field == 262:
+                photometric = self._get_field_value(buf, i, endian)
+
+            elif field == 277:
+                result.channels = self._get_field_value(buf, i, endian)
+
+            # ExtraSamples
+            elif field == 338:
+                result.has_alpha = True
+
+            # InterColorProfile
+            elif field == 34675:
+                result.has_icc = True
+
+            i += 12
+
+        else:
+
+            # the whole directory was read, so missing fields take the defaults
+            if result.bit_depth is None:
+                result.bit_depth = 1
+
+            if result.channels is None:
+                result.channels = 1
+
+            if result.has_alpha is None:
+                result.has_alpha = False
+
+            if result.has_icc is None:
+                result.has_icc = False
+
+        result.color_type = self.PHOTOMETRIC.get(photometric)
+
+        if result.color_type == "rgb" and result.has_alpha:
+            result.color_type = "rgba"
+
+        return result
+
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
+        return _validate_tiff(read, start, limit)
+
+
+class Bmp(FileType):
+    """
+    Implements the BMP image type matcher.
+    """
+
+    MIME = "image/bmp"
+    EXTENSION = "bmp"
+
+    SIGNATURES = (Signature(b"BM"),)
+
+    # BITMAPCOREHEADER, OS22XBITMAPHEADER (short and full), BITMAPINFOHEADER
+    # and its V2 to V5 successors
+    HEADER_SIZES = frozenset((12, 16, 40, 52, 56, 64, 108, 124))
+
+    def __init__(self):
+        super(Bmp, self).__init__(
+            mime=self.MIME,
+            extension=self.EXTENSION,
+        )
+
+    def _get_size(self, buf: bytearray):
+
+        if len(buf) < 26:
+            return (0, 0)
+
+        return (
+            int.from_bytes([buf[18], buf[19], buf[20], buf[21]], byteorder="little"),
+            int.from_bytes([buf[22], buf[23], buf[24], buf[25]], byteorder="little"),
+        )
+
+    def _probe(self, buf: bytearray):
+
+        if len(buf) < 26:
+            return ProbeResult()
+
+        length = len(buf)
+
+        header_size = br.read_int(buf, 4, 14, byteorder="little")
+
+        # BITMAPCOREHEADER uses 16 bit dimensions
+        if header_size == 12:
+            width = br.read_int(buf, 2, 18, byteorder="little")
+            height = br.read_int(buf, 2, 20, byteorder="little")
+            bit_count = br.read_int(buf, 2, 24, byteorder="little")
+
+        else:
+            if length < 30:
+                return ProbeResult()
+
+            width = br.read_int(buf, 4, 18, byteorder="little", signed=True)
+            height = br.read_int(buf, 4, 22, byteorder="little", signed=True)
+            bit_count = br.read_int(buf, 2, 28, byteorder="little")
+
+        # a negative height marks a top-down bitmap
+        result = ProbeResult(
+            width=abs(width),
+            height=abs(height),
+            interlaced=False,
+            has_alpha=False,
+            has_icc=False,
+        )
+
+        if bit_count <= 8:
+            result.bit_depth = bit_count
+            result.channels = 1
+            result.color_type = "palette"
+
+        else:
+            result.bit_depth = 5 if bit_count == 16 else 8
+            result.channels = 3
+            result.color_type = "rgb"
+
+        # BITMAPV3INFOHEADER and later carry an alpha mask
+        if header_size >= 56 and length >= 70:
+            if br.read_int(buf, 4, 66, byteorder="little"):
+                result.has_alpha = True
+                result.channels = 4
+                result.color_type = "rgba"
+
+        # BITMAPV4HEADER and later carry the color space type
+        if header_size >= 108 and length >= 74:
+            # PROFILE_EMBEDDED or PROFILE_LINKED
+            result.has_icc = buf[70:74] in (b"DEBM", b"KNIL")
+
+        return result
+
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
+
+        # | BM     | file size | reserved | data offset | header size
+        # | 2 byte | 4 byte    | 4 byte   | 4 byte      | 4 byte
+        header = read(start, 18)
+
+        if len(header) < 18:
+            return "truncated header", start
+
+        file_size = br.read_int(header, 4, 2, "little")
+        data_offset = br.read_int(header, 4, 10, "little")
+        header_size = br.read_int(header, 4, 14, "little")
+
+        if header_size not in self.HEADER_SIZES:
+            return "invalid header size", start + 14
+
+        if not 14 + header_size <= data_offset <= file_size:
+            return "invalid file size", start + 2
+
+        if start + file_size > limit:
+            return "truncated pixel data", start + data_offset
+
+        return None, start + file_size
+
+
+class Jxr(FileType):
+    """
+    Implements the JXR image type matcher.
+    """
+
+    MIME = "image/vnd.ms-photo"
+    EXTENSION = "jxr"
+
+    SIGNATURES = (Signature(b"II\xbc"),)
+
+    def __init__(self):
+        super(Jxr, self).__init__(
+            mime=self.MIME,
+            extension=self.EXTENSION,
+        )
+
+
+class Psd(FileType):
+    """
+    Implements the PSD image type matcher.
+    """
+
+    MIME = "image/vnd.adobe.photoshop"
+    EXTENSION = "psd"
+
+    # color mode -> (color type, channels without alpha)
+    COLOR_MODES = {
+        0: ("bitmap", 1),
+        1: ("gray", 1),
+        2: ("palette", 1),
+        3: ("rgb", 3),
+        4: ("cmyk", 4),
+        7: ("multichannel", None),
+        8: ("duotone", 1),
+        9: ("lab", 3),
+    }
+
+    SIGNATURES = (Signature(b"8BPS"),)
+
+    def __init__(self):
+        super(Psd, self).__init__(
+            mime=self.MIME,
+            extension=self.EXTENSION,
+        )
+
+    def _get_size(self, buf: bytearray):
+
+        if len(buf) < 22:
+            return (0, 0)
+
+        return br.read_int(buf, 4, 18), br.read_int(buf, 4, 14)
+
+    def _probe(self, buf: bytearray):
+
+        if len(buf) < 26:
+            return ProbeResult()
+
+        channels = br.read_int(buf, 2, 12)
+
+        color_type, color_channels = self.COLOR_MODES.get(
+            br.read_int(buf, 2, 24), (None, None)
+        )
+
+        result = ProbeResult(
+            width=br.read_int(buf, 4, 18),
+            height=br.read_int(buf, 4, 14),
+            bit_depth=br.read_int(buf, 2, 22),
+            channels=channels,
+            color_type=color_type,
+            interlaced=False,
+            has_alpha=color_channels is not None and channels > color_channels,
+        )
+
+        length = len(buf)
+
+        # skip the color mode data section
+        i = 26
+
+        if i + 4 > length:
+            return result
+
+        i += 4 + br.read_int(buf, 4, i)
+
+        if i + 4 > length:
+            return result
+
+        # walk the image resources section, resource 1039 is the ICC profile
+        end = i + 4 + br.read_int(buf, 4, i)
+
+        i += 4
+
+        budget = get_active()
+
+        while i < end:
+
+            if budget is not None:
+                budget.step()
+
+            if i + 7 > length or buf[i : i + 4] != b"8BIM":
+                break
+
+            resource_id = br.read_int(buf, 2, i + 4)
+
+            if resource_id == 1039:
+                result.has_icc = True
+                break
+
+            # the name is a pascal string padded to an even size
+            i += 6 + ((buf[i + 6] + 2) & ~1)
+
+            if i + 4 > length:
+                break
+
+            # the data is padded to an even size as well
+            i += 4 + ((br.read_int(buf, 4, i) + 1) & ~1)
+
+        else:
+            result.has_icc = False
+
+        return result
+
+
+class IcoEntry(object):
+    """
+    One image of an ICO or CUR file.
+
+    Attributes:
+        width, height: the size, from the header of the image data when
+        it could be read, otherwise from the directory entry.
+        bit_count: bits per pixel, or None if unknown.
+        format: "png" or "bmp" for the format of the image data, or None
+        if its header could not be read.
+        offset, length: where the image data is in the file.
+        hotspot: (x, y) of the cursor hotspot, or None for icons.
+    """
+
+    __slots__ = (
+        "width",
+        "height",
+        "bit_count",
+        "format",
+        "offset",
+        "length",
+        "hotspot",
+    )
+
+    def __init__(
+        self,
+        width,
+        height,
+        bit_count=None,
+        format=None,
+        offset=0,
+        length=0,
+        hotspot=None,
+    ):
+        self.width = width
+        self.height = height
+        self.bit_count = bit_count
+        self.format = format
+        self.offset = offset
+        self.length = length
+        self.hotspot = hotspot
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    def __repr__(self):
+        fields = ", ".join(
+            "{}: {}".format(name, getattr(self, name)) for name in self.__slots__
+        )
+        return "<{} {}>".format(self.__class__.__name__, fields)
+
+
+# how much of the image data holds the png IHDR or the bitmap info header
+_ICO_IMAGE_HEADER = 26
+
+
+def _read_ico_image(entry: IcoEntry, data: bytes):
+
+    # the size of a png image is in its IHDR chunk
+    if data.startswith(PNG_MAGIC):
+
+        if len(data) < _ICO_IMAGE_HEADER:
+            return False
+
+        color_type, channels = Png.COLOR_TYPES.get(data[25], (None, 1))
+
+        entry.format = "png"
+        entry.width = br.read_int(data, 4, 16)
+        entry.height = br.read_int(data, 4, 20)
+        entry.bit_count = data[24] * channels
+
+        return True
+
+    # | header size | width  | height | planes | bit count
+    # | 4 byte      | 4 byte | 4 byte | 2 byte | 2 byte
+    if len(data) < 16:
+        return False
+
+    if br.read_int(data, 4, 0, byteorder="little") in (40, 108, 124):
+
+        # the height covers both the color and the mask bitmap
+        height = br.read_int(data, 4, 8, byteorder="little", signed=True)
+
+        entry.format = "bmp"
+        entry.width = abs(br.read_int(data, 4, 4, byteorder="little", signed=True))
+        entry.height = abs(height) // 2
+        entry.bit_count = br.read_int(data, 2, 14, byteorder="little")
+
+    return True
+
+
+def _read_ico_entries(read_ranges, strict: bool):
+    """
+    Reads the directory of an ICO or CUR file, then the header of the
+    data of every entry, in three reads.
+
+    Args:
+        read_ranges: function taking a list of (offset, length) ranges,
+        returning the bytes of each, which are shorter past the end.
+        strict: whether to raise on a truncated file, rather than
+        returning the entries and sizes that could be read.
+
+    Raises:
+        ValueError: if strict and the directory or an image header is truncated.
+    """
+    (header,) = read_ranges([(0, 6)])
+
+    count = br.read_int(header, 2, 4, byteorder="little")
+
+    budget = get_active()
+
+    if budget is not None:
+        budget.allocate(count)
+
+    (directory,) = read_ranges([(6, 16 * count)])
+
+    if len(directory) < 16 * count:
+
+        if strict:
+            raise ValueError("truncated icon directory")
+
+        count = len(directory) // 16
+
+    # cursors store the hotspot in place of the planes and bit count
+    cursor = header[2] == 2
+
+    entries = []
+
+    # | width | height | colors | reserved | planes  | bit count | length | offset
+    # | 1     | 1      | 1      | 1        | 2 bytes | 2 bytes   | 4 byte | 4 byte
+    for i in range(0, 16 * count, 16):
+
+        first = br.read_int(directory, 2, i + 4, byteorder="little")
+        second = br.read_int(directory, 2, i + 6, byteorder="little")
+
+        entries.append(
+            IcoEntry(
+                width=directory[i] or 256,
+                height=directory[i + 1] or 256,
+                bit_count=None if cursor else second or None,
+                offset=br.read_int(directory, 4, i + 12, byteorder="little"),
+                length=br.read_int(directory, 4, i + 8, byteorder="little"),
+                hotspot=(first, second) if cursor else None,
+            )
+        )
+
+    if not entries:
+        return entries
+
+    images = read_ranges([(entry.offset, _ICO_IMAGE_HEADER) for entry in entries])
+
+    for entry, data in zip(entries, images):
+        if not _read_ico_image(entry, data) and strict:
+            raise ValueError("truncated icon image")
+
+    return entries
+
+
+def _buffer_read_ranges(buf):
+
+    def read_ranges(ranges):
+        return [buf[offset : offset + length] for offset, length in ranges]
+
+    return read_ranges
+
+
+class Ico(FileType):
+    """
+    Implements the ICO image type matcher.
+    """
+
+    MIME = "image/x-icon"
+    EXTENSION = "ico"
+
+    SIGNATURES = (Signature(b"\x00\x00\x01\x00"),)
+
+    def __init__(self):
+        super(Ico, self).__init__(
+            mime=self.MIME,
+            extension=self.EXTENSION,
+        )
+
+    def get_entries(self, obj, strict=False):
+        """
+        Reads every entry of the file, following the data offset of each
+        to the header of its png or bitmap, without reading the images.
+
+        Args:
+            obj: bytes, bytearray, path to file, binary file object or
+            rangereader.RangeReader, which is read in three round trips.
+            strict: whether to raise on a truncated file. By default the
+            entries the directory holds are returned, e.g. from the prefix
+            get_bytes reads, with the sizes of the directory for the images
+            whose header is missing.
+
+        Returns:
+            list of IcoEntry, empty if the input is not of this type.
+
+        Raises:
+            TypeError: if obj is not a supported type.
+            ValueError: if strict and the directory or an image header is
+            truncated.
+        """
+        if hasattr(obj, "read_ranges"):
+            return self._get_entries(obj.read_ranges, strict)
+
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            return self._get_entries(_buffer_read_ranges(obj), strict)
+
+        if not (isinstance(obj, (str, os.PathLike)) or hasattr(obj, "read")):
+            raise TypeError("Unsupported type as file input: %s" % type(obj))
+
+        # rangereader imports the matchers, so it can't be imported first
+        from ..rangereader import FileRangeReader
+
+        with FileRangeReader(obj) as reader:
+            return self._get_entries(reader.read_ranges, strict)
+
+    def _get_entries(self, read_ranges, strict: bool):
+
+        (header,) = read_ranges([(0, 4)])
+
+        if not self.match(bytearray(header)):
+            return []
+
+        return _read_ico_entries(read_ranges, strict)
+
+    def get_sizes(self, obj, strict=False):
+        """
+        Reads the (width, height) of every entry, see get_entries.
+
+        Returns:
+            list of (width, height), empty if the input is not of this type.
+        """
+        return [entry.size for entry in self.get_entries(obj, strict)]
+
+    def best_entry(self, obj, target_size):
+        """
+        Picks the entry to show at a size: the smallest one covering the
+        target size, or the largest one when none does. Ties go to the one
+        with the most bits per pixel. Its offset and length locate the image
+        data, which can then be read on its own.
+
+        Args:
+            obj: any input of get_entries.
+            target_size: the wanted size in pixels, or a (width, height).
+
+        Returns:
+            IcoEntry, or None if the input has no entries.
+        """
+        if isinstance(target_size, int):
+            target_size = (target_size, target_size)
+
+        entries = self.get_entries(obj)
+
+        if not entries:
+            return None
+
+        width, height = target_size
+
+        def rank(entry):
+            return entry.width * entry.height, entry.bit_count or 0
+
+        covering = [
+            entry
+            for entry in entries
+            if entry.width >= width and entry.height >= height
+        ]
+
+        if covering:
+            area = min(rank(entry)[0] for entry in covering)
+            return max((e for e in covering if rank(e)[0] == area), key=rank)
+
+        return max(entries, key=rank)
+
+    def _get_images(self, buf: bytearray):
+        return [
+            entry.size
+            for entry in _read_ico_entries(_buffer_read_ranges(buf), strict=False)
+        ]
+
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
+
+        def read_ranges(ranges):
+            return [read(start + offset, length) for offset, length in ranges]
+
+        try:
+            entries = _read_ico_entries(read_ranges, strict=True)
+        except BudgetExceeded:
+            raise
+        except ValueError as error:
+            return str(error), start
+
+        if not entries:
+            return "empty icon directory", start
+
+        # the file ends with the image data furthest in
+        end = start + max(entry.offset + entry.length for entry in entries)
+
+        for entry in entries:
+            if entry.offset < 6 + 16 * len(entries):
+                return "image data overlaps the directory", start
+
+        if end > limit:
+            return "truncated image data", limit
+
+        return None, end
+
+    def _get_frames(self, buf: bytearray):
+
+        # the directory entries might not all fit in the buffer
+        return br.read_int(buf, 2, 4, byteorder="little")
+
+    def _get_size(self, buf: bytearray):
+
+        entries = _read_ico_entries(_buffer_read_ranges(buf), strict=False)
+
+        if len(entries) == 0:
+            return (0, 0)
+
+        return entries[0].size
+
+    def _read_size(self, head: bytearray):
+
+        entries = _read_ico_entries(_buffer_read_ranges(head), strict=False)
+
+        if len(entries) == 0:
+            return (0, 0)
+
+        entry = entries[0]
+
+        # the image data of the first entry usually follows the directory
+        if entry.format is None and entry.offset + _ICO_IMAGE_HEADER > len(head):
+            (data,) = yield [(entry.offset, _ICO_IMAGE_HEADER)]
+            _read_ico_image(entry, data)
+
+        return entry.size
+
+    def _probe(self, buf: bytearray):
+
+        entries = _read_ico_entries(_buffer_read_ranges(buf), strict=False)
+
+        if len(entries) == 0:
+            return ProbeResult()
+
+        result = ProbeResult(*entries[0].size, interlaced=False, has_icc=False)
+
+        bit_count = entries[0].bit_count or 0
+
+        if 0 < bit_count <= 8:
+            result.bit_depth = bit_count
+            result.channels = 1
+            result.color_type = "palette"
+            result.has_alpha = False
+
+        elif bit_count > 8:
+            result.bit_depth = 8
+            result.channels = 4 if bit_count == 32 else 3
+            result.color_type = "rgba" if bit_count == 32 else "rgb"
+            result.has_alpha = bit_count == 32
+
+        return result
+
+
+class Cur(Ico):
+    """
+    Implements the CUR cursor type matcher, laid out as an ICO file.
+    """
+
+    MIME = "image/x-win-bitmap"
+    EXTENSION = "cur"
+
+    # uncompressed tga files start the same, but without any entries
+    SIGNATURES = (Signature(b"\x00\x00\x02\x00", min_length=6, check=_has_entries),)
+
+
+class Heic(IsoBmff):
+    """
+    Implements the HEIC image type matcher, for still images and sequences.
+    """
+
+    MIME = "image/heic"
+    EXTENSION = "heic"
+
+    # the types of the isobmff.BRAND_MIMES it matches
+    FAMILY = ("image/heic", "image/heic-sequence")
+
+    SIGNATURES = (Signature(b"ftyp", offset=4, check=_is_family(FAMILY)),)
+
+    def __init__(self):
+        super(Heic, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+
+
+class Heif(IsoBmff):
+    """
+    Implements the HEIF image type matcher, for files only declaring the
+    generic brands, e.g. with jpeg or uncompressed items.
+    """
+
+    MIME = "image/heif"
+    EXTENSION = "heif"
+
+    FAMILY = ("image/heif", "image/heif-sequence")
+
+    SIGNATURES = (Signature(b"ftyp", offset=4, check=_is_family(FAMILY)),)
+
+    def __init__(self):
+        super(Heif, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+
+
+class Avif(IsoBmff):
+    """
+    Implements the AVIF image type matcher, for still images and sequences.
+    """
+
+    MIME = "image/avif"
+    EXTENSION = "avif"
+
+    FAMILY = ("image/avif",)
+
+    SIGNATURES = (Signature(b"ftyp", offset=4, check=_is_family(FAMILY)),)
+
+    def __init__(self):
+        super(Avif, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+
+
+class Cr3(IsoBmff):
+    """
+    Implements the Canon CR3 raw image type matcher.
+    """
+
+    MIME = "image/x-canon-cr3"
+    EXTENSION = "cr3"
+
+    FAMILY = ("image/x-canon-cr3",)
+
+    SIGNATURES = (Signature(b"ftyp", offset=4, check=_is_family(FAMILY)),)
+
+    def __init__(self):
+        super(Cr3, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+
+    # the size is in canon's own boxes rather than in an ispe box
+    _get_size = FileType._get_size
+    _get_images = FileType._get_images
+    _read_size = FileType._read_size
+    _probe = FileType._probe
+
+
+class Dcm(FileType):
+
+    MIME = "application/dicom"
+    EXTENSION = "dcm"
+    OFFSET = 128
+
+    SIGNATURES = (Signature(b"DICM", offset=OFFSET, min_length=OFFSET + 5),)
 
-    def get_size(self, buf: bytearray):
+    def __init__(self):
+        super(Dcm, self).__init__(mime=self.MIME, extension=self.EXTENSION)
 
-        # https://developers.google.com/speed/webp/docs/riff_container
-        # https://datatracker.ietf.org/doc/html/rfc6386
-        # https://wiki.tcl-lang.org/page/Reading+WEBP+image+dimensions
 
-        webp_type = self.get_type(buf)
+class Dwg(FileType):
+    """Implements the Dwg image type matcher."""
 
-        if webp_type == self.TYPE_INVALID_UNKNOWN:
-            return (0, 0)
+    MIME = "image/vnd.dwg"
+    EXTENSION = "dwg"
 
-        if webp_type == self.TYPE_LOSSY:
+    SIGNATURES = (Signature(b"AC10"),)
 
-            # must read at least 30 bytes, and 3 byte sig
-            if len(buf) < 30 or buf[23] != 0x9D or buf[24] != 0x1 or buf[25] != 0x2A:
-                return (0, 0)
+    def __init__(self):
+        super(Dwg, self).__init__(mime=self.MIME, extension=self.EXTENSION)
 
-            return (
-                int.from_bytes([buf[26], buf[27]], byteorder="little"),
-                int.from_bytes([buf[28], buf[29]], byteorder="little"),
-            )
 
-        # # lossless webp
-        if webp_type == self.TYPE_LOESSLESS:
+class Xcf(FileType):
+    """Implements the Xcf image type matcher."""
 
-            # must read at least 25 bytes, and 1 byte sig
-            if len(buf) < 25 or buf[20] != 0x2F:
-                return (0, 0)
+    MIME = "image/x-xcf"
+    EXTENSION = "xcf"
 
-            return (
-                1 + (((buf[22] & 63) << 8) | buf[21]),
-                1 + (((buf[24] & 15) << 10) | (buf[23] << 2) | ((buf[22] & 192) >> 6)),
-            )
+    SIGNATURES = (Signature(b"gimp xcf v"),)
 
-        # # extended webp
-        if webp_type == self.TYPE_EXTENDED:
+    def __init__(self):
+        super(Xcf, self).__init__(mime=self.MIME, extension=self.EXTENSION)
 
-            # must read at least 30 bytes
-            if len(buf) < 30:
-                return (0, 0)
+    def _get_size(self, buf: bytearray):
 
-            return (
-                1 + int.from_bytes([buf[24], buf[25], buf[26]], byteorder="little"),
-                1 + int.from_bytes([buf[27], buf[28], buf[29]], byteorder="little"),
-            )
+        # | gimp xcf v001\0 | width  | height
+        # | 14 bytes        | 4 byte | 4 byte
+        if len(buf) < 22:
+            return (0, 0)
 
-        return (0, 0)
+        return br.read_int(buf, 4, 14), br.read_int(buf, 4, 18)
 
 
-class Tiff(FileType):
+class Cr2(FileType):
     """
-    Implements the TIFF image type matcher.
+    Implements the CR2 image type matcher.
     """
 
-    MIME = "image/tiff"
-    EXTENSION = "tif"
+    MIME = "image/x-canon-cr2"
+    EXTENSION = "cr2"
 
-    TYPE_TIFF_INVALID_UNKNOWN = -1
-    TYPE_TIFF_LITTLE_ENDIAN = 0
-    TYPE_TIFF_BIG_ENDIAN = 1
+    # a tiff header, followed by CR and the major version
+    SIGNATURES = tuple(
+        Signature(
+            magic + b"\x00\x00\x00\x00CR",
+            mask=b"\xff\xff\xff\xff\x00\x00\x00\x00\xff\xff",
+        )
+        for magic in (b"II*\x00", b"MM\x00*")
+    )
 
     def __init__(self):
-        super(Tiff, self).__init__(
+        super(Cr2, self).__init__(
             mime=self.MIME,
             extension=self.EXTENSION,
         )
 
-    def match(self, buf: bytearray):
-        return (
-            len(buf) > 9
-            and (
-                (buf[0] == 0x49 and buf[1] == 0x49 and buf[2] == 0x2A and buf[3] == 0x0)
-                or (
-                    buf[0] == 0x4D
-                    and buf[1] == 0x4D
-                    and buf[2] == 0x0
-                    and buf[3] == 0x2A
-                )
-            )
-            and not (buf[8] == 0x43 and buf[9] == 0x52)
-        )
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
 
-    def get_type(self, buf: bytearray):
+        # cr2 files are laid out as tiff files
+        return _validate_tiff(read, start, limit)
 
-        if not self.match(buf):
-            return self.TYPE_TIFF_INVALID_UNKNOWN
 
-        if buf[0] == 0x4D and buf[1] == 0x4D and buf[2] == 0x0 and buf[3] == 0x2A:
-            return self.TYPE_TIFF_BIG_ENDIAN
+class Jxl(IsoBmff):
+    """
+    Implements the JPEG XL image type matcher, for both the naked
+    codestream and the ISO-BMFF based container.
+    """
 
-        if buf[0] == 0x49 and buf[1] == 0x49 and buf[2] == 0x2A and buf[3] == 0x0:
-            return self.TYPE_TIFF_LITTLE_ENDIAN
+    MIME = "image/jxl"
+    EXTENSION = "jxl"
 
-    def get_size(self, buf: bytearray):
+    SIGNATURES = (
+        Signature(b"\xff\x0a"),
+        Signature(b"\x00\x00\x00\x0cJXL \r\n\x87\n"),
+    )
 
-        # https://www.awaresystems.be/imaging/tiff/tifftags/baseline.html
+    def __init__(self):
+        super(Jxl, self).__init__(mime=self.MIME, extension=self.EXTENSION)
 
-        tiff_type = self.get_type(buf)
+    # the size is in the codestream rather than in an ispe box
+    _get_images = FileType._get_images
+    _read_size = FileType._read_size
+    _probe = FileType._probe
 
-        if tiff_type == self.TYPE_TIFF_INVALID_UNKNOWN:
-            return (0, 0)
+    def _get_size(self, buf: bytearray):
 
-        endian = "little"
+        if buf[0] == 0xFF:
+            return _get_jxl_size(buf, 0)
 
-        if tiff_type == self.TYPE_TIFF_BIG_ENDIAN:
-            endian = "big"
+        offset = 0
 
-        length = len(buf)
+        budget = get_active()
 
-        idf_start = int.from_bytes([buf[4], buf[5], buf[6], buf[7]], byteorder=endian)
+        while offset + 8 <= len(buf):
 
-        i = idf_start
+            if budget is not None:
+                budget.step()
 
-        if i >= length:
-            return (0, 0)
+            box_size = br.read_int(buf, 4, offset)
+            box_type = buf[offset + 4 : offset + 8]
 
-        number_of_idf = int.from_bytes([buf[i], buf[i + 1]], byteorder=endian)
+            header = 8
 
-        i += 2
+            # 64 bit largesize follows the type
+            if box_size == 1:
+                box_size = br.read_int(buf, 8, offset + 8)
+                header = 16
 
-        width = 0
-        height = 0
+            # the whole codestream, or its parts each starting with an index
+            if box_type == b"jxlc":
+                return _get_jxl_size(buf, offset + header)
 
-        for _ in range(number_of_idf):
+            if box_type == b"jxlp":
+                return _get_jxl_size(buf, offset + header + 4)
 
-            if i + 12 > length:
-                return (width, height)
+            if box_size < header:
+                break
 
-            field = int.from_bytes([buf[i], buf[i + 1]], byteorder=endian)
+            offset += box_size
 
-            i += 2
+        return (0, 0)
 
-            if field == 256:
-                width = int.from_bytes(
-                    [buf[i + 6], buf[i + 7], buf[i + 8], buf[i + 9]], byteorder=endian
-                )
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
 
-            elif field == 257:
-                height = int.from_bytes(
-                    [buf[i + 6], buf[i + 7], buf[i + 8], buf[i + 9]], byteorder=endian
-                )
+        # the naked codestream has no boxes to check
+        if read(start, 1) == b"\xff":
+            return None
 
-            i += 10
+        return _validate_boxes(read, start, limit)
 
-            if width > 0 and height > 0:
+    def _find_end(self, read, start: int, limit: int):
 
-                return (width, height)
+        # nothing tells where a naked codestream ends, and its two byte
+        # signature is found all over arbitrary data
+        if read(start, 1) == b"\xff":
+            return "naked codestream", start
 
-        return (width, height)
+        return _validate_boxes(read, start, limit, embedded=True)
 
 
-class Bmp(FileType):
+class Qoi(FileType):
     """
-    Implements the BMP image type matcher.
+    Implements the QOI image type matcher.
     """
 
-    MIME = "image/bmp"
-    EXTENSION = "bmp"
+    MIME = "image/qoi"
+    EXTENSION = "qoi"
 
-    def __init__(self):
-        super(Bmp, self).__init__(
-            mime=self.MIME,
-            extension=self.EXTENSION,
-        )
+    SIGNATURES = (Signature(b"qoif"),)
 
-    def match(self, buf: bytearray):
-        return len(buf) > 1 and buf[0] == 0x42 and buf[1] == 0x4D
+    def __init__(self):
+        super(Qoi, self).__init__(mime=self.MIME, extension=self.EXTENSION)
 
-    def get_size(self, buf: bytearray):
+    def _get_size(self, buf: bytearray):
 
-        if not self.match(buf) or len(buf) < 26:
+        # | qoif   | width  | height | channels | colorspace
+        # | 4 byte | 4 byte | 4 byte | 1 byte   | 1 byte
+        if len(buf) < 12:
             return (0, 0)
 
-        return (
-            int.from_bytes([buf[18], buf[19], buf[20], buf[21]], byteorder="little"),
-            int.from_bytes([buf[22], buf[23], buf[24], buf[25]], byteorder="little"),
+        return br.read_int(buf, 4, 4), br.read_int(buf, 4, 8)
+
+    def _probe(self, buf: bytearray):
+
+        if len(buf) < 14:
+            return ProbeResult(*self._get_size(buf))
+
+        channels = buf[12]
+
+        return ProbeResult(
+            *self._get_size(buf),
+            bit_depth=8,
+            channels=channels,
+            color_type="rgba" if channels == 4 else "rgb",
+            interlaced=False,
+            has_alpha=channels == 4,
+            has_icc=False,
         )
 
 
-class Jxr(FileType):
+class Pcx(FileType):
     """
-    Implements the JXR image type matcher.
+    Implements the PCX image type matcher.
     """
 
-    MIME = "image/vnd.ms-photo"
-    EXTENSION = "jxr"
+    MIME = "image/x-pcx"
+    EXTENSION = "pcx"
+
+    SIGNATURES = (
+        Signature(
+            b"\x0a\x00\x00", mask=b"\xff\x00\xfe", min_length=12, check=_is_pcx
+        ),
+    )
 
     def __init__(self):
-        super(Jxr, self).__init__(
-            mime=self.MIME,
-            extension=self.EXTENSION,
-        )
+        super(Pcx, self).__init__(mime=self.MIME, extension=self.EXTENSION)
 
-    def match(self, buf: bytearray):
-        return len(buf) > 2 and buf[0] == 0x49 and buf[1] == 0x49 and buf[2] == 0xBC
+    def _get_size(self, buf: bytearray):
 
+        # | x min  | y min  | x max  | y max
+        # | 2 byte | 2 byte | 2 byte | 2 byte, inclusive
+        x_min = br.read_int(buf, 2, 4, byteorder="little")
+        y_min = br.read_int(buf, 2, 6, byteorder="little")
+        x_max = br.read_int(buf, 2, 8, byteorder="little")
+        y_max = br.read_int(buf, 2, 10, byteorder="little")
 
-class Psd(FileType):
+        if x_max < x_min or y_max < y_min:
+            return (0, 0)
+
+        return x_max - x_min + 1, y_max - y_min + 1
+
+
+class Exr(FileType):
     """
-    Implements the PSD image type matcher.
+    Implements the OpenEXR image type matcher.
     """
 
-    MIME = "image/vnd.adobe.photoshop"
-    EXTENSION = "psd"
+    MIME = "image/x-exr"
+    EXTENSION = "exr"
+
+    SIGNATURES = (Signature(b"\x76\x2f\x31\x01"),)
 
     def __init__(self):
-        super(Psd, self).__init__(
-            mime=self.MIME,
-            extension=self.EXTENSION,
-        )
+        super(Exr, self).__init__(mime=self.MIME, extension=self.EXTENSION)
 
-    def match(self, buf: bytearray):
-        return (
-            len(buf) > 3
-            and buf[0] == 0x38
-            and buf[1] == 0x42
-            and buf[2] == 0x50
-            and buf[3] == 0x53
-        )
+    def _get_size(self, buf: bytearray):
 
-    def get_size(self, buf: bytearray):
+        length = len(buf)
 
-        if not self.match(buf) or len(buf) < 22:
-            return (0, 0)
+        # the header attributes follow the magic and version, until an
+        # empty name, each laid out as:
+        # | name | type | size   | value
+        # | \0   | \0   | 4 byte | size bytes
+        i = 8
 
-        height = (
-            int.from_bytes([buf[14], buf[15], buf[16], buf[17]], byteorder="big"),
-        )
-        width = (int.from_bytes([buf[18], buf[19], buf[20], buf[21]], byteorder="big"),)
+        budget = get_active()
 
-        return (width, height)
+        while i < length and buf[i] != 0:
 
+            if budget is not None:
+                budget.step()
 
-class Ico(FileType):
+            name_end = buf.find(b"\x00", i)
+            type_end = buf.find(b"\x00", name_end + 1)
+
+            if name_end == -1 or type_end == -1 or type_end + 5 > length:
+                break
+
+            size = br.read_int(buf, 4, type_end + 1, byteorder="little")
+            value = type_end + 5
+
+            # the box2i of the pixels which are stored, in inclusive bounds
+            if buf[i:name_end] == b"dataWindow" and size == 16:
+
+                if value + 16 > length:
+                    break
+
+                x_min, y_min, x_max, y_max = (
+                    br.read_int(buf, 4, value + offset, byteorder="little", signed=True)
+                    for offset in (0, 4, 8, 12)
+                )
+
+                # a window with its bounds swapped holds no pixels
+                if x_max < x_min or y_max < y_min:
+                    return (0, 0)
+
+                return x_max - x_min + 1, y_max - y_min + 1
+
+            i = value + size
+
+        return (0, 0)
+
+
+class Hdr(FileType):
     """
-    Implements the ICO image type matcher.
+    Implements the Radiance HDR image type matcher.
     """
 
-    MIME = "image/x-icon"
-    EXTENSION = "ico"
+    MIME = "image/vnd.radiance"
+    EXTENSION = "hdr"
+    EXTENSION_ALTERNATE = ["pic"]
+
+    SIGNATURES = (Signature(b"#?RADIANCE\n"), Signature(b"#?RGBE\n"))
 
     def __init__(self):
-        super(Ico, self).__init__(
+        super(Hdr, self).__init__(
             mime=self.MIME,
             extension=self.EXTENSION,
+            extension_alternate=self.EXTENSION_ALTERNATE,
         )
 
-    def match(self, buf: bytearray):
-        return (
-            len(buf) > 3
-            and buf[0] == 0x00
-            and buf[1] == 0x00
-            and buf[2] == 0x01
-            and buf[3] == 0x00
-        )
+    def _get_size(self, buf: bytearray):
 
-    def get_sizes(self, buf: bytearray):
+        # the header lines end with an empty line, followed by the
+        # resolution line, e.g. "-Y 480 +X 640" for the usual orientation
+        start = buf.find(b"\n\n")
 
-        if not self.match(buf) or len(buf) < 6:
+        if start == -1:
             return (0, 0)
 
-        number_of_images = int.from_bytes([buf[4], buf[5]], byteorder="little")
+        end = buf.find(b"\n", start + 2)
 
-        sizes = []
-
-        length = len(buf)
-
-        i = 6
-
-        for _ in range(number_of_images):
-
-            if i + 2 > length:
-                return sizes
+        if end == -1:
+            return (0, 0)
 
-            width = 256
-            height = 256
+        fields = buf[start + 2 : end].split()
 
-            if buf[i] != 0:
-                width = buf[i]
+        if len(fields) != 4:
+            return (0, 0)
 
-            if buf[i + 1] != 0:
-                height = buf[i + 1]
+        axes = {bytes(fields[0][1:]): fields[1], bytes(fields[2][1:]): fields[3]}
 
-            # if buf[i + 3] != 0:  # reserved should be 0
-            #     raise "invalid image??"
+        if b"X" not in axes or b"Y" not in axes:
+            return (0, 0)
 
-            # color_planes = int.from_bytes(buf[4:2], byteorder="little")
+        try:
+            return int(axes[b"X"]), int(axes[b"Y"])
+        except ValueError:
+            return (0, 0)
 
-            # if color_planes != 0 and color_planes != 1: # should be 0 or 1
-            #     raise "invalid image"
 
-            sizes.append((width, height))
+class Dds(FileType):
+    """
+    Implements the DirectDraw Surface image type matcher.
+    """
 
-            i += 16
-            # image_data_size   = int.from_bytes(io_byte_reader.read(4), byteorder="little")
-            # image_data_offset = int.from_bytes(io_byte_reader.read(4), byteorder="little")
+    MIME = "image/vnd-ms.dds"
+    EXTENSION = "dds"
 
-        return sizes
+    # the magic, then the header size which is always 124
+    SIGNATURES = (Signature(b"DDS \x7c\x00\x00\x00"),)
 
-    def get_size(self, buf: bytearray):
+    def __init__(self):
+        super(Dds, self).__init__(mime=self.MIME, extension=self.EXTENSION)
 
-        sizes = self.get_sizes(buf)
+    def _get_size(self, buf: bytearray):
 
-        if len(sizes) == 0:
+        # | magic  | size   | flags  | height | width
+        # | 4 byte | 4 byte | 4 byte | 4 byte | 4 byte
+        if len(buf) < 20:
             return (0, 0)
 
-        return sizes[0]
+        return (
+            br.read_int(buf, 4, 16, byteorder="little"),
+            br.read_int(buf, 4, 12, byteorder="little"),
+        )
 
 
-class Heic(IsoBmff):
+class Ktx2(FileType):
     """
-    Implements the HEIC image type matcher.
+    Implements the KTX 2.0 texture type matcher.
     """
 
-    MIME = "image/heic"
-    EXTENSION = "heic"
+    MIME = "image/ktx2"
+    EXTENSION = "ktx2"
+
+    SIGNATURES = (Signature(b"\xabKTX 20\xbb\r\n\x1a\n"),)
 
     def __init__(self):
-        super(Heic, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+        super(Ktx2, self).__init__(mime=self.MIME, extension=self.EXTENSION)
 
-    def match(self, buf: bytearray):
-        if not self._is_isobmff(buf):
-            return False
+    def _get_size(self, buf: bytearray):
 
-        major_brand, minor_version, compatible_brands = self._get_ftyp(buf)
-        if major_brand == "heic":
-            return True
-        if major_brand in ["mif1", "msf1"] and "heic" in compatible_brands:
-            return True
-        return False
+        # | identifier | format | type size | width  | height
+        # | 12 bytes   | 4 byte | 4 byte    | 4 byte | 4 byte
+        if len(buf) < 28:
+            return (0, 0)
 
+        # 1D textures have a height of 0, and are a single row
+        return (
+            br.read_int(buf, 4, 20, byteorder="little"),
+            max(br.read_int(buf, 4, 24, byteorder="little"), 1),
+        )
 
-class Avif(IsoBmff):
+    def _get_frames(self, buf: bytearray):
+
+        # | depth  | layers | faces
+        # | 4 byte | 4 byte | 4 byte
+        if len(buf) < 40:
+            return None
+
+        depth, layers, faces = (
+            max(br.read_int(buf, 4, offset, byteorder="little"), 1)
+            for offset in (28, 32, 36)
+        )
+
+        return depth * layers * faces
+
+
+class Svg(FileType):
     """
-    Implements the AVIF image type matcher.
+    Implements the SVG image type matcher.
+
+    Svg has no magic bytes, so the start of the document is parsed with
+    expat, skipping the xml declaration, comments and doctype up to the
+    root element, whose width, height and viewBox give the size.
+
+    Args:
+        max_prefix: the most bytes of the document parsed to find the root.
     """
 
-    MIME = "image/avif"
-    EXTENSION = "avif"
+    MIME = "image/svg+xml"
+    EXTENSION = "svg"
+
+    # how many bytes are requested at once while reading the size in ranges
+    CHUNK_SIZE = 4096
+
+    def __init__(self, max_prefix=1 << 16):
+        super(Svg, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+
+        self.max_prefix = max_prefix
+
+        # the markup, or the whitespace or byte order mark before it
+        self.SIGNATURES = tuple(
+            Signature(magic, check=self._is_svg)
+            for magic in (
+                b"<",
+                b"\xef\xbb\xbf",
+                b"\xff\xfe",
+                b"\xfe\xff",
+                b" ",
+                b"\t",
+                b"\r",
+                b"\n",
+            )
+        )
 
-    def __init__(self):
-        super(Avif, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+    def _is_svg(self, buf: bytearray):
+
+        prefix = buf[: self.max_prefix]
 
-    def match(self, buf: bytearray):
-        if not self._is_isobmff(buf):
+        # utf-16 documents can't be searched for the ascii tag name
+        if prefix[0] not in (0xFF, 0xFE) and prefix.find(b"svg") == -1:
             return False
 
-        major_brand, minor_version, compatible_brands = self._get_ftyp(buf)
-        if major_brand == "avif":
-            return True
-        if major_brand in ["mif1", "msf1"] and "avif" in compatible_brands:
-            return True
-        return False
+        root = _feed_svg_parser(_create_svg_parser(), prefix)
 
+        # a prefix which ends before the root element is no svg, even with
+        # an <svg tag in a comment or the doctype
+        return root is not None and root is not False
 
-class Dcm(FileType):
+    def _get_size(self, buf: bytearray):
 
-    MIME = "application/dicom"
-    EXTENSION = "dcm"
-    OFFSET = 128
+        root = _feed_svg_parser(_create_svg_parser(), buf[: self.max_prefix])
 
-    def __init__(self):
-        super(Dcm, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+        if not root:
+            return (0, 0)
 
-    def match(self, buf: bytearray):
-        return (
-            len(buf) > Dcm.OFFSET + 4
-            and buf[Dcm.OFFSET + 0] == 0x44
-            and buf[Dcm.OFFSET + 1] == 0x49
-            and buf[Dcm.OFFSET + 2] == 0x43
-            and buf[Dcm.OFFSET + 3] == 0x4D
-        )
+        return _get_svg_size(root)
 
+    def _read_size(self, head: bytearray):
 
-class Dwg(FileType):
-    """Implements the Dwg image type matcher."""
+        parser = _create_svg_parser()
 
-    MIME = "image/vnd.dwg"
-    EXTENSION = "dwg"
+        root = _feed_svg_parser(parser, head[: self.max_prefix])
 
-    def __init__(self):
-        super(Dwg, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+        offset = len(head)
 
-    def match(self, buf: bytearray):
-        return buf[:4] == bytearray([0x41, 0x43, 0x31, 0x30])
+        # the document is parsed as it arrives, so an svg with huge inline
+        # data is never held in memory past its root element
+        while root is False and offset < self.max_prefix:
 
+            (data,) = yield [(offset, min(self.CHUNK_SIZE, self.max_prefix - offset))]
 
-class Xcf(FileType):
-    """Implements the Xcf image type matcher."""
+            root = _feed_svg_parser(parser, data, final=not data)
 
-    MIME = "image/x-xcf"
-    EXTENSION = "xcf"
+            offset += len(data)
 
-    def __init__(self):
-        super(Xcf, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+        if not root:
+            return (0, 0)
 
-    def match(self, buf: bytearray):
-        return buf[:10] == bytearray(
-            [0x67, 0x69, 0x6D, 0x70, 0x20, 0x78, 0x63, 0x66, 0x20, 0x76]
-        )
+        return _get_svg_size(root)
 
 
-class Cr2(FileType):
+class Tga(FileType):
     """
-    Implements the CR2 image type matcher.
+    Implements the TGA image type matcher.
     """
 
-    MIME = "image/x-canon-cr2"
-    EXTENSION = "cr2"
+    MIME = "image/x-tga"
+    EXTENSION = "tga"
+
+    # without magic bytes only a few bits are fixed, so tga is tried last
+    SIGNATURES = (
+        Signature(
+            b"\x00\x00\x00",
+            mask=b"\x00\xfe\xf4",
+            priority=-1,
+            min_length=18,
+            check=_is_tga,
+        ),
+    )
 
     def __init__(self):
-        super(Cr2, self).__init__(
-            mime=self.MIME,
-            extension=self.EXTENSION,
-        )
+        super(Tga, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+
+    def _get_size(self, buf: bytearray):
 
-    def match(self, buf: bytearray):
+        # | id length | color map | image type | x, y origin | width  | height
+        # | 1         | 1         | 1          | 9 bytes     | 2 byte | 2 byte
         return (
-            len(buf) > 9
-            and (
-                (buf[0] == 0x49 and buf[1] == 0x49 and buf[2] == 0x2A and buf[3] == 0x0)
-                or (
-                    buf[0] == 0x4D
-                    and buf[1] == 0x4D
-                    and buf[2] == 0x0
-                    and buf[3] == 0x2A
-                )
-            )
-            and buf[8] == 0x43
-            and buf[9] == 0x52
+            br.read_int(buf, 2, 12, byteorder="little"),
+            br.read_int(buf, 2, 14, byteorder="little"),
         )
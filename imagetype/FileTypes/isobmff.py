@@ -1,7 +1,228 @@
-from .base import FileType
+from ..budget import get_active
+from .base import FileType, ProbeResult
 from . import bytereader as br
 
 
+def _is_box_type(box_type):
+
+    # letters, digits and spaces, e.g. ftyp, mdat, jP, JXL and xml
+    return all(
+        c == 0x20 or 0x30 <= c <= 0x39 or 0x41 <= c <= 0x5A or 0x61 <= c <= 0x7A
+        for c in box_type
+    )
+
+
+def _validate_boxes(read, start: int, limit: int, embedded=False):
+    """
+    Checks that the top level boxes add up to the length of the file.
+
+    Args:
+        embedded: whether the file is followed by other data, in which case
+        it ends before the first header which is not a box, which repeats
+        the type of the first box (the start of another file), or whose
+        box would run past limit.
+    """
+    i = start
+
+    first_type = None
+
+    budget = get_active()
+
+    while i < limit:
+
+        if budget is not None:
+            budget.step()
+
+        header = read(i, 16)
+
+        if len(header) < 8:
+
+            if embedded and i > start:
+                break
+
+            return "truncated box header", i
+
+        size = br.read_int(header, 4)
+        header_size = 8
+
+        box_type = header[4:8]
+
+        if embedded and i > start:
+            if box_type == first_type or not _is_box_type(box_type):
+                break
+
+        first_type = first_type or box_type
+
+        # a size of 1 means a 64 bit size follows the type
+        if size == 1:
+
+            if len(header) < 16:
+                return "truncated box header", i
+
+            size = br.read_int(header, 8, 8)
+            header_size = 16
+
+        # a size of 0 means the box extends to the end of the file
+        elif size == 0:
+            return None, limit
+
+        if not all(0x20 <= c <= 0x7E for c in box_type):
+            return "invalid box type", i
+
+        if size < header_size or i + size > limit:
+
+            # which is taken for the data following the file
+            if embedded and i > start:
+                break
+
+            if size < header_size:
+                return "invalid box size", i
+
+            return "truncated box", i
+
+        i += size
+
+    return None, i
+
+
+# the MIME type of the ISO-BMFF based files declaring each brand in ftyp
+BRAND_MIMES = {
+    b"crx ": "image/x-canon-cr3",
+    b"jxl ": "image/jxl",
+    b"avif": "image/avif",
+    b"avis": "image/avif",
+    b"heic": "image/heic",
+    b"heix": "image/heic",
+    b"heim": "image/heic",
+    b"heis": "image/heic",
+    b"hevc": "image/heic-sequence",
+    b"hevx": "image/heic-sequence",
+    b"hevm": "image/heic-sequence",
+    b"hevs": "image/heic-sequence",
+    b"mif1": "image/heif",
+    b"msf1": "image/heif-sequence",
+    b"qt  ": "video/quicktime",
+    b"M4V ": "video/x-m4v",
+    b"M4VH": "video/x-m4v",
+    b"M4VP": "video/x-m4v",
+    b"3g2a": "video/3gpp2",
+    b"3g2b": "video/3gpp2",
+    b"3g2c": "video/3gpp2",
+    b"3gp4": "video/3gpp",
+    b"3gp5": "video/3gpp",
+    b"3gp6": "video/3gpp",
+    b"3gp7": "video/3gpp",
+    b"3gs7": "video/3gpp",
+    b"3ge6": "video/3gpp",
+    b"3ge7": "video/3gpp",
+    b"3gg6": "video/3gpp",
+    b"isom": "video/mp4",
+    b"iso2": "video/mp4",
+    b"iso3": "video/mp4",
+    b"iso4": "video/mp4",
+    b"iso5": "video/mp4",
+    b"iso6": "video/mp4",
+    b"mp41": "video/mp4",
+    b"mp42": "video/mp4",
+    b"avc1": "video/mp4",
+    b"dash": "video/mp4",
+    b"mmp4": "video/mp4",
+}
+
+# files usually declare brands of several of these types, e.g. a heic file
+# is also a generic heif (mif1) and a phone video both an mp4 (isom) and a
+# 3gp, so the major brand counts as one more compatible brand and the first
+# of these types with a declared brand wins: the codec specific image types,
+# sequences before the still images they contain, the generic heif brands
+# which any of them may list, and the video containers from the most to the
+# least specific, as every one of them is also an mp4
+MIME_PRIORITY = (
+    "image/x-canon-cr3",
+    "image/jxl",
+    "image/avif",
+    "image/heic-sequence",
+    "image/heic",
+    "image/heif-sequence",
+    "image/heif",
+    "video/quicktime",
+    "video/x-m4v",
+    "video/3gpp2",
+    "video/3gpp",
+    "video/mp4",
+)
+
+_MIME_RANKS = {mime: rank for rank, mime in enumerate(MIME_PRIORITY)}
+
+# lru_cache of the MIME type of the ftyp boxes seen, which files of one
+# source all share, made on first use as functools is slow to import
+_ftyp_mime_cache = None
+
+
+def _get_ftyp_box(buf):
+    """
+    Returns:
+        The bytes of the ftyp box starting the buffer, or following the
+        signature box of a JPEG XL container. None if there is no whole one.
+    """
+    offset = 12 if buf[4:8] == b"JXL " else 0
+
+    if buf[offset + 4 : offset + 8] != b"ftyp":
+        return None
+
+    size = br.read_int(buf, 4, offset)
+
+    # | size | type (ftyp) | major brand | minor version | compatible brands
+    # | 4    | 4 byte      | 4 byte      | 4 byte        | 4 byte each
+    if size < 16 or offset + size > len(buf):
+        return None
+
+    return bytes(buf[offset : offset + size])
+
+
+def _get_ftyp_mime(ftyp: bytes):
+
+    global _ftyp_mime_cache
+
+    if _ftyp_mime_cache is None:
+        import functools
+
+        # the boxes are only ever a handful of brand lists, but are read
+        # from untrusted files, so only the most recent ones are kept
+        _ftyp_mime_cache = functools.lru_cache(maxsize=256)(
+            lambda ftyp: _get_brand_mime(_decode_brands(ftyp))
+        )
+
+    return _ftyp_mime_cache(ftyp)
+
+
+def _decode_brands(ftyp: bytes):
+
+    # the major brand, then the compatible brands after the minor version
+    return frozenset(ftyp[i : i + 4] for i in (8, *range(16, len(ftyp) - 3, 4)))
+
+
+def _get_brand_mime(brands):
+
+    ranks = [
+        _MIME_RANKS[BRAND_MIMES[brand]] for brand in brands if brand in BRAND_MIMES
+    ]
+
+    return MIME_PRIORITY[min(ranks)] if ranks else None
+
+
+def _is_family(mimes):
+    """
+    Returns:
+        Signature check for the ISO-BMFF based types whose brands map to
+        one of the MIME types.
+    """
+
+    def check(buf: bytearray):
+        return IsoBmff._get_mime(buf) in mimes
+
+    return check
+
+
 class IsoBmff(FileType):
     """
     Implements the ISO-BMFF base type.
@@ -10,13 +231,15 @@ class IsoBmff(FileType):
     def __init__(self, mime, extension):
         super(IsoBmff, self).__init__(mime=mime, extension=extension)
 
-    def _is_isobmff(self, buf):
+    @staticmethod
+    def _is_isobmff(buf):
         if len(buf) < 16 or buf[4:8] != b"ftyp":
             return False
 
         return not len(buf) < int.from_bytes(buf[0:4], byteorder="big")
 
-    def _get_ftyp(self, buf: bytearray):
+    @staticmethod
+    def _get_ftyp(buf: bytearray):
 
         ftyp_len = int.from_bytes(buf[0:4], byteorder="big")
 
@@ -24,16 +247,44 @@ class IsoBmff(FileType):
 
         minor_version = int.from_bytes(buf[12:16], byteorder="big")
 
-        compatible_brands = (
+        compatible_brands = tuple(
             buf[i : i + 4].decode(errors="ignore") for i in range(16, ftyp_len, 4)
         )
 
         return major_brand, minor_version, compatible_brands
 
-    def get_size(self, buf: bytearray):
+    @staticmethod
+    def _get_brands(buf: bytearray):
+        """
+        Returns:
+            frozenset of the major and compatible brands of the ftyp box,
+            or None if the buffer does not start with a whole one.
+        """
+        ftyp = _get_ftyp_box(buf)
 
-        if not self._is_isobmff(buf):
-            return (0, 0)
+        if ftyp is None:
+            return None
+
+        return _decode_brands(ftyp)
+
+    @staticmethod
+    def _get_mime(buf: bytearray):
+        """
+        Decodes the ftyp box into its brands, once for every distinct box,
+        and maps them through BRAND_MIMES by MIME_PRIORITY.
+
+        Returns:
+            The MIME type of the brands, or None if none is known or the
+            buffer does not start with a whole ftyp box.
+        """
+        ftyp = _get_ftyp_box(buf)
+
+        if ftyp is None:
+            return None
+
+        return _get_ftyp_mime(ftyp)
+
+    def _get_size(self, buf: bytearray):
 
         # yeah this is questionable, but at least it works
         # cause i'm really struggling to find anything for isobmff online
@@ -48,3 +299,108 @@ class IsoBmff(FileType):
             return (0, 0)
 
         return br.read_int(buf, 4, offset + 8), br.read_int(buf, 4, offset + 12)
+
+    def _get_images(self, buf: bytearray):
+
+        # every item has its own ispe box, which covers the tiles of grids
+        sizes = []
+
+        offset = buf.find(b"ispe", 16)
+
+        budget = get_active()
+
+        while offset != -1 and offset + 16 < len(buf):
+
+            if budget is not None:
+                budget.allocate(1)
+
+            sizes.append(
+                (br.read_int(buf, 4, offset + 8), br.read_int(buf, 4, offset + 12))
+            )
+
+            offset = buf.find(b"ispe", offset + 16)
+
+        return sizes
+
+    def _validate(self, read, start: int, limit: int, check_crc: bool):
+        return _validate_boxes(read, start, limit)
+
+    def _find_end(self, read, start: int, limit: int):
+        return _validate_boxes(read, start, limit, embedded=True)
+
+    def _read_size(self, head: bytearray):
+
+        # boxes holding the ispe box, and the size of their own header
+        containers = {b"meta": 12, b"iprp": 8, b"ipco": 8}
+
+        # skip the ftyp box, which the head always holds
+        offset = br.read_int(head, 4, 0)
+
+        # the last bytes read, nested container headers are usually inside it
+        window_offset = 0
+        window = head
+
+        while True:
+
+            # | size | type | version + flags | width  | height
+            # | 4    | 4    | 4 byte          | 4 byte | 4 byte
+            if not window_offset <= offset <= window_offset + len(window) - 20:
+                (window,) = yield [(offset, 64)]
+                window_offset = offset
+
+            header = window[offset - window_offset : offset - window_offset + 20]
+
+            if len(header) < 8:
+                return (0, 0)
+
+            box_size = br.read_int(header, 4, 0)
+            box_type = bytes(header[4:8])
+
+            if box_type == b"ispe":
+
+                if len(header) < 20:
+                    return (0, 0)
+
+                return br.read_int(header, 4, 12), br.read_int(header, 4, 16)
+
+            if box_type in containers:
+                offset += containers[box_type]
+                continue
+
+            # 64 bit largesize follows the type
+            if box_size == 1 and len(header) >= 16:
+                box_size = br.read_int(header, 8, 8)
+
+            if box_size < 8:
+                return (0, 0)
+
+            offset += box_size
+
+    def _probe(self, buf: bytearray):
+
+        result = ProbeResult(*self._get_size(buf), interlaced=False)
+
+        length = len(buf)
+
+        # | size | type (pixi) | version + flags | channels | bits per channel
+        # | 4    | 4 byte      | 4 byte          | 1 byte   | 1 byte each
+        offset = buf.find(b"pixi", 16)
+
+        if offset != -1 and offset + 9 < length:
+            result.channels = buf[offset + 8]
+            result.bit_depth = buf[offset + 9]
+
+        # the colour type follows the colr box type directly
+        if buf.find(b"colrprof", 16) != -1 or buf.find(b"colrrICC", 16) != -1:
+            result.has_icc = True
+
+        elif buf.find(b"colr", 16) != -1:
+            result.has_icc = False
+
+        # alpha planes are auxiliary images tagged with one of these urns
+        result.has_alpha = (
+            buf.find(b"urn:mpeg:mpegB:cicp:systems:auxiliary:alpha", 16) != -1
+            or buf.find(b"urn:mpeg:hevc:2015:auxid:1", 16) != -1
+        )
+
+        return result
@@ -3,6 +3,7 @@ import re, os
 from typing import BinaryIO
 
 from .. import bytereader as br
+from ...budget import get_active
 
 ZERO_OR_ONE = 0
 EXACTLY_ONE = 1
@@ -15,15 +16,30 @@ def read_string(file: BinaryIO, length: int = None):
     if length:
         return file.read(length).decode()
 
-    return "".join(iter(lambda: file.read(1).decode("ascii"), "\x00"))
+    chars = bytearray()
+
+    # up to the terminator, or the end of a truncated file
+    for char in iter(lambda: file.read(1), b""):
+
+        if char == b"\x00":
+            break
+
+        chars += char
+
+    return chars.decode("ascii")
 
 
 def indent(rep):
     return re.sub(r"^", "  ", rep, flags=re.M)
 
 
-def read_box(file: BinaryIO):
+def _read_header(file: BinaryIO):
+    """
+    Reads the header of a box, leaving its body to read.
 
+    Returns:
+        The box, or None if the type is unknown or the file ended.
+    """
     size = br.buffer_read_int(file, 4)
 
     box_type = read_string(file, 4)
@@ -43,8 +59,74 @@ def read_box(file: BinaryIO):
     else:
         box.__init__(size=size)
 
-    if box.get_box_size():
-        box.read(file)
+    return box
+
+
+def _read_body(box, file: BinaryIO, pending: list):
+
+    if not box.get_box_size():
+        return
+
+    # plain containers hold boxes up to their end
+    if type(box).read is Box.read:
+        pending.append([box, box.get_box_size(), None])
+        return
+
+    # the others read their fields, and tell how many boxes follow
+    count = box.read(file)
+
+    if count:
+        pending.append([box, None, count])
+
+
+def read_box(file: BinaryIO):
+    """
+    Reads a box and every box inside it.
+
+    The boxes are read with a stack of the boxes still being filled
+    rather than by recursion, so deeply nested files can't exhaust it.
+
+    Returns:
+        The box, or None if the type is unknown or the file ended.
+    """
+    box = _read_header(file)
+
+    if box is None:
+        return None
+
+    # [box, bytes left or None, boxes left or None] of the open boxes
+    pending = []
+
+    _read_body(box, file, pending)
+
+    budget = get_active()
+
+    while pending:
+
+        if budget is not None:
+            budget.step()
+
+        parent = pending[-1]
+
+        if (parent[1] is not None and parent[1] <= 0) or parent[2] == 0:
+            pending.pop()
+            continue
+
+        child = _read_header(file)
+
+        # the rest of the parent can't be read past an unknown box
+        if child is None:
+            pending.pop()
+            continue
+
+        parent[0].add_child(child)
+
+        if parent[1] is not None:
+            parent[1] -= child.size
+        else:
+            parent[2] -= 1
+
+        _read_body(child, file, pending)
 
     return box
 
@@ -54,27 +136,43 @@ class Box(object):
 
     def __init__(self, size=None):
         self.size = size
-        self.subboxes = {}
         self.raw = b""
 
+        # every box inside this one in order, and the first of each type
+        self.children = []
+        self.subboxes = {}
+
     def get_box_size(self):
         """get box size excluding header"""
         return self.size - 8
 
     def read(self, reader: BinaryIO):
+        """
+        Reads the fields of the box. Plain containers have none, and their
+        boxes are read by read_box.
 
-        read_size = self.get_box_size()
-
-        while read_size > 0:
-
-            box: Box = read_box(reader)
+        Returns:
+            The number of boxes following the fields, or None if none do.
+        """
+        return None
 
-            if not box:
-                break
+    def add_child(self, box):
+        self.children.append(box)
+        self.subboxes.setdefault(box.box_type, box)
 
-            self.subboxes[box.box_type] = box
+    def get_child(self, box_type: str):
+        """
+        Returns:
+            The first box of the type inside this one, or None.
+        """
+        return self.subboxes.get(box_type)
 
-            read_size -= box.size
+    def get_children(self, box_type: str):
+        """
+        Returns:
+            list of every box of the type inside this one, in order.
+        """
+        return [box for box in self.children if box.box_type == box_type]
 
 
 class FullBox(Box):
@@ -124,17 +222,11 @@ class DataReferenceBox(FullBox):
         self.data_entry = []
 
     def read(self, reader: BinaryIO):
+        return br.buffer_read_int(reader, 4)
 
-        entry_count = br.buffer_read_int(reader, 4)
-
-        for _ in range(entry_count):
-
-            box = read_box(reader)
-
-            if not box:
-                break
-
-            self.data_entry.append(box)
+    def add_child(self, box):
+        super().add_child(box)
+        self.data_entry.append(box)
 
 
 class DataEntryUrlBox(FullBox):
@@ -191,6 +283,10 @@ class FileTypeBox(Box):
 
         num_compatible_brands = int((self.size - 16) / 4)
 
+        budget = get_active()
+        if budget is not None:
+            budget.allocate(num_compatible_brands)
+
         for _ in range(num_compatible_brands):
             compat_brand = read_string(reader, 4)
             self.compatible_brands.append(compat_brand)
@@ -244,14 +340,12 @@ class ItemInformationBox(FullBox):
 
     def read(self, reader: BinaryIO):
         count_size = 2 if self.version == 0 else 4
-        entry_count = br.buffer_read_int(reader, count_size)
+        return br.buffer_read_int(reader, count_size)
 
-        for _ in range(entry_count):
-            box = read_box(reader)
-            if not box:
-                break
-            if box.box_type == "infe":
-                self.item_infos.append(box)
+    def add_child(self, box):
+        super().add_child(box)
+        if box.box_type == "infe":
+            self.item_infos.append(box)
 
 
 class ItemInfomationEntry(FullBox):
@@ -321,6 +415,9 @@ class FDItemInfoExtension(object):
         self.content_length = br.buffer_read_int(reader, 8)
         self.transfer_length = br.buffer_read_int(reader, 8)
         entry_count = br.buffer_read_int(reader, 1)
+        budget = get_active()
+        if budget is not None:
+            budget.allocate(entry_count)
         for _ in range(entry_count):
             group_id = br.buffer_read_int(reader, 4)
             self.group_ids.append(group_id)
@@ -356,6 +453,9 @@ class ItemLocationBox(FullBox):
         self.reserved = byte & 0b1111
         self.items = []
         item_count = br.buffer_read_int(reader, 2)
+        budget = get_active()
+        if budget is not None:
+            budget.allocate(item_count)
 
         for _ in range(item_count):
             item = {}
@@ -364,6 +464,8 @@ class ItemLocationBox(FullBox):
             item["base_offset"] = br.buffer_read_int(reader, self.base_offset_size)
             extent_count = br.buffer_read_int(reader, 2)
             item["extents"] = []
+            if budget is not None:
+                budget.allocate(extent_count)
             for _ in range(extent_count):
                 extent = {}
                 extent["extent_offset"] = br.buffer_read_int(reader, self.offset_size)
@@ -388,14 +490,12 @@ class ItemProtectionBox(FullBox):
         self.protection_informations = []
 
     def read(self, reader: BinaryIO):
-        protection_count = br.buffer_read_int(reader, 2)
+        return br.buffer_read_int(reader, 2)
 
-        for _ in range(protection_count):
-            box = read_box(reader)
-            if not box:
-                break
-            if box.box_type == "sinf":
-                self.protection_informations.append(box)
+    def add_child(self, box):
+        super().add_child(box)
+        if box.box_type == "sinf":
+            self.protection_informations.append(box)
 
 
 ### ipro end ###
@@ -469,11 +569,16 @@ class ItemPropertyAssociation(FullBox):
     def read(self, reader: BinaryIO):
         entry_count = br.buffer_read_int(reader, 4)
         id_size = 2 if self.version < 1 else 4
+        budget = get_active()
+        if budget is not None:
+            budget.allocate(entry_count)
         for _ in range(entry_count):
             item = {}
             item["id"] = br.buffer_read_int(reader, id_size)
             association_count = br.buffer_read_int(reader, 1)
             item["associations"] = []
+            if budget is not None:
+                budget.allocate(association_count)
             for __ in range(association_count):
                 association = {}
                 if self.flags & 0b1:
@@ -504,6 +609,9 @@ class MediaDataBox(Box):
 
     def read(self, reader: BinaryIO):
         self.data_offset = reader.tell()
+        budget = get_active()
+        if budget is not None:
+            budget.read(self.get_box_size())
         self.raw = reader.read(self.get_box_size())
 
 
@@ -760,12 +868,11 @@ class SampleDescriptionBox(FullBox):
         self.samples = []
 
     def read(self, reader: BinaryIO):
-        entry_count = br.buffer_read_int(reader, 4)
-        for _ in range(entry_count):
-            box = read_box(reader)
-            if not box:
-                break
-            self.samples.append(box)
+        return br.buffer_read_int(reader, 4)
+
+    def add_child(self, box):
+        super().add_child(box)
+        self.samples.append(box)
 
 
 class SampleEntry(Box):
@@ -894,6 +1001,9 @@ class ChunkOffsetBox(FullBox):
 
     def read(self, reader: BinaryIO):
         entry_count = br.buffer_read_int(reader, 4)
+        budget = get_active()
+        if budget is not None:
+            budget.allocate(entry_count)
 
         for _ in range(entry_count):
             entry = {}
@@ -918,6 +1028,9 @@ class SampleToChunkBox(FullBox):
 
     def read(self, reader: BinaryIO):
         entry_count = br.buffer_read_int(reader, 4)
+        budget = get_active()
+        if budget is not None:
+            budget.allocate(entry_count)
         for _ in range(entry_count):
             entry = {}
             entry["first_chunk"] = br.buffer_read_int(reader, 4)
@@ -942,6 +1055,9 @@ class SyncSampleBox(FullBox):
 
     def read(self, reader: BinaryIO):
         entry_count = br.buffer_read_int(reader, 4)
+        budget = get_active()
+        if budget is not None:
+            budget.allocate(entry_count)
         for _ in range(entry_count):
             entry = {}
             entry["sample_number"] = br.buffer_read_int(reader, 4)
@@ -968,6 +1084,9 @@ class SampleSizeBox(FullBox):
         sample_count = br.buffer_read_int(reader, 4)
 
         if self.sample_size == 0:
+            budget = get_active()
+            if budget is not None:
+                budget.allocate(sample_count)
             for _ in range(sample_count):
                 entry = {}
                 entry["entry_size"] = br.buffer_read_int(reader, 4)
@@ -991,6 +1110,9 @@ class TimeToSampleBox(FullBox):
 
     def read(self, reader: BinaryIO):
         self.entry_count = br.buffer_read_int(reader, 4)
+        budget = get_active()
+        if budget is not None:
+            budget.allocate(self.entry_count)
         for _ in range(self.entry_count):
             entry = {}
             entry["sample_count"] = br.buffer_read_int(reader, 4)
@@ -1067,7 +1189,11 @@ class HEVCSampleEntry(VisualSampleEntry):
 
     def read(self, reader: BinaryIO):
         super().read(reader)
-        self.config = read_box(reader)
+        return 1
+
+    def add_child(self, box):
+        super().add_child(box)
+        self.config = box
 
 
 class HEVCConfigurationBox(Box):
@@ -1189,6 +1315,9 @@ class HEVCDecoderConfigurationRecord(object):
         self.length_size_minus_1 = byte & 0b11
         #
         num_of_arrays = br.buffer_read_int(reader, 1)  # 8
+        budget = get_active()
+        if budget is not None:
+            budget.allocate(num_of_arrays)
         for _ in range(num_of_arrays):
             self.array.append(self.__read_item(reader))
 
@@ -1200,6 +1329,9 @@ class HEVCDecoderConfigurationRecord(object):
 
         num_nalus = br.buffer_read_int(reader, 2)
         item["nal_units"] = []
+        budget = get_active()
+        if budget is not None:
+            budget.allocate(num_nalus)
         for _ in range(num_nalus):
             nal_unit_len = br.buffer_read_int(reader, 2)
             nal_unit = reader.read(nal_unit_len)
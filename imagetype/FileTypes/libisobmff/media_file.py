@@ -9,7 +9,13 @@ class MediaFile(object):
         self.mdats: boxes.MediaDataBox = []
         self.meta: boxes.MetaBox = None
         self.moov: boxes.MovieBox = None
-        self.subboxes: boxes.Box = {}
+
+        # every top level box in order, and the first of each type but mdat
+        self.children = []
+        self.subboxes = {}
+
+        # every box of the file by type, in file order
+        self._index = {}
 
     def __repr__(self):
         rep = self.ftyp.__repr__() + "\n"
@@ -30,39 +36,84 @@ class MediaFile(object):
                 if not box:
                     break
 
+                self.children.append(box)
+
                 if box.box_type == "mdat":
                     self.mdats.append(box)
-                else:
+
+                # the first of the other top level boxes
+                elif getattr(self, box.box_type, None) is None:
                     self.__setattr__(box.box_type, box)
                     self.subboxes[box.box_type] = box
 
-    def show_all(self, subboxes: dict):
+        self._index = self._build_index()
 
-        for key, value in subboxes.items():
+    def walk(self):
+        """
+        Yields every box of the file in file order, parents before their
+        children, keeping a stack rather than recursing.
+        """
+        stack = list(reversed(self.children))
 
-            self.show_all(value.subboxes)
+        while stack:
 
-            print(key)
+            box = stack.pop()
 
-            if value.raw != b"":
-                print(value.raw)
+            yield box
 
-            print()
+            stack.extend(reversed(box.children))
 
-    def _get_box(self, box, boxname):
+    def _build_index(self):
 
-        for key, value in box.subboxes.items():
+        index = {}
 
-            if key == boxname:
-                return value
+        for box in self.walk():
+            index.setdefault(box.box_type, []).append(box)
 
-            _ = self._get_box(value, boxname)
+        return index
+
+    def show_all(self, subboxes: dict):
+        """
+        Prints the type and raw bytes of the given boxes and of the boxes
+        inside them, the inner ones first.
 
-            if _ is not None:
-                return _
+        Args:
+            subboxes: dict of box type to box, such as the subboxes of the
+            file or of a box.
+        """
+        # (box type, box, whether the boxes inside it were pushed), kept
+        # on a stack rather than recursing
+        stack = [(key, box, False) for key, box in reversed(list(subboxes.items()))]
+
+        while stack:
+
+            key, box, expanded = stack.pop()
+
+            if not expanded:
+                stack.append((key, box, True))
+                inner = reversed(list(box.subboxes.items()))
+                stack.extend((key, child, False) for key, child in inner)
+                continue
+
+            print(key)
+
+            if box.raw != b"":
+                print(box.raw)
+
+            print()
 
-        return None
+    def get_boxes(self, boxname):
+        """
+        Returns:
+            list of every box of the type anywhere in the file, in file order.
+        """
+        return self._index.get(boxname, [])
 
     def get_box(self, boxname):
+        """
+        Returns:
+            The first box of the type anywhere in the file, or None.
+        """
+        found = self._index.get(boxname)
 
-        return self._get_box(self, boxname)
+        return found[0] if found else None
@@ -0,0 +1,123 @@
+import os
+
+from .base import FileType
+
+
+def _can_start_with(filetype, first_byte: int):
+
+    # types matched by their own code can start with anything
+    if type(filetype).match is not FileType.match:
+        return True
+
+    for signature in filetype.SIGNATURES:
+        if signature.first_byte is None or signature.first_byte == first_byte:
+            return True
+
+    return False
+
+
+class Registry(object):
+    """
+    Lookups of the types of a matcher set by MIME type and extension, and
+    matching which tries a hinted type first.
+
+    Args:
+        filetypes: the type matchers, in the order they are matched.
+    """
+
+    def __init__(self, filetypes):
+
+        self.filetypes = tuple(filetypes)
+
+        self._mimes = {}
+        self._extensions = {}
+
+        for filetype in self.filetypes:
+            self._mimes.setdefault(filetype.mime, filetype)
+            self._extensions.setdefault(filetype.extension, filetype)
+
+        # alternates only fill in extensions no type has as its own
+        for filetype in self.filetypes:
+            for extension in filetype.extension_alternate:
+                self._extensions.setdefault(extension, filetype)
+
+        # (type, first byte) -> the earlier types which could match the
+        # same buffers, filled in as hints come in
+        self._guards = {}
+
+    def by_mime(self, mime: str):
+        """
+        Returns:
+            The type with the given MIME type, or None.
+        """
+        return self._mimes.get(mime.lower())
+
+    def by_extension(self, extension: str):
+        """
+        Returns:
+            The type with the given extension, with or without the leading
+            dot, or None. Own extensions take precedence over alternates.
+        """
+        return self._extensions.get(extension.lower().lstrip("."))
+
+    def by_hint(self, hint):
+        """
+        Returns:
+            The type a file name, path, extension or MIME type points to,
+            or None.
+        """
+        if not isinstance(hint, str):
+            hint = os.fspath(hint)
+
+        hint = hint.lower()
+
+        filetype = self._mimes.get(hint)
+
+        if filetype is None:
+            filetype = self._extensions.get(hint.rpartition(".")[2])
+
+        return filetype
+
+    def _get_guards(self, filetype, first_byte: int):
+
+        key = (filetype, first_byte)
+
+        guards = self._guards.get(key)
+
+        if guards is None:
+
+            index = self.filetypes.index(filetype)
+
+            guards = self._guards[key] = tuple(
+                other
+                for other in self.filetypes[:index]
+                if _can_start_with(other, first_byte) and other.can_overlap(filetype)
+            )
+
+        return guards
+
+    def match(self, buf: bytearray, hint):
+        """
+        Matches the buffer against the type the hint points to first. As
+        hints are usually right, this is mostly one check, plus the few
+        earlier types which could match the same buffer, such as Apng for
+        Png, so the result is the same as matching all types in order.
+
+        Args:
+            buf: bytearray holding the start of the file.
+            hint: usually the file name, see by_hint.
+
+        Returns:
+            The matching type, or None when the hinted type does not match
+            and all types have to be tried.
+        """
+        filetype = self.by_hint(hint)
+
+        if filetype is None or not filetype.match(buf):
+            return None
+
+        for guard in self._get_guards(filetype, buf[0]):
+            if guard.match(buf):
+                return guard
+
+        return filetype
@@ -0,0 +1,213 @@
+class Signature(object):
+    """
+    Magic bytes expected at an offset of the file.
+
+    Args:
+        magic: the expected bytes.
+        offset: where the magic bytes start.
+        mask: optional bytes the same length as magic, which are and-ed with
+        the file before comparing. Zero bytes skip a position entirely.
+        priority: signatures with a higher priority are tried first when
+        several types are compiled together.
+        min_length: the least number of bytes a buffer must have.
+        check: optional callback taking the buffer, for the structure the
+        magic bytes alone can't express.
+    """
+
+    __slots__ = (
+        "magic",
+        "offset",
+        "mask",
+        "priority",
+        "min_length",
+        "check",
+        "_runs",
+        "_bits",
+    )
+
+    def __init__(
+        self, magic, offset=0, mask=None, priority=0, min_length=0, check=None
+    ):
+
+        if mask is not None and len(mask) != len(magic):
+            raise ValueError("mask must be the same length as magic")
+
+        self.magic = bytes(magic)
+        self.offset = offset
+        self.mask = None if mask is None else bytes(mask)
+        self.priority = priority
+        self.min_length = max(min_length, offset + len(magic))
+        self.check = check
+
+        # (offset, bytes) runs compared with startswith,
+        # and (offset, mask, value) for partially masked bytes
+        self._runs, self._bits = self._compile()
+
+    def _compile(self):
+
+        if self.mask is None:
+            return ((self.offset, self.magic),), ()
+
+        runs = []
+        bits = []
+
+        start = None
+
+        for i, (byte, mask) in enumerate(zip(self.magic, self.mask + b"\x00")):
+
+            if mask == 0xFF and start is None:
+                start = i
+
+            elif mask != 0xFF and start is not None:
+                runs.append((self.offset + start, self.magic[start:i]))
+                start = None
+
+            if mask not in (0x00, 0xFF):
+                bits.append((self.offset + i, mask, byte & mask))
+
+        if start is not None:
+            runs.append((self.offset + start, self.magic[start:]))
+
+        return tuple(runs), tuple(bits)
+
+    @property
+    def first_byte(self):
+        """
+        The byte the buffer must start with, or None when it can be anything.
+        """
+        if self._runs and self._runs[0][0] == 0:
+            return self._runs[0][1][0]
+
+        return None
+
+    def _fixed_bits(self):
+
+        # offset -> (mask, value) of every byte which is at least partly fixed
+        mask = self.mask or b"\xff" * len(self.magic)
+
+        return {
+            self.offset + i: (m, byte & m)
+            for i, (byte, m) in enumerate(zip(self.magic, mask))
+            if m
+        }
+
+    def can_overlap(self, other):
+        """
+        Checks whether some buffer could match both signatures, which is
+        the case unless they expect different bits at the same position.
+        The check callbacks are not looked at, so this errs towards True.
+        """
+        mine = self._fixed_bits()
+
+        for offset, (mask, value) in other._fixed_bits().items():
+
+            if offset not in mine:
+                continue
+
+            common = mine[offset][0] & mask
+
+            if (mine[offset][1] ^ value) & common:
+                return False
+
+        return True
+
+    def match(self, buf):
+
+        if len(buf) < self.min_length:
+            return False
+
+        for offset, magic in self._runs:
+            if not buf.startswith(magic, offset):
+                return False
+
+        for offset, mask, value in self._bits:
+            if buf[offset] & mask != value:
+                return False
+
+        return self.check is None or self.check(buf)
+
+    def could_match(self, buf):
+        """
+        Checks whether the buffer, which may be the start of a longer file,
+        could still match once more bytes are known. Only the bytes which
+        are there are compared, as the check callback may need more.
+        """
+        for offset, magic in self._runs:
+
+            available = buf[offset : offset + len(magic)]
+
+            if available != magic[: len(available)]:
+                return False
+
+        for offset, mask, value in self._bits:
+            if offset < len(buf) and buf[offset] & mask != value:
+                return False
+
+        return True
+
+
+class SignatureTable(object):
+    """
+    The signatures of several types compiled into a single matcher.
+
+    Signatures which fix the first byte are bucketed by it, so matching
+    a buffer only tries the few signatures starting with its first byte,
+    plus those which can start with anything. Within a bucket signatures
+    are tried by descending priority, then in the order of the types.
+    """
+
+    def __init__(self, filetypes):
+
+        self.filetypes = tuple(filetypes)
+
+        entries = []
+
+        for index, filetype in enumerate(self.filetypes):
+            for signature in filetype.SIGNATURES:
+                entries.append((-signature.priority, index, signature, filetype))
+
+        entries.sort(key=lambda entry: entry[:2])
+
+        anchored = {}
+
+        for entry in entries:
+
+            first_byte = entry[2].first_byte
+
+            if first_byte is not None:
+                anchored.setdefault(first_byte, [])
+
+        for entry in entries:
+
+            first_byte = entry[2].first_byte
+
+            for byte, bucket in anchored.items():
+                if first_byte is None or first_byte == byte:
+                    bucket.append(entry[2:])
+
+        self._buckets = {byte: tuple(bucket) for byte, bucket in anchored.items()}
+
+        self._unanchored = tuple(
+            entry[2:] for entry in entries if entry[2].first_byte is None
+        )
+
+    def candidates(self, buf):
+        """
+        Returns:
+            Tuple of the (signature, type) pairs to try on the buffer, in order.
+        """
+        if buf:
+            return self._buckets.get(buf[0], self._unanchored)
+
+        return self._unanchored
+
+    def match(self, buf):
+        """
+        Returns:
+            The first type whose signature matches the buffer. Otherwise None.
+        """
+        for signature, filetype in self.candidates(buf):
+            if signature.match(buf):
+                return filetype
+
+        return None
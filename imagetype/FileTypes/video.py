@@ -0,0 +1,96 @@
+from .isobmff import IsoBmff, _is_family
+from .base import FileType
+from .signature import Signature
+
+
+class IsoBmffVideo(IsoBmff):
+    """
+    Implements the base of the ISO-BMFF based video types, whose sizes are
+    in the track headers of the moov box rather than in an ispe box.
+    """
+
+    _get_size = FileType._get_size
+    _get_images = FileType._get_images
+    _read_size = FileType._read_size
+    _probe = FileType._probe
+
+
+class Mp4(IsoBmffVideo):
+    """
+    Implements the MP4 video type matcher.
+    """
+
+    MIME = "video/mp4"
+    EXTENSION = "mp4"
+
+    FAMILY = ("video/mp4",)
+
+    SIGNATURES = (Signature(b"ftyp", offset=4, check=_is_family(FAMILY)),)
+
+    def __init__(self):
+        super(Mp4, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+
+
+class M4v(IsoBmffVideo):
+    """
+    Implements the M4V (iTunes video) type matcher.
+    """
+
+    MIME = "video/x-m4v"
+    EXTENSION = "m4v"
+
+    FAMILY = ("video/x-m4v",)
+
+    SIGNATURES = (Signature(b"ftyp", offset=4, check=_is_family(FAMILY)),)
+
+    def __init__(self):
+        super(M4v, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+
+
+class Mov(IsoBmffVideo):
+    """
+    Implements the QuickTime video type matcher, for files starting with
+    an ftyp box.
+    """
+
+    MIME = "video/quicktime"
+    EXTENSION = "mov"
+
+    FAMILY = ("video/quicktime",)
+
+    SIGNATURES = (Signature(b"ftyp", offset=4, check=_is_family(FAMILY)),)
+
+    def __init__(self):
+        super(Mov, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+
+
+class ThreeGpp(IsoBmffVideo):
+    """
+    Implements the 3GPP video type matcher.
+    """
+
+    MIME = "video/3gpp"
+    EXTENSION = "3gp"
+
+    FAMILY = ("video/3gpp",)
+
+    SIGNATURES = (Signature(b"ftyp", offset=4, check=_is_family(FAMILY)),)
+
+    def __init__(self):
+        super(ThreeGpp, self).__init__(mime=self.MIME, extension=self.EXTENSION)
+
+
+class ThreeGpp2(IsoBmffVideo):
+    """
+    Implements the 3GPP2 video type matcher.
+    """
+
+    MIME = "video/3gpp2"
+    EXTENSION = "3g2"
+
+    FAMILY = ("video/3gpp2",)
+
+    SIGNATURES = (Signature(b"ftyp", offset=4, check=_is_family(FAMILY)),)
+
+    def __init__(self):
+        super(ThreeGpp2, self).__init__(mime=self.MIME, extension=self.EXTENSION)
@@ -4,3 +4,26 @@ from .match import *
 
 # Current package semver version
 __version__ = version = "0.1"
+
+# entry points whose modules are only imported on first use, as most
+# callers only match images
+_LAZY = {
+    "scan_archive": ".archive",
+    "probe_video": ".video",
+}
+
+
+def __getattr__(name):
+
+    if name not in _LAZY:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        )
+
+    import importlib
+
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+
+    globals()[name] = value
+
+    return value
@@ -0,0 +1,208 @@
+"""
+Matcher sets which reorder themselves by how often each type is seen.
+"""
+
+import json
+
+from .utils import get_bytes
+from .FileTypes import IMAGE as image_matchers
+from .FileTypes.base import FileType
+from .FileTypes.signature import SignatureTable
+
+
+def _precedence(matchers):
+
+    # for each index the earlier indexes which must stay in front of it,
+    # every pair of types which could match the same buffer keeps its order
+    return [
+        {j for j in range(i) if matchers[j].can_overlap(matchers[i])}
+        for i in range(len(matchers))
+    ]
+
+
+class AdaptiveMatcher(object):
+    """
+    Tries its matchers from the most to the least often matched type,
+    reordering them as it goes. Types whose signatures could match the
+    same buffer, such as Apng and Png or Tiff and Cr2, never swap places.
+
+    It can be passed as the matchers of match.match, which then tries the
+    types in the learned order without counting them.
+
+    Args:
+        matchers: the type matchers, in the order that is known to be correct.
+        reorder_every: how many matches to observe between reorders.
+        compile: whether to compile the signatures in the learned order into
+        a SignatureTable, otherwise the types are tried one after another.
+    """
+
+    def __init__(self, matchers=image_matchers, reorder_every=1024, compile=True):
+
+        self.matchers = tuple(matchers)
+        self.reorder_every = reorder_every
+        self.frozen = False
+
+        self.counts = [0] * len(self.matchers)
+
+        self._index = {id(matcher): i for i, matcher in enumerate(self.matchers)}
+        self._before = _precedence(self.matchers)
+        self._pending = 0
+
+        # types with their own match code can't be compiled into a table
+        self._compiled = compile and all(
+            type(matcher).match is FileType.match for matcher in self.matchers
+        )
+
+        self._set_order(self.matchers)
+
+    def _set_order(self, order):
+
+        self.order = tuple(order)
+
+        if self._compiled:
+            self._table = SignatureTable(self.order)
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def match(self, obj):
+        """
+        Matches the given input, counting the matched type.
+
+        Args:
+            obj: path to file, bytes or bytearray.
+
+        Returns:
+            Type instance if type matches. Otherwise None.
+
+        Raises:
+            TypeError: if obj is not a supported type.
+        """
+        buf = get_bytes(obj)
+
+        if self._compiled:
+            matcher = self._table.match(buf)
+
+            if matcher is None:
+                return None
+        else:
+            for matcher in self.order:
+                if matcher.match(buf):
+                    break
+            else:
+                return None
+
+        if not self.frozen:
+            self.observe(matcher)
+
+        return matcher
+
+    def observe(self, matcher: FileType):
+        """
+        Counts one occurrence of the given type, reordering the matchers
+        once enough occurrences were seen since the last reorder.
+        """
+        self.counts[self._index[id(matcher)]] += 1
+
+        self._pending += 1
+
+        if self._pending >= self.reorder_every:
+            self.reorder()
+
+    def reorder(self):
+        """
+        Sorts the matchers by descending count, within the order constraints.
+        """
+        self._pending = 0
+
+        # a type weighs as much as the most seen type that has to wait for it,
+        # so Apng moves up along with a frequent Png
+        weights = list(self.counts)
+
+        for i in reversed(range(len(self.matchers))):
+            for j in self._before[i]:
+                weights[j] = max(weights[j], weights[i])
+
+        placed = set()
+        order = []
+
+        # topological sort, always taking the heaviest type that is ready
+        while len(order) < len(self.matchers):
+
+            ready = (
+                i
+                for i in range(len(self.matchers))
+                if i not in placed and self._before[i] <= placed
+            )
+
+            i = min(ready, key=lambda i: (-weights[i], -self.counts[i], i))
+
+            placed.add(i)
+            order.append(self.matchers[i])
+
+        self._set_order(order)
+
+    def freeze(self):
+        """
+        Stops counting, keeping the current order.
+        """
+        self.frozen = True
+
+    def get_profile(self):
+        """
+        Returns:
+            dict with the counts of each type, keyed by the type class name.
+        """
+        return {
+            "counts": {
+                type(matcher).__name__: count
+                for matcher, count in zip(self.matchers, self.counts)
+            },
+            "order": [type(matcher).__name__ for matcher in self.order],
+        }
+
+    def set_profile(self, profile):
+        """
+        Loads the counts of a profile and reorders the matchers by them.
+        Types missing from the profile get a count of 0.
+        """
+        counts = profile.get("counts", {})
+
+        self.counts = [
+            counts.get(type(matcher).__name__, 0) for matcher in self.matchers
+        ]
+
+        self.reorder()
+
+    def save(self, path):
+        """
+        Writes the profile to a JSON file.
+        """
+        with open(path, "w") as fp:
+            json.dump(self.get_profile(), fp, indent=2)
+
+    @classmethod
+    def load(cls, path, matchers=image_matchers, frozen=True, compile=True):
+        """
+        Creates a matcher set ordered by the profile in a JSON file.
+
+        Args:
+            path: the file written by save.
+            matchers: the type matchers, in the order that is known to be correct.
+            frozen: whether to keep the loaded order instead of learning further.
+            compile: whether to compile the signatures into a SignatureTable.
+
+        Returns:
+            AdaptiveMatcher instance.
+        """
+        with open(path) as fp:
+            profile = json.load(fp)
+
+        adaptive = cls(matchers, compile=compile)
+        adaptive.set_profile(profile)
+        adaptive.frozen = frozen
+
+        return adaptive
@@ -0,0 +1,147 @@
+"""
+Identifies the members of zip and tar archives without extracting them.
+"""
+
+import os
+
+from .FileTypes import IMAGE as image_matchers
+from .FileTypes.base import FileType
+from .match import _match, _get_info
+from .utils import _NUM_SIGNATURE_BYTES, _MAX_PROBE_BYTES
+
+
+def _identify_stream(file, size, matchers, max_read: int, limits):
+    """
+    Identifies a file read from its start, reading further into it only
+    while the header has not been found.
+
+    Args:
+        file: readable file-like object, positioned at the start.
+        size: the length of the file, for limits.
+
+    Returns:
+        info.ImageInfo if a type matches. Otherwise None.
+    """
+    buf = bytearray(file.read(_NUM_SIGNATURE_BYTES))
+
+    matcher = _match(buf, matchers)
+
+    if matcher is None:
+        return None
+
+    result = matcher._probe(buf)
+
+    # types that never read a size would only waste the extra reads
+    if type(matcher)._get_size is not FileType._get_size:
+
+        to_read = len(buf)
+
+        # a full buffer without a size means the header is further in,
+        # and the stream goes on from where the last read stopped
+        while result.width == 0 and len(buf) == to_read and to_read < max_read:
+
+            to_read = min(to_read * 8, max_read)
+
+            buf += file.read(to_read - len(buf))
+
+            result = matcher._probe(buf)
+
+    if limits is not None:
+        limits.enforce(matcher, buf, size)
+
+    return _get_info(matcher, result, buf)
+
+
+def _scan_zip(archive, matchers, max_read: int, limits):
+
+    import zipfile
+    import zlib
+
+    # in the order of the data, so the reads only go forward
+    members = sorted(archive.infolist(), key=lambda info: info.header_offset)
+
+    for info in members:
+
+        if info.is_dir():
+            continue
+
+        # stored members are read in place, deflated ones are decompressed
+        # a block at a time, up to the bytes the header takes
+        try:
+            with archive.open(info) as member:
+                record = _identify_stream(
+                    member, info.file_size, matchers, max_read, limits
+                )
+        except (RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error):
+            # encrypted, compressed with an unsupported method or corrupt
+            record = None
+
+        yield info.filename, record
+
+
+def _scan_tar(archive, matchers, max_read: int, limits):
+
+    # iterating reads the member headers in turn, seeking over their data
+    # when the archive is not compressed
+    for info in archive:
+
+        if not info.isfile():
+            continue
+
+        member = archive.extractfile(info)
+
+        with member:
+            record = _identify_stream(member, info.size, matchers, max_read, limits)
+
+        yield info.name, record
+
+
+def scan_archive(
+    obj, matchers=image_matchers, max_read=_MAX_PROBE_BYTES, limits=None
+):
+    """
+    Identifies every file in a zip (including cbz) or tar archive, which
+    may be compressed with gzip, bzip2 or xz, in one pass over the archive.
+    Only the header of each member is read, decompressing compressed
+    members no further than it.
+
+    Args:
+        obj: path to the archive or seekable file-like object.
+        matchers, max_read, limits: see identify.
+
+    Returns:
+        Generator of (member name, info.ImageInfo) for every file in the
+        archive, with None for members which can't be read or don't match.
+
+    Raises:
+        TypeError: if obj is not a supported type.
+        ValueError: if obj is not a zip or tar archive.
+        DecompressionBombError: if a header declares more than limits allow.
+    """
+    import tarfile
+    import zipfile
+
+    if isinstance(obj, (str, os.PathLike)):
+        tar_arguments = {"name": obj}
+    elif hasattr(obj, "read") and hasattr(obj, "seek"):
+        tar_arguments = {"fileobj": obj}
+    else:
+        raise TypeError("Unsupported type as archive input: %s" % type(obj))
+
+    if zipfile.is_zipfile(obj):
+
+        with zipfile.ZipFile(obj) as archive:
+            yield from _scan_zip(archive, matchers, max_read, limits)
+
+        return
+
+    if not isinstance(obj, (str, os.PathLike)):
+        obj.seek(0)
+
+    try:
+        archive = tarfile.open(mode="r:*", **tar_arguments)
+    except tarfile.ReadError:
+        raise ValueError("not a zip or tar archive") from None
+
+    with archive:
+        yield from _scan_tar(archive, matchers, max_read, limits)
@@ -0,0 +1,300 @@
+"""
+Vectorized matching over many fixed size headers at once.
+Needs numpy, which is optional for the rest of the package.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .FileTypes import IMAGE as image_matchers
+from .FileTypes import image, video
+from .FileTypes.isobmff import BRAND_MIMES, MIME_PRIORITY
+from .FileTypes.base import FileType
+
+
+def _require_numpy():
+
+    if np is None:
+        raise ImportError("imagetype.batch requires numpy to be installed")
+
+
+def _has_magic(headers, offset: int, magic: bytes):
+
+    if headers.shape[1] < offset + len(magic):
+        return np.zeros(headers.shape[0], dtype=bool)
+
+    expected = np.frombuffer(magic, dtype=np.uint8)
+
+    return (headers[:, offset : offset + len(magic)] == expected).all(axis=1)
+
+
+def _read_uint(headers, offset: int, length: int, byteorder: str = "big"):
+
+    value = np.zeros(headers.shape[0], dtype=np.int64)
+
+    for i in range(length):
+
+        shift = 8 * (length - 1 - i if byteorder == "big" else i)
+
+        value |= headers[:, offset + i].astype(np.int64) << shift
+
+    return value
+
+
+def _check_apng(headers, matcher):
+
+    # acTL is almost always the chunk right after IHDR, so only rows
+    # with some other chunk there have to walk their chunks one by one
+    ihdr = _has_magic(headers, 8, b"\x00\x00\x00\x0dIHDR")
+    actl = ihdr & _has_magic(headers, 37, b"acTL")
+    idat = ihdr & (_has_magic(headers, 37, b"IDAT") | _has_magic(headers, 37, b"IEND"))
+
+    for i in np.flatnonzero(~actl & ~idat):
+        actl[i] = matcher.match(bytearray(headers[i].tobytes()))
+
+    return actl
+
+
+def _get_brand_ranks(headers):
+    """
+    Returns:
+        The rank in isobmff.MIME_PRIORITY of the best brand of every row,
+        as the signature check of the ISO-BMFF types picks it, and the
+        length of MIME_PRIORITY for rows without a known brand.
+    """
+    count, length = headers.shape
+
+    missing = len(MIME_PRIORITY)
+
+    # the brands as integers sorted for searching, with the rank of each
+    codes = np.array(
+        sorted(int.from_bytes(brand, "big") for brand in BRAND_MIMES),
+        dtype=np.int64,
+    )
+    ranks = np.array(
+        [
+            MIME_PRIORITY.index(BRAND_MIMES[int(code).to_bytes(4, "big")])
+            for code in codes
+        ],
+        dtype=np.int64,
+    )
+
+    best = np.full(count, missing, dtype=np.int64)
+
+    if length < 16:
+        return best
+
+    ftyp_length = _read_uint(headers, 0, 4)
+
+    for offset in (8, *range(16, length - 3, 4)):
+
+        code = _read_uint(headers, offset, 4)
+
+        found = np.minimum(np.searchsorted(codes, code), len(codes) - 1)
+
+        known = (codes[found] == code) & (offset + 4 <= ftyp_length)
+
+        best = np.minimum(best, np.where(known, ranks[found], missing))
+
+    whole = (ftyp_length >= 16) & (ftyp_length <= length)
+
+    return np.where(whole, best, missing)
+
+
+def _check_family(headers, matcher):
+
+    # the same brand rules as the signature check of the ISO-BMFF types
+    ranks = [MIME_PRIORITY.index(mime) for mime in matcher.FAMILY]
+
+    return np.isin(_get_brand_ranks(headers), ranks)
+
+
+def _check_not_cr2(headers, matcher):
+    return ~_has_magic(headers, 8, b"CR")
+
+
+# vectorized versions of the signature checks of these types, the
+# checks of other types are called row by row
+CHECKS = {
+    image.Apng: _check_apng,
+    image.Tiff: _check_not_cr2,
+    image.Heic: _check_family,
+    image.Heif: _check_family,
+    image.Avif: _check_family,
+    image.Cr3: _check_family,
+    video.Mp4: _check_family,
+    video.M4v: _check_family,
+    video.Mov: _check_family,
+    video.ThreeGpp: _check_family,
+    video.ThreeGpp2: _check_family,
+}
+
+
+def _match_rows(headers, rows, match):
+
+    return rows[
+        np.fromiter(
+            (match(bytearray(headers[i].tobytes())) for i in rows),
+            dtype=bool,
+            count=len(rows),
+        )
+    ]
+
+
+def _match_signature(headers, rows, matcher):
+
+    # types with their own match method are matched row by row
+    if type(matcher).match is not FileType.match:
+        return _match_rows(headers, rows, matcher.match)
+
+    matched = []
+
+    for signature in matcher.SIGNATURES:
+
+        if headers.shape[1] < signature.min_length:
+            continue
+
+        # narrow the candidates down one byte at a time, so after the
+        # first byte only the few rows still in the running are compared
+        candidates = rows
+
+        for offset, magic in signature._runs:
+            for i, byte in enumerate(magic):
+                candidates = candidates[headers[candidates, offset + i] == byte]
+
+        for offset, mask, value in signature._bits:
+            candidates = candidates[headers[candidates, offset] & mask == value]
+
+        if signature.check is not None and len(candidates):
+
+            check = CHECKS.get(type(matcher))
+
+            if check is None:
+                candidates = _match_rows(headers, candidates, signature.check)
+            else:
+                candidates = candidates[check(headers[candidates], matcher)]
+
+        matched.append(candidates)
+
+    if not matched:
+        return rows[:0]
+
+    return matched[0] if len(matched) == 1 else np.concatenate(matched)
+
+
+def _get_sizes(headers, kinds, matchers):
+
+    count, length = headers.shape
+
+    widths = np.zeros(count, dtype=np.int64)
+    heights = np.zeros(count, dtype=np.int64)
+
+    def rows_of(types, min_length):
+
+        rows = np.zeros(count, dtype=bool)
+
+        if length < min_length:
+            return rows
+
+        for index, matcher in enumerate(matchers):
+            if isinstance(matcher, types):
+                rows |= kinds == index
+
+        return rows
+
+    # png and apng, from the IHDR chunk
+    rows = rows_of(image.Png, 24)
+    if rows.any():
+        widths[rows] = _read_uint(headers[rows], 16, 4)
+        heights[rows] = _read_uint(headers[rows], 20, 4)
+
+    rows = rows_of(image.Gif, 10)
+    if rows.any():
+        widths[rows] = _read_uint(headers[rows], 6, 2, "little")
+        heights[rows] = _read_uint(headers[rows], 8, 2, "little")
+
+    rows = rows_of(image.Bmp, 26)
+    if rows.any():
+        widths[rows] = _read_uint(headers[rows], 18, 4, "little")
+        heights[rows] = _read_uint(headers[rows], 22, 4, "little")
+
+    rows = rows_of(image.Psd, 22)
+    if rows.any():
+        widths[rows] = _read_uint(headers[rows], 18, 4)
+        heights[rows] = _read_uint(headers[rows], 14, 4)
+
+    rows = rows_of(image.Qoi, 12)
+    if rows.any():
+        widths[rows] = _read_uint(headers[rows], 4, 4)
+        heights[rows] = _read_uint(headers[rows], 8, 4)
+
+    rows = rows_of(image.Dds, 20)
+    if rows.any():
+        widths[rows] = _read_uint(headers[rows], 16, 4, "little")
+        heights[rows] = _read_uint(headers[rows], 12, 4, "little")
+
+    rows = rows_of(image.Webp, 30)
+    if rows.any():
+
+        # lossy webp, with its 3 byte frame tag
+        lossy = rows & (headers[:, 15] == 0x20)
+        lossy &= _has_magic(headers, 23, b"\x9d\x01\x2a")
+        widths[lossy] = _read_uint(headers[lossy], 26, 2, "little")
+        heights[lossy] = _read_uint(headers[lossy], 28, 2, "little")
+
+        # lossless webp, 14 bit dimensions packed after the 0x2F signature
+        lossless = rows & (headers[:, 15] == 0x4C) & (headers[:, 20] == 0x2F)
+        packed = _read_uint(headers[lossless], 21, 4, "little")
+        widths[lossless] = 1 + (packed & 0x3FFF)
+        heights[lossless] = 1 + ((packed >> 14) & 0x3FFF)
+
+        # extended webp, 24 bit dimensions in the VP8X chunk
+        extended = rows & (headers[:, 15] == 0x58)
+        widths[extended] = 1 + _read_uint(headers[extended], 24, 3, "little")
+        heights[extended] = 1 + _read_uint(headers[extended], 27, 3, "little")
+
+    return widths, heights
+
+
+def match_array(headers, matchers=image_matchers):
+    """
+    Matches every row of a 2D uint8 array of file headers at once,
+    and reads the fixed offset sizes of png, apng, gif, bmp, psd, webp, qoi
+    and dds.
+
+    Args:
+        headers: numpy uint8 array of shape (N, K), one header per row.
+        matchers: the type matchers to try, in order.
+
+    Returns:
+        Tuple of three int arrays of length N: the index of the matched type
+        in matchers (or -1 if no type matches), the widths and the heights.
+        Types without a fixed offset size get a width and height of 0.
+
+    Raises:
+        ImportError: if numpy is not installed.
+        ValueError: if headers is not a 2D uint8 array.
+    """
+    _require_numpy()
+
+    headers = np.asarray(headers)
+
+    if headers.ndim != 2 or headers.dtype != np.uint8:
+        raise ValueError("headers must be a 2D uint8 array")
+
+    kinds = np.full(headers.shape[0], -1, dtype=np.int16)
+
+    rows = np.arange(headers.shape[0])
+
+    for index, matcher in enumerate(matchers):
+
+        if not len(rows):
+            break
+
+        kinds[_match_signature(headers, rows, matcher)] = index
+
+        rows = np.flatnonzero(kinds == -1)
+
+    return (kinds,) + _get_sizes(headers, kinds, matchers)
@@ -0,0 +1,187 @@
+"""
+Budgets on the work of one call, bounding the time the parsers spend on
+hostile input, such as lengths and counts crafted to make them loop or
+allocate without end.
+
+    with Budget(max_iterations=100000, max_entries=100000, max_seconds=0.05):
+        info = imagetype.get_info(upload)
+
+The parsers charge their loop iterations, reads and allocated entries to
+the budget active in the current thread or task, and raise BudgetExceeded
+as soon as one runs out. Without an active budget they only check that
+there is none.
+"""
+
+import time
+from contextvars import ContextVar
+
+
+# the Budget charged by the calls of the current thread or task
+_active = ContextVar("imagetype_budget", default=None)
+
+# the (Budget, token) of every with the current thread or task is in,
+# innermost last, as a token can only be reset in the context it was set
+_entered = ContextVar("imagetype_budget_entered", default=())
+
+clock = time.perf_counter
+
+
+class BudgetExceeded(ValueError):
+    """
+    Raised when a call does more work than its Budget allows.
+
+    Attributes:
+        limit: the name of the exceeded limit, e.g. "max_iterations".
+        value: the work done when it was exceeded.
+        maximum: the value of the limit.
+    """
+
+    def __init__(self, limit, value, maximum):
+        shown = round(value, 4) if isinstance(value, float) else value
+
+        super(BudgetExceeded, self).__init__(
+            "{} of {} exceeds the budget of {}".format(limit[4:], shown, maximum)
+        )
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+
+
+class Budget(object):
+    """
+    Limits on the work of the calls made while it is active, as a context
+    manager. Entering it resets the counts and starts the clock, so one
+    Budget can be entered around every call, while entering it again inside
+    its own with keeps the counts and the clock. The counts are those of
+    one call, so a Budget can't be entered by two threads or tasks at once,
+    while the tasks a call starts share the Budget it is in. Limits left as
+    None are not enforced.
+
+    Args:
+        max_iterations: the most loop iterations of the parsers, e.g. the
+        segments of a jpeg, the chunks of a png or the boxes of a heic.
+        max_bytes: the most bytes read from the input.
+        max_entries: the most entries the parsers allocate for the counts
+        a file declares, e.g. the fields of a tiff directory, the images of
+        an ico or the samples of an stsz box.
+        max_seconds: the most wall time, checked at every iteration and read.
+    """
+
+    def __init__(
+        self, max_iterations=None, max_bytes=None, max_entries=None, max_seconds=None
+    ):
+        self.max_iterations = max_iterations
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_seconds = max_seconds
+
+        self.iterations = 0
+        self.bytes_read = 0
+        self.entries = 0
+
+        self._start = None
+
+        # how many withs it is in, over every thread and task
+        self._depth = 0
+
+    def __enter__(self):
+
+        entered = _entered.get()
+
+        # entering it again inside its own with keeps charging the same
+        # counts, so nested calls can't grant themselves a fresh allowance
+        if not any(budget is self for budget, _ in entered):
+
+            # the counts are those of one call, which another thread or task
+            # would share and reset
+            if self._depth:
+                raise RuntimeError(
+                    "a Budget can't be entered by two threads or tasks at once"
+                )
+
+            self.iterations = 0
+            self.bytes_read = 0
+            self.entries = 0
+
+            self._start = clock()
+
+        self._depth += 1
+
+        _entered.set(entered + ((self, _active.set(self)),))
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        entered = _entered.get()
+
+        _entered.set(entered[:-1])
+
+        self._depth -= 1
+
+        _active.reset(entered[-1][1])
+
+    @property
+    def elapsed(self):
+        """
+        The seconds since the budget was entered.
+        """
+        return 0.0 if self._start is None else clock() - self._start
+
+    def _check_time(self):
+
+        if self.max_seconds is not None:
+
+            elapsed = clock() - self._start
+
+            if elapsed > self.max_seconds:
+                raise BudgetExceeded("max_seconds", elapsed, self.max_seconds)
+
+    def step(self, count=1):
+        """
+        Charges loop iterations.
+
+        Raises:
+            BudgetExceeded: if the iterations or the time run out.
+        """
+        self.iterations += count
+
+        if self.max_iterations is not None and self.iterations > self.max_iterations:
+            raise BudgetExceeded("max_iterations", self.iterations, self.max_iterations)
+
+        self._check_time()
+
+    def read(self, length: int):
+        """
+        Charges bytes read from the input.
+
+        Raises:
+            BudgetExceeded: if the bytes or the time run out.
+        """
+        self.bytes_read += length
+
+        if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+            raise BudgetExceeded("max_bytes", self.bytes_read, self.max_bytes)
+
+        self._check_time()
+
+    def allocate(self, count: int):
+        """
+        Charges entries about to be allocated, before allocating them.
+
+        Raises:
+            BudgetExceeded: if the entries run out.
+        """
+        self.entries += count
+
+        if self.max_entries is not None and self.entries > self.max_entries:
+            raise BudgetExceeded("max_entries", self.entries, self.max_entries)
+
+
+def get_active():
+    """
+    Returns:
+        The Budget active in the current thread or task, or None.
+    """
+    return _active.get()
+
@@ -0,0 +1,317 @@
+"""
+Finds the images embedded at any offset of a large file, such as a disk
+image or a memory dump.
+"""
+
+import os
+
+from .budget import get_active
+from .FileTypes import IMAGE, Pcx, Svg, Tga
+from .FileTypes.signature import SignatureTable
+from .utils import _NUM_SIGNATURE_BYTES
+
+# text and weakly signed types would match all over arbitrary data
+CARVE_MATCHERS = tuple(
+    filetype for filetype in IMAGE if not isinstance(filetype, (Pcx, Svg, Tga))
+)
+
+
+def _rank(run: bytes, i: int):
+
+    # pairs with 0x00 or 0xFF bytes are everywhere in disk images,
+    # and the longer the run around the pair the fewer false hits
+    return (
+        2 * (run[i] in (0x00, 0xFF)) + (run[i + 1] in (0x00, 0xFF)),
+        -len(run),
+    )
+
+
+def _compile_pairs(matchers):
+    """
+    Picks a pair of bytes out of every signature, searching for which finds
+    all the places the signature could match.
+
+    Returns:
+        dict of each pair to a list of (offset of the pair in the run,
+        run, offset of the run in the file) to check where it is found.
+    """
+    pairs = {}
+
+    for filetype in matchers:
+        for signature in filetype.SIGNATURES:
+
+            choices = [
+                (i, run, offset)
+                for offset, run in signature._runs
+                for i in range(len(run) - 1)
+            ]
+
+            # signatures without 2 fixed bytes in a row can't be searched for
+            if not choices:
+                continue
+
+            entry = min(choices, key=lambda choice: _rank(choice[1], choice[0]))
+            entries = pairs.setdefault(entry[1][entry[0] : entry[0] + 2], [])
+
+            if entry not in entries:
+                entries.append(entry)
+
+    return pairs
+
+
+def _pair_searcher(pairs):
+    """
+    Returns:
+        Function taking a buffer and a range of it, returning the offsets in
+        the range where any of the pairs start. It looks up every pair of
+        bytes in a table with numpy when installed, and otherwise runs a
+        regular expression matching any of the pairs.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    if np is not None:
+
+        table = np.zeros(1 << 16, dtype=bool)
+
+        for pair in pairs:
+            table[pair[0] << 8 | pair[1]] = True
+
+        def search(data, start: int, end: int):
+
+            view = np.frombuffer(data, dtype=np.uint8)[start : end + 1]
+
+            keys = (view[:-1].astype(np.uint16) << 8) | view[1:]
+
+            return (np.flatnonzero(table[keys]) + start).tolist()
+
+        return search
+
+    import re
+
+    pattern = re.compile(b"|".join(re.escape(pair) for pair in pairs))
+
+    def search(data, start: int, end: int):
+
+        hits = []
+
+        for found in pattern.finditer(data, start, min(end + 1, len(data))):
+
+            i = found.start()
+
+            hits.append(i)
+
+            # the search goes on after the match, so a pair starting on its
+            # second byte would be skipped
+            if i + 1 < end and bytes(data[i + 1 : i + 3]) in pairs:
+                hits.append(i + 1)
+
+        return hits
+
+    return search
+
+
+def _charge(data):
+
+    # the searched chunks and the headers read count towards the bytes of
+    # the active budget, as the reads of get_bytes do
+    budget = get_active()
+
+    if budget is not None:
+        budget.read(len(data))
+
+    return data
+
+
+class _BufferSource(object):
+    def __init__(self, obj):
+        self.view = memoryview(obj).cast("B")
+        self.size = len(self.view)
+
+    def read(self, offset: int, length: int):
+        return _charge(self.view[offset : offset + length].tobytes())
+
+    def chunk(self, offset: int, length: int):
+        return _charge(self.view[offset : offset + length])
+
+    def close(self):
+        pass
+
+
+class _FileSource(object):
+    def __init__(self, file, owned: bool):
+        self.file = file
+        self.owned = owned
+
+        self.size = file.seek(0, os.SEEK_END)
+
+    def read(self, offset: int, length: int):
+        self.file.seek(offset)
+        return _charge(self.file.read(length))
+
+    chunk = read
+
+    def close(self):
+        if self.owned:
+            self.file.close()
+
+
+def _open_source(obj):
+
+    if isinstance(obj, (str, os.PathLike)):
+        return _FileSource(open(obj, "rb"), True)
+
+    # before file objects, as an mmap is both
+    try:
+        return _BufferSource(obj)
+    except TypeError:
+        pass
+
+    if hasattr(obj, "read") and hasattr(obj, "seek"):
+        return _FileSource(obj, False)
+
+    raise TypeError("Unsupported type as file input: %s" % type(obj))
+
+
+def carve(
+    obj,
+    matchers=CARVE_MATCHERS,
+    chunk_size=1 << 24,
+    max_length=1 << 28,
+    nested=False,
+):
+    """
+    Finds the images at any offset of a file. The file is searched a chunk
+    at a time for a pair of bytes of every signature at once, then each
+    place where a whole signature matches is checked with the header parser
+    of its type, and the end of the image is found by following its
+    structure, e.g. the jpeg EOI marker, the png IEND chunk, the gif trailer,
+    the ISO-BMFF boxes or the RIFF chunk of webp.
+
+    Not every type is found whole. psd, hdr, exr, xcf, qoi, dds and ktx2
+    have no structure telling where they end, so they are reported without
+    a length. dcm, dwg and jxr have neither that nor a size in their header,
+    so nothing tells them apart from data which happens to hold their
+    signature, and they are not reported. Neither are naked jxl codestreams,
+    whose two byte signature is found all over arbitrary data, while jxl
+    containers are. The length ends with the structure, e.g. the last box of
+    a jpx or the furthest data a tiff directory points to, so any padding
+    after it is left out.
+
+    Args:
+        obj: path to file, seekable file-like object, or any buffer such as
+        bytes, a memoryview or an mmap.
+        matchers: the types to look for. Signatures without two fixed bytes
+        in a row are skipped.
+        chunk_size: the number of bytes searched at once.
+        max_length: how far past its start the end of an image is looked for.
+        nested: whether to also report images inside another found image,
+        such as the thumbnail in the EXIF block of a jpeg.
+
+    Returns:
+        Generator of (offset, length, type, (width, height)) by offset,
+        where the length is None for types with no structure telling where
+        they end, and the size (0, 0) if it is not in the first 8192 bytes.
+        Such types are only reported when their size could be read.
+
+    Raises:
+        TypeError: if obj is not a supported type.
+        budget.BudgetExceeded: if the bytes searched and read exceed the
+        active budget.
+    """
+    source = _open_source(obj)
+
+    try:
+        yield from _carve(source, matchers, chunk_size, max_length, nested)
+    finally:
+        source.close()
+
+
+def _carve(source, matchers, chunk_size: int, max_length: int, nested: bool):
+
+    table = SignatureTable(matchers)
+
+    pairs = _compile_pairs(matchers)
+    search = _pair_searcher(pairs)
+
+    entries = [entry for found in pairs.values() for entry in found]
+
+    # the bytes around a pair needed to check the whole run it is in,
+    # and how far before a pair the file it belongs to can start
+    margin = max(max(i, len(run)) for i, run, _ in entries)
+    lookback = max(i + offset for i, _, offset in entries)
+
+    size = source.size
+
+    # the end of the last image found, before which nothing is reported
+    covered = 0
+
+    held = []
+
+    for chunk_start in range(0, size, chunk_size):
+
+        base = max(chunk_start - margin, 0)
+        data = source.chunk(base, chunk_start + chunk_size + margin - base)
+
+        candidates = set(held)
+
+        for i in search(data, chunk_start - base, chunk_start + chunk_size - base):
+            for j, run, offset in pairs[bytes(data[i : i + 2])]:
+
+                run_start = i - j
+
+                if run_start >= 0 and data[run_start : run_start + len(run)] == run:
+                    candidates.add(base + run_start - offset)
+
+        # the pairs of the next chunk can belong to files starting
+        # before it, which have to be reported in order with these
+        if chunk_start + chunk_size < size:
+            ready = chunk_start + chunk_size - lookback
+        else:
+            ready = size
+
+        held = []
+
+        for start in sorted(candidates):
+
+            if start >= ready:
+                held.append(start)
+                continue
+
+            if start < 0 or (start < covered and not nested):
+                continue
+
+            found = _check(source, table, start, min(size, start + max_length))
+
+            if found is not None:
+
+                if found[1] is not None:
+                    covered = max(covered, start + found[1])
+
+                yield found
+
+
+def _check(source, table, start: int, limit: int):
+
+    buf = bytearray(source.read(start, _NUM_SIGNATURE_BYTES))
+
+    matcher = table.match(buf)
+
+    if matcher is None:
+        return None
+
+    size = matcher._get_size(buf)
+
+    checked = matcher._find_end(source.read, start, limit)
+
+    if checked is None:
+        return (start, None, matcher, size) if size != (0, 0) else None
+
+    reason, end = checked
+
+    if reason is not None:
+        return None
+
+    return start, end - start, matcher, size
@@ -0,0 +1,232 @@
+"""
+Push based matching and sizing of files which arrive in chunks.
+"""
+
+from .FileTypes import IMAGE as image_matchers
+from .FileTypes import IMAGE_SIGNATURES
+from .FileTypes.signature import SignatureTable
+from .rangereader import _NUM_HEAD_BYTES
+
+
+class Detector(object):
+    """
+    Matches and sizes a file fed to it chunk by chunk, e.g. an upload
+    still arriving. The type is known as soon as the bytes so far rule
+    out every signature tried before the matching one, and the size as
+    soon as the chunks holding it arrived. Bytes no longer needed are
+    dropped as they arrive, so only the head of the file and the ranges
+    the sizer of the matched type still asks for are buffered.
+
+    Args:
+        matchers: the type matchers to try, in order.
+        head_size: how many bytes the types are matched and sized against
+        at most, the ranges further in are requested by the sizers.
+    """
+
+    def __init__(self, matchers=image_matchers, head_size=_NUM_HEAD_BYTES):
+
+        if matchers is image_matchers:
+            self._table = IMAGE_SIGNATURES
+        else:
+            self._table = SignatureTable(matchers)
+
+        self.head_size = head_size
+
+        # whether the type is known, filetype stays None if nothing matched
+        self.decided = False
+        self.filetype = None
+
+        # (width, height) once known
+        self.size = None
+
+        self.bytes_fed = 0
+
+        self._closed = False
+
+        # the start of the file, then the bytes from _offset on
+        self._head = bytearray()
+        self._buf = bytearray()
+        self._offset = 0
+
+        self._sizer = None
+        self._ranges = None
+
+    @property
+    def done(self):
+        """
+        Whether the type and the size are both known, or nothing matched.
+        """
+        return self.decided and (self.filetype is None or self.size is not None)
+
+    @property
+    def buffered(self):
+        """
+        How many bytes are held on to.
+        """
+        return len(self._head) + len(self._buf)
+
+    def feed(self, chunk):
+        """
+        Adds the next chunk of the file.
+
+        Args:
+            chunk: bytes-like object.
+
+        Returns:
+            False once the type and size are known, or nothing matched,
+            after which further chunks are ignored. Otherwise True.
+        """
+        if self._closed:
+            raise ValueError("feed called after close")
+
+        self.bytes_fed += len(chunk)
+
+        if self.done:
+            return False
+
+        if len(self._head) < self.head_size:
+
+            take = self.head_size - len(self._head)
+
+            self._head += chunk[:take]
+
+            chunk = chunk[take:]
+
+            self._offset = len(self._head)
+
+        self._keep(chunk)
+
+        self._advance()
+
+        return not self.done
+
+    def close(self):
+        """
+        Ends the file, deciding the type and size from what arrived.
+
+        Returns:
+            Tuple of the type instance and its (width, height) if a type
+            matches. Otherwise None. The size is (0, 0) when it could not
+            be read from the file.
+        """
+        self._closed = True
+
+        self._advance()
+
+        if self.filetype is None:
+            return None
+
+        return self.filetype, self.size
+
+    def _keep(self, chunk):
+
+        if self._ranges is not None:
+
+            end = self._offset + len(self._buf)
+
+            # drop what lies before every range the sizer asked for
+            skip = min(max(self._first_range() - end, 0), len(chunk))
+
+            if skip:
+                self._buf.clear()
+                self._offset = end + skip
+                chunk = chunk[skip:]
+
+        self._buf += chunk
+
+    def _first_range(self):
+        return min(offset for offset, length in self._ranges)
+
+    def _match(self):
+
+        final = self._closed or len(self._head) >= self.head_size
+
+        for signature, filetype in self._table.candidates(self._head):
+
+            if signature.match(self._head):
+                return True, filetype
+
+            # an earlier type could still match once more bytes arrive
+            if not final and signature.could_match(self._head):
+                return False, None
+
+        return True, None
+
+    def _advance(self):
+
+        if not self.decided:
+
+            if not self._head and not self._closed:
+                return
+
+            self.decided, self.filetype = self._match()
+
+        if self.filetype is None or self.size is not None:
+            return
+
+        # sizers expect the whole head, which is all of the file when shorter
+        if self._sizer is None:
+
+            if len(self._head) < self.head_size and not self._closed:
+                return
+
+            self._sizer = self.filetype._read_size(self._head)
+
+            self._send(None)
+
+        while self._ranges is not None:
+
+            results = [self._read(offset, length) for offset, length in self._ranges]
+
+            if None in results:
+                return
+
+            self._send(results)
+
+    def _read(self, offset: int, length: int):
+
+        end = offset + length
+
+        if end <= len(self._head):
+            return self._head[offset:end]
+
+        # wait for the rest of the range, unless the file ended
+        if end > self._offset + len(self._buf) and not self._closed:
+            return None
+
+        data = self._buf[max(offset - self._offset, 0) : end - self._offset]
+
+        # a range starting in the head, which is followed by the buffer
+        if offset < len(self._head):
+            if self._offset != len(self._head):
+                return self._head[offset:]
+
+            data = self._head[offset:] + data
+
+        # the bytes of a range behind what was kept are gone, which the
+        # forward moving sizers never ask for
+        elif offset < self._offset:
+            return b""
+
+        return bytes(data)
+
+    def _send(self, results):
+
+        try:
+            if results is None:
+                self._ranges = next(self._sizer)
+            else:
+                self._ranges = self._sizer.send(results)
+
+        except StopIteration as e:
+            self.size = e.value
+            self._ranges = None
+            self._buf.clear()
+            return
+
+        # the sizers move forward, so drop what lies before every range
+        drop = min(max(self._first_range() - self._offset, 0), len(self._buf))
+
+        if drop:
+            del self._buf[:drop]
+            self._offset += drop
@@ -0,0 +1,571 @@
+"""
+Rewrites ISO-BMFF files with their moov and meta boxes ahead of the media
+data, so players and probes can read them without fetching the end first.
+"""
+
+import os
+from bisect import bisect_right
+
+from .budget import get_active
+from .FileTypes import bytereader as br
+
+
+# boxes holding the chunk offset tables, from moov down to stbl
+_CONTAINERS = frozenset((b"moov", b"trak", b"mdia", b"minf", b"stbl"))
+
+# the top level boxes moved ahead of the first mdat
+_MOVED = frozenset((b"moov", b"meta"))
+
+_UINT32_MAX = (1 << 32) - 1
+
+# bytes copied at a time when the kernel can't copy between the files
+_COPY_BYTES = 1 << 20
+
+
+class _Box(object):
+    """
+    A box read into memory, with the boxes inside it when it holds the
+    chunk offsets or item locations, otherwise with its body as is.
+    """
+
+    __slots__ = ("box_type", "prefix", "children", "body")
+
+    def __init__(self, box_type: bytes, prefix=b"", children=None, body=b""):
+        self.box_type = box_type
+        self.prefix = prefix
+        self.children = children
+        self.body = body
+
+    def to_bytes(self):
+
+        if self.children is None:
+            payload = self.body
+        else:
+            payload = self.prefix + b"".join(box.to_bytes() for box in self.children)
+
+        size = 8 + len(payload)
+
+        if size > _UINT32_MAX:
+            return (
+                b"\x00\x00\x00\x01"
+                + self.box_type
+                + (size + 8).to_bytes(8, "big")
+                + payload
+            )
+
+        return size.to_bytes(4, "big") + self.box_type + payload
+
+
+def _iter_headers(read, start: int, end: int):
+    """
+    Reads the box headers between start and end.
+
+    Returns:
+        Generator of (box type, offset of the box, offset of the body,
+        offset of the end).
+
+    Raises:
+        ValueError: if a box header is truncated or its size is invalid.
+    """
+    offset = start
+
+    budget = get_active()
+
+    while offset < end:
+
+        if budget is not None:
+            budget.step()
+
+        header = read(offset, 16)
+
+        if len(header) < 8 or end - offset < 8:
+            raise ValueError("truncated box header at {}".format(offset))
+
+        size = br.read_int(header, 4)
+        box_type = bytes(header[4:8])
+        header_size = 8
+
+        # a size of 1 means a 64 bit size follows the type
+        if size == 1:
+
+            if len(header) < 16:
+                raise ValueError("truncated box header at {}".format(offset))
+
+            size = br.read_int(header, 8, 8)
+            header_size = 16
+
+        # a size of 0 means the box extends to the end of its parent
+        elif size == 0:
+            size = end - offset
+
+        if size < header_size or offset + size > end:
+            raise ValueError("invalid size of the box at {}".format(offset))
+
+        yield box_type, offset, offset + header_size, offset + size
+
+        offset += size
+
+
+def _parse(data: bytes, start: int, end: int):
+
+    def read(offset, length):
+        return data[offset : offset + length]
+
+    boxes = []
+
+    for box_type, _, body, box_end in _iter_headers(read, start, end):
+
+        if box_type in _CONTAINERS:
+            boxes.append(_Box(box_type, children=_parse(data, body, box_end)))
+
+        # the top level meta of heif is a full box holding the iloc box
+        elif box_type == b"meta" and start == 0:
+            boxes.append(
+                _Box(box_type, data[body : body + 4], _parse(data, body + 4, box_end))
+            )
+
+        else:
+            boxes.append(_Box(box_type, body=data[body:box_end]))
+
+    return boxes
+
+
+def _walk(boxes):
+
+    stack = list(boxes)
+
+    while stack:
+
+        box = stack.pop()
+
+        yield box
+
+        if box.children is not None:
+            stack.extend(box.children)
+
+
+def _patch_chunk_offsets(box: _Box, box_type: bytes, body: bytes, move):
+    """
+    Sets the body of an stco or co64 box to its original entries moved,
+    turning an stco box into a co64 box when an entry no longer fits.
+    """
+    # | version | flags  | entry count | chunk offsets
+    # | 1 byte  | 3 byte | 4 byte      | 4 byte each (8 in co64)
+    width = 8 if box_type == b"co64" else 4
+
+    if len(body) < 8:
+        raise ValueError("truncated chunk offset box")
+
+    count = br.read_int(body, 4, 4)
+
+    end = 8 + count * width
+
+    if len(body) < end:
+        raise ValueError("truncated chunk offset box")
+
+    budget = get_active()
+
+    if budget is not None:
+        budget.allocate(count)
+
+    offsets = [move(br.read_int(body, width, i)) for i in range(8, end, width)]
+
+    if width == 4 and offsets and max(offsets) > _UINT32_MAX:
+        width = 8
+
+    box.box_type = b"co64" if width == 8 else b"stco"
+    box.body = (
+        body[:8]
+        + b"".join(offset.to_bytes(width, "big") for offset in offsets)
+        + body[end:]
+    )
+
+
+def _patch_item_locations(box: _Box, box_type: bytes, body: bytes, move):
+    """
+    Sets the body of an iloc box to its original item locations moved,
+    for the items whose data is at an offset of the file.
+    """
+    body = bytearray(body)
+
+    # | version | flags  | offset, length size | base offset, index size
+    # | 1 byte  | 3 byte | 4 bit each          | 4 bit each
+    # | item count
+    # | 2 byte (4 in version 2)
+    if len(body) < 8:
+        raise ValueError("truncated iloc box")
+
+    version = body[0]
+
+    offset_size = body[4] >> 4
+    length_size = body[4] & 0x0F
+    base_offset_size = body[5] >> 4
+    index_size = body[5] & 0x0F if version in (1, 2) else 0
+
+    id_size = 4 if version == 2 else 2
+
+    count = br.read_int(body, id_size, 6)
+
+    i = 6 + id_size
+
+    budget = get_active()
+
+    for _ in range(count):
+
+        if budget is not None:
+            budget.step()
+
+        # | item id | construction method | data reference | base offset
+        # | 2 (4)   | 2 byte (version 1+) | 2 byte         | base offset size
+        i += id_size
+
+        method = 0
+
+        if version in (1, 2):
+            method = br.read_int(body, 2, i) & 0x0F
+            i += 2
+
+        reference = br.read_int(body, 2, i)
+
+        base_offset_at = i + 2
+        base_offset = br.read_int(body, base_offset_size, base_offset_at)
+
+        i = base_offset_at + base_offset_size
+
+        extent_count = br.read_int(body, 2, i)
+
+        i += 2
+
+        if budget is not None:
+            budget.allocate(extent_count)
+
+        # | extent index          | extent offset | extent length
+        # | index size (version 1+) | offset size | length size
+        extents = []
+
+        for _ in range(extent_count):
+            i += index_size
+            extents.append(i)
+            i += offset_size + length_size
+
+        if i > len(body):
+            raise ValueError("truncated iloc box")
+
+        # the data is in the file itself only with method 0 and reference 0,
+        # the other methods point into idat or other items
+        if method != 0 or reference != 0:
+            continue
+
+        offsets = [br.read_int(body, offset_size, at) for at in extents]
+
+        # the extents end up where the data they point at moves to
+        targets = [move(base_offset + offset) for offset in offsets]
+
+        fields = [(at, offset_size, target) for at, target in zip(extents, targets)]
+
+        if base_offset_size:
+
+            shifts = {target - offset for target, offset in zip(targets, offsets)}
+
+            # extents in one box all move along with the base offset, while
+            # extents spread over boxes which move apart get the offsets of
+            # the file from a base offset of 0 (the extents of an offset size
+            # of 0 are all at the base offset, so always move together)
+            if len(shifts) == 1:
+                fields = [(base_offset_at, base_offset_size, shifts.pop())]
+
+            elif shifts:
+                fields.append((base_offset_at, base_offset_size, 0))
+
+        elif not offset_size:
+            fields = []
+
+        for at, size, value in fields:
+
+            if not 0 <= value < 1 << (8 * size):
+                raise ValueError("moved item location does not fit its field")
+
+            body[at : at + size] = value.to_bytes(size, "big")
+
+    box.body = bytes(body)
+
+
+def _copy(source: int, destination: int, offset: int, length: int):
+    """
+    Appends length bytes of the source file descriptor from offset to the
+    destination, within the kernel when it can.
+    """
+    end = offset + length
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            while offset < end:
+
+                copied = os.copy_file_range(source, destination, end - offset, offset)
+
+                if copied == 0:
+                    raise ValueError("file ended while copying")
+
+                offset += copied
+
+            return
+
+        # other file systems, or a kernel without it
+        except OSError:
+            pass
+
+    if hasattr(os, "sendfile"):
+        try:
+            while offset < end:
+
+                copied = os.sendfile(destination, source, offset, end - offset)
+
+                if copied == 0:
+                    raise ValueError("file ended while copying")
+
+                offset += copied
+
+            return
+
+        except OSError:
+            pass
+
+    while offset < end:
+
+        data = os.pread(source, min(_COPY_BYTES, end - offset), offset)
+
+        if not data:
+            raise ValueError("file ended while copying")
+
+        os.write(destination, data)
+
+        offset += len(data)
+
+
+# the patch of each box type holding offsets into the file
+_PATCHES = {
+    b"stco": _patch_chunk_offsets,
+    b"co64": _patch_chunk_offsets,
+    b"iloc": _patch_item_locations,
+}
+
+
+def _plan(source: int):
+    """
+    Reads the top level boxes and the ones to move, and moves the offsets
+    inside them to where the data will be.
+
+    Returns:
+        list of (box type, start, end) of the top level boxes, the order to
+        write them in, and a dict of the index of every moov and meta box
+        to its new bytes. None if no box has to move.
+
+    Raises:
+        ValueError: if the boxes are invalid or the file is fragmented.
+    """
+
+    def read(offset, length):
+        return os.pread(source, length, offset)
+
+    size = os.fstat(source).st_size
+
+    boxes = [
+        (box_type, start, end)
+        for box_type, start, _, end in _iter_headers(read, 0, size)
+    ]
+
+    types = [box_type for box_type, _, _ in boxes]
+
+    if b"mdat" not in types:
+        return None
+
+    first_mdat = types.index(b"mdat")
+
+    moved = [i for i in range(first_mdat, len(boxes)) if types[i] in _MOVED]
+
+    if not moved:
+        return None
+
+    # the moov and meta boxes ahead of the media data stay where they are,
+    # but still point at the data moving behind the moved boxes
+    rewritten = [i for i in range(len(boxes)) if types[i] in _MOVED]
+
+    # the data of fragments is found relative to their moof boxes,
+    # or at offsets outside of any chunk offset table
+    if b"moof" in types:
+        raise ValueError("fragmented files can't be rewritten")
+
+    order = list(range(first_mdat)) + moved
+    order += [i for i in range(first_mdat, len(boxes)) if i not in moved]
+
+    trees = {}
+
+    # the boxes holding offsets, with their original type and body
+    patched = []
+
+    for i in rewritten:
+
+        _, start, end = boxes[i]
+
+        data = read(start, end - start)
+
+        budget = get_active()
+
+        if budget is not None:
+            budget.read(len(data))
+
+        trees[i] = _parse(data, 0, len(data))[0]
+
+        patched += [
+            (box, box.box_type, box.body)
+            for box in _walk([trees[i]])
+            if box.box_type in _PATCHES
+        ]
+
+    old_starts = [start for _, start, _ in boxes]
+
+    sizes = [end - start for _, start, end in boxes]
+
+    # growing chunk offset tables grow the moved boxes, which moves the
+    # data further, until the sizes settle
+    while True:
+
+        starts = [0] * len(boxes)
+
+        position = 0
+
+        for i in order:
+            starts[i] = position
+            position += sizes[i]
+
+        def move(offset):
+
+            i = bisect_right(old_starts, offset) - 1
+
+            # offsets outside of the file are left as they are
+            if i < 0 or offset >= boxes[i][2]:
+                return offset
+
+            return starts[i] + offset - old_starts[i]
+
+        for box, box_type, body in patched:
+            _PATCHES[box_type](box, box_type, body, move)
+
+        data = {i: trees[i].to_bytes() for i in rewritten}
+
+        if all(len(data[i]) == sizes[i] for i in rewritten):
+            return boxes, order, data
+
+        for i in rewritten:
+            sizes[i] = len(data[i])
+
+
+def faststart(source, destination=None):
+    """
+    Rewrites an ISO-BMFF file, such as an mp4, mov or heif file, with its
+    moov and meta boxes moved ahead of the first mdat box, patching every
+    stco and co64 chunk offset and iloc item location to the moved data.
+    Chunk offset tables are turned into co64 boxes when the offsets grow
+    past 32 bits. The boxes are read into memory, while the media data is
+    copied a range at a time within the kernel with os.copy_file_range or
+    os.sendfile when they are available, so any size of file is rewritten
+    with as much memory as its metadata.
+
+    Args:
+        source: path to the file.
+        destination: path to write the rewritten file to. By default, or
+        when it is the source itself, the source is replaced with its mode
+        once the rewritten file is complete.
+
+    Returns:
+        True if the file was rewritten, False if no box had to move, in
+        which case nothing is written.
+
+    Raises:
+        ValueError: if the boxes of the file are invalid, the file is
+        fragmented, or a moved item location doesn't fit its field.
+    """
+    with open(source, "rb") as file:
+
+        plan = _plan(file.fileno())
+
+        if plan is None:
+            return False
+
+        boxes, order, data = plan
+
+        # writing over the file being read would truncate it before it is
+        # copied, so it is replaced as if no destination was given
+        if (
+            destination is not None
+            and os.path.exists(destination)
+            and os.path.samefile(source, destination)
+        ):
+            destination = None
+
+        if destination is None:
+            import tempfile
+
+            directory = os.path.dirname(os.path.abspath(source))
+            handle, path = tempfile.mkstemp(dir=directory, suffix=".faststart")
+            os.close(handle)
+        else:
+            path = destination
+
+        try:
+            with open(path, "wb") as output:
+
+                # mkstemp creates the file for its owner only, while the
+                # rewritten file keeps the permissions of the source
+                if destination is None:
+                    os.fchmod(output.fileno(), os.fstat(file.fileno()).st_mode)
+
+                _write(file.fileno(), output, boxes, order, data)
+
+            if destination is None:
+                os.replace(path, source)
+
+        except BaseException:
+
+            if destination is None:
+                os.remove(path)
+
+            raise
+
+    return True
+
+
+def _write(source: int, output, boxes, order, data):
+
+    # the boxes which are copied as they are, coalesced into ranges
+    start = end = None
+
+    for i in order:
+
+        if i in data:
+
+            if start is not None:
+                _flush(source, output, start, end)
+                start = None
+
+            output.write(data[i])
+            continue
+
+        if start is not None and boxes[i][1] == end:
+            end = boxes[i][2]
+            continue
+
+        if start is not None:
+            _flush(source, output, start, end)
+
+        start, end = boxes[i][1], boxes[i][2]
+
+    if start is not None:
+        _flush(source, output, start, end)
+
+
+def _flush(source: int, output, start: int, end: int):
+
+    output.flush()
+
+    _copy(source, output.fileno(), start, end - start)
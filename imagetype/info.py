@@ -0,0 +1,254 @@
+"""
+Compact records of detection results, for keeping many of them around.
+"""
+
+import struct
+
+
+# bits of ImageInfo.flags, set when the header tells they hold
+FLAG_ALPHA = 1
+FLAG_INTERLACED = 2
+FLAG_ICC = 4
+FLAG_ANIMATED = 8
+
+
+class ImageInfo(object):
+    """
+    Immutable record of the type and size of one file. The mime and
+    extension strings are shared with the type, so a record only holds
+    six references. get_info, scan.scan and scan_archive return them,
+    while identify, read_size and Detector keep returning the type with
+    its result, which from_probe and from_size turn into a record.
+
+    Records pickle as their class and a tuple of their fields, which
+    costs more per record than a (type, (width, height)) tuple, as every
+    object pickled by reduction carries its class and a memo entry. To
+    ship many records between processes, pack them into an
+    ImageInfoArray, which pickles as one bytes object.
+
+    Attributes:
+        mime: the MIME type.
+        extension: the extension of the type.
+        width, height: the size, (0, 0) when it is unknown.
+        frames: the number of frames or images when the header tells,
+        otherwise None.
+        flags: bitwise or of the FLAG_ constants.
+    """
+
+    __slots__ = ("mime", "extension", "width", "height", "frames", "flags")
+
+    def __init__(self, mime, extension, width=0, height=0, frames=None, flags=0):
+        set_field = object.__setattr__
+        set_field(self, "mime", mime)
+        set_field(self, "extension", extension)
+        set_field(self, "width", width)
+        set_field(self, "height", height)
+        set_field(self, "frames", frames)
+        set_field(self, "flags", flags)
+
+    @classmethod
+    def from_size(cls, filetype, size, frames=None, flags=0):
+        """
+        Makes the record of a type instance and its (width, height),
+        as returned by rangereader.read_size and detector.Detector.
+        """
+        return cls(filetype.mime, filetype.extension, size[0], size[1], frames, flags)
+
+    @classmethod
+    def from_probe(cls, filetype, result, frames=None, animated=False):
+        """
+        Makes the record of a type instance and its ProbeResult,
+        as returned by identify.
+        """
+        flags = 0
+
+        if result.has_alpha:
+            flags |= FLAG_ALPHA
+
+        if result.interlaced:
+            flags |= FLAG_INTERLACED
+
+        if result.has_icc:
+            flags |= FLAG_ICC
+
+        if animated:
+            flags |= FLAG_ANIMATED
+
+        return cls(
+            filetype.mime,
+            filetype.extension,
+            result.width,
+            result.height,
+            frames,
+            flags,
+        )
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    def _fields(self):
+        return (
+            self.mime,
+            self.extension,
+            self.width,
+            self.height,
+            self.frames,
+            self.flags,
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ImageInfo is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("ImageInfo is immutable")
+
+    def __reduce__(self):
+        return (ImageInfo, self._fields())
+
+    def __eq__(self, other):
+
+        if not isinstance(other, ImageInfo):
+            return NotImplemented
+
+        return self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash(self._fields())
+
+    def __repr__(self):
+        fields = ", ".join(
+            "{}: {}".format(name, getattr(self, name)) for name in self.__slots__
+        )
+        return "<{} {}>".format(self.__class__.__name__, fields)
+
+
+class ImageInfoArray(object):
+    """
+    Array of ImageInfo records packed into a single bytearray, 15 bytes a
+    record. Each record holds the index of its (mime, extension) pair in a
+    table shared by the whole array, so the strings are stored once.
+    Records are unpacked into ImageInfo objects when indexed.
+
+    Args:
+        records: optional iterable of ImageInfo to start with.
+    """
+
+    # | type index | width  | height | frames, 0 if unknown | flags
+    # | 2 byte     | 4 byte | 4 byte | 4 byte               | 1 byte
+    RECORD = struct.Struct("<HIIIB")
+
+    def __init__(self, records=()):
+
+        self._data = bytearray()
+
+        # (mime, extension) -> index, and the pairs by index
+        self._type_indexes = {}
+        self._types = []
+
+        self.extend(records)
+
+    def _get_type_index(self, mime, extension):
+
+        key = (mime, extension)
+
+        index = self._type_indexes.get(key)
+
+        if index is None:
+            index = self._type_indexes[key] = len(self._types)
+            self._types.append(key)
+
+        return index
+
+    def append(self, info: ImageInfo):
+        """
+        Packs a record at the end of the array.
+
+        Raises:
+            struct.error: if a field does not fit its size, e.g. a width
+            past 32 bits.
+        """
+        self._data += self.RECORD.pack(
+            self._get_type_index(info.mime, info.extension),
+            info.width,
+            info.height,
+            info.frames or 0,
+            info.flags,
+        )
+
+    def extend(self, records):
+        for info in records:
+            self.append(info)
+
+    def append_batch(self, kinds, widths, heights, matchers):
+        """
+        Packs the output of batch.match_array, skipping the rows no type
+        matched.
+
+        Args:
+            kinds, widths, heights: the arrays match_array returned.
+            matchers: the matchers given to match_array.
+        """
+        indexes = [
+            self._get_type_index(matcher.mime, matcher.extension)
+            for matcher in matchers
+        ]
+
+        pack = self.RECORD.pack
+
+        self._data += b"".join(
+            pack(indexes[kind], width, height, 0, 0)
+            for kind, width, height in zip(
+                kinds.tolist(), widths.tolist(), heights.tolist()
+            )
+            if kind >= 0
+        )
+
+    def __len__(self):
+        return len(self._data) // self.RECORD.size
+
+    def __getitem__(self, index: int):
+
+        count = len(self)
+
+        if index < 0:
+            index += count
+
+        if not 0 <= index < count:
+            raise IndexError("ImageInfoArray index out of range")
+
+        kind, width, height, frames, flags = self.RECORD.unpack_from(
+            self._data, index * self.RECORD.size
+        )
+
+        mime, extension = self._types[kind]
+
+        return ImageInfo(mime, extension, width, height, frames or None, flags)
+
+    def __iter__(self):
+
+        types = self._types
+
+        for kind, width, height, frames, flags in self.RECORD.iter_unpack(self._data):
+            mime, extension = types[kind]
+            yield ImageInfo(mime, extension, width, height, frames or None, flags)
+
+    @property
+    def nbytes(self):
+        """
+        The bytes taken by the packed records.
+        """
+        return len(self._data)
+
+    def __reduce__(self):
+        return (_rebuild_array, (bytes(self._data), self._types))
+
+
+def _rebuild_array(data, types):
+
+    array = ImageInfoArray()
+    array._data = bytearray(data)
+    array._types = list(types)
+    array._type_indexes = {key: index for index, key in enumerate(array._types)}
+
+    return array
@@ -0,0 +1,185 @@
+"""
+Opt-in counters and timings of the matching hot path.
+
+Instrumentation is off by default, in which case the hooks in match, utils
+and FileTypes only check that no Stats object is active. While it is on,
+every signature test, read and size lookup is recorded into the active Stats:
+
+    with instrument.profile() as stats:
+        for path in paths:
+            imagetype.image_match(path)
+
+    print(stats.snapshot())
+"""
+
+import time
+
+
+# the Stats being recorded into, None while instrumentation is off
+_active = None
+
+clock = time.perf_counter_ns
+
+
+class Histogram(object):
+    """
+    Latency histogram with power of two nanosecond buckets.
+    """
+
+    __slots__ = ("count", "total", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.buckets = {}
+
+    def add(self, nanoseconds: int):
+
+        self.count += 1
+        self.total += nanoseconds
+
+        # bucket n holds the latencies below 2 ** n nanoseconds
+        bucket = nanoseconds.bit_length()
+
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "total_ns": self.total,
+            "buckets": {1 << n: self.buckets[n] for n in sorted(self.buckets)},
+        }
+
+
+class Stats(object):
+    """
+    Counters and latency histograms recorded while instrumentation is on.
+    Counts are keyed by the FileType class name, so every instance of a
+    type adds to the same counters.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.hits = {}
+        self.rejections = {}
+        self.bytes_read = {}
+        self.latencies = {}
+
+    def record_match(self, filetype, hit: bool):
+        """
+        Records one signature test of a type, and whether it matched.
+        """
+        name = type(filetype).__name__
+
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+        if hit:
+            self.hits[name] = self.hits.get(name, 0) + 1
+        else:
+            self.rejections[name] = self.rejections.get(name, 0) + 1
+
+    def record_bytes(self, entry_point: str, length: int):
+        self.bytes_read[entry_point] = self.bytes_read.get(entry_point, 0) + length
+
+    def record_time(self, name: str, start: int):
+        """
+        Records the time elapsed since start, a value returned by clock().
+        """
+        histogram = self.latencies.get(name)
+
+        if histogram is None:
+            histogram = self.latencies[name] = Histogram()
+
+        histogram.add(clock() - start)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict of plain counts, safe to serialize or export, with the
+            calls, hits and rejections of each type, the bytes read by each
+            entry point and the latency histogram of each timed function.
+        """
+        return {
+            "calls": dict(self.calls),
+            "hits": dict(self.hits),
+            "rejections": dict(self.rejections),
+            "bytes_read": dict(self.bytes_read),
+            "latencies": {
+                name: histogram.snapshot()
+                for name, histogram in self.latencies.items()
+            },
+        }
+
+
+def enable():
+    """
+    Turns instrumentation on, keeping the active Stats if there is one.
+
+    Returns:
+        The active Stats.
+    """
+    global _active
+
+    if _active is None:
+        _active = Stats()
+
+    return _active
+
+
+def disable():
+    """
+    Turns instrumentation off.
+
+    Returns:
+        The Stats recorded so far, or None if instrumentation was off.
+    """
+    global _active
+
+    stats, _active = _active, None
+
+    return stats
+
+
+def reset():
+    """
+    Clears the recorded counters if instrumentation is on.
+    """
+    global _active
+
+    if _active is not None:
+        _active = Stats()
+
+
+def snapshot():
+    """
+    Returns:
+        The snapshot of the active Stats, or None if instrumentation is off.
+    """
+    stats = _active
+
+    return None if stats is None else stats.snapshot()
+
+
+class _Profile(object):
+
+    # a class rather than contextlib.contextmanager, which is slow to import
+
+    def __enter__(self):
+        global _active
+
+        self.previous, _active = _active, Stats()
+
+        return _active
+
+    def __exit__(self, *exc_info):
+        global _active
+
+        _active = self.previous
+
+
+def profile():
+    """
+    Context manager recording into a fresh Stats, which is returned by enter.
+    Whatever was active before is restored on exit.
+    """
+    return _Profile()
@@ -0,0 +1,110 @@
+"""
+Limits on the declared dimensions of images, refusing decompression bombs
+from their headers before any pixel data is read.
+"""
+
+
+class DecompressionBombError(ValueError):
+    """
+    Raised when an image declares more than a Limits object allows.
+
+    Attributes:
+        limit: the name of the exceeded limit, e.g. "max_width".
+        value: the declared value.
+        maximum: the value of the limit.
+    """
+
+    def __init__(self, limit, value, maximum):
+        shown = round(value, 2) if isinstance(value, float) else value
+
+        super(DecompressionBombError, self).__init__(
+            "{} of {} exceeds the limit of {}".format(limit[4:], shown, maximum)
+        )
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+
+
+class Limits(object):
+    """
+    Policy on the dimensions an image may declare. Limits left as None
+    are not enforced.
+
+    Args:
+        max_width: the largest width of any image in the file.
+        max_height: the largest height of any image in the file.
+        max_megapixels: the most pixels of any image in the file, in millions.
+        max_frames: the most frames or images in one file.
+        max_pixels_per_byte: the most pixels of all images in the file per
+        byte of the file, which catches small files declaring huge images.
+    """
+
+    def __init__(
+        self,
+        max_width=None,
+        max_height=None,
+        max_megapixels=None,
+        max_frames=None,
+        max_pixels_per_byte=None,
+    ):
+        self.max_width = max_width
+        self.max_height = max_height
+        self.max_megapixels = max_megapixels
+        self.max_frames = max_frames
+        self.max_pixels_per_byte = max_pixels_per_byte
+
+    def _check(self, limit, value):
+
+        maximum = getattr(self, limit)
+
+        if maximum is not None and value > maximum:
+            raise DecompressionBombError(limit, value, maximum)
+
+    def check(self, sizes, frames=None, file_size=None):
+        """
+        Checks declared dimensions against the limits.
+
+        Args:
+            sizes: list of the (width, height) of every image in the file.
+            frames: the number of frames, if it is not the number of sizes.
+            file_size: the length of the file in bytes, if known.
+
+        Raises:
+            DecompressionBombError: if a limit is exceeded.
+        """
+        for width, height in sizes:
+            self._check("max_width", width)
+            self._check("max_height", height)
+            self._check("max_megapixels", width * height / 1e6)
+
+        if frames is None:
+            frames = len(sizes)
+
+        self._check("max_frames", frames)
+
+        if file_size:
+
+            pixels = sum(width * height for width, height in sizes)
+
+            # animation frames share the size of the canvas
+            if sizes and frames > len(sizes):
+                pixels = max(width * height for width, height in sizes) * frames
+
+            self._check("max_pixels_per_byte", pixels / file_size)
+
+    def enforce(self, filetype, buf, file_size=None):
+        """
+        Reads every size and the frame count the header of a file declares,
+        and checks them against the limits.
+
+        Args:
+            filetype: the type instance the buffer matches.
+            buf: bytearray holding the start of the file.
+            file_size: the length of the file in bytes, if known.
+
+        Raises:
+            DecompressionBombError: if a limit is exceeded.
+        """
+        sizes = [size for size in filetype._get_images(buf) if size != (0, 0)]
+
+        self.check(sizes, filetype._get_frames(buf), file_size)
@@ -1,14 +1,24 @@
-from .utils import get_bytes
+from . import instrument
+from .utils import get_bytes, get_file_size, can_reread, _MAX_PROBE_BYTES
 from .FileTypes import IMAGE as image_matchers
+from .FileTypes import IMAGE_REGISTRY, IMAGE_SIGNATURES
+from .FileTypes.registry import Registry
+from .FileTypes.base import FileType
+from .info import ImageInfo
 
 
-def match(obj, matchers):
+def match(obj, matchers, hint=None):
     """
     Matches the given input against the available
     file type matchers.
 
     Args:
         obj: path to file, bytes or bytearray.
+        hint: optional file name, extension or MIME type of the input,
+        whose type is tried first, along with the earlier types which
+        could match the same buffers. A wrong hint only costs one check.
+        It is skipped for FileTypes.IMAGE, whose compiled signature table
+        is faster than checking the hinted type.
 
     Returns:
         Type instance if type matches. Otherwise None.
@@ -18,6 +28,113 @@ def match(obj, matchers):
     """
     buf = get_bytes(obj)
 
+    if instrument._active is not None:
+        instrument._active.record_bytes("match", len(buf))
+
+    return _match_hint(buf, matchers, hint)
+
+
+# registries of the other matcher sets hints were given for
+_registries = {}
+
+
+def _get_registry(matchers):
+
+    if matchers is image_matchers:
+        return IMAGE_REGISTRY
+
+    key = tuple(matchers)
+
+    registry = _registries.get(key)
+
+    if registry is None:
+
+        # matcher sets which keep changing, like adaptive ones, are only
+        # cached while they are few
+        if len(_registries) >= 64:
+            _registries.clear()
+
+        registry = _registries[key] = Registry(key)
+
+    return registry
+
+
+def get_type(mime=None, extension=None, matchers=image_matchers):
+    """
+    Looks up a type by its MIME type or extension.
+
+    Args:
+        mime: MIME type, e.g. "image/png".
+        extension: extension, with or without the leading dot.
+        matchers: the type matchers to look in.
+
+    Returns:
+        Type instance, or None if no type has the MIME type or extension.
+    """
+    registry = _get_registry(matchers)
+
+    if mime is not None:
+        return registry.by_mime(mime)
+
+    if extension is not None:
+        return registry.by_extension(extension)
+
+    return None
+
+
+def _match_hint(buf: bytearray, matchers, hint):
+
+    # the table of the image types narrows them down by the first byte,
+    # which is faster than checking the hinted type and its guards, and
+    # traced matches try every type so the counts stay comparable
+    if (
+        hint is not None
+        and matchers is not image_matchers
+        and instrument._active is None
+    ):
+
+        matcher = _get_registry(matchers).match(buf, hint)
+
+        if matcher is not None:
+            return matcher
+
+    return _match(buf, matchers)
+
+
+def _traced_match(buf: bytearray, matchers, stats):
+
+    start = instrument.clock()
+
+    if matchers is image_matchers:
+        candidates = IMAGE_SIGNATURES.candidates(buf)
+    else:
+        candidates = [(matcher, matcher) for matcher in matchers]
+
+    for test, matcher in candidates:
+
+        hit = test.match(buf)
+
+        stats.record_match(matcher, hit)
+
+        if hit:
+            break
+    else:
+        matcher = None
+
+    stats.record_time("match", start)
+
+    return matcher
+
+
+def _match(buf: bytearray, matchers):
+
+    if instrument._active is not None:
+        return _traced_match(buf, matchers, instrument._active)
+
+    # the image types have their signatures compiled into a single table
+    if matchers is image_matchers:
+        return IMAGE_SIGNATURES.match(buf)
+
     for matcher in matchers:
         if matcher.match(buf):
             return matcher
@@ -40,3 +157,110 @@ def image_match(obj):
         TypeError: if obj is not a supported type.
     """
     return match(obj, image_matchers)
+
+
+def identify(
+    obj, matchers=image_matchers, max_read=_MAX_PROBE_BYTES, limits=None, hint=None
+):
+    """
+    Matches, sizes and probes the given input in one pass over one buffer.
+    The signature is only checked once, and when the header does not fit
+    in the first read the matched type is probed again with more bytes.
+
+    Args:
+        obj: path to file, bytes or bytearray.
+        matchers: the type matchers to try, in order.
+        max_read: the most bytes to read while looking for the header.
+        limits: optional limits.Limits every image the header declares is
+        checked against, before the caller gets to decode anything.
+        hint: optional file name, extension or MIME type, see match.
+
+    Returns:
+        Tuple of the type instance and its ProbeResult if a type matches.
+        Otherwise None.
+
+    Raises:
+        TypeError: if obj is not a supported type.
+        DecompressionBombError: if the header declares more than limits allow.
+    """
+    identified = _identify(obj, matchers, max_read, limits, hint)
+
+    if identified is None:
+        return None
+
+    return identified[:2]
+
+
+def get_info(
+    obj, matchers=image_matchers, max_read=_MAX_PROBE_BYTES, limits=None, hint=None
+):
+    """
+    Identifies the given input like identify, returning a compact record.
+
+    Args:
+        obj: path to file, bytes or bytearray.
+        matchers, max_read, limits, hint: see identify.
+
+    Returns:
+        info.ImageInfo if a type matches. Otherwise None.
+
+    Raises:
+        TypeError: if obj is not a supported type.
+        DecompressionBombError: if the header declares more than limits allow.
+    """
+    identified = _identify(obj, matchers, max_read, limits, hint)
+
+    if identified is None:
+        return None
+
+    return _get_info(*identified)
+
+
+def _get_info(matcher, result, buf: bytearray):
+
+    return ImageInfo.from_probe(
+        matcher, result, matcher._get_frames(buf), matcher._is_animated(buf)
+    )
+
+
+def _identify(obj, matchers, max_read: int, limits, hint):
+
+    buf = get_bytes(obj)
+
+    if instrument._active is not None:
+        instrument._active.record_bytes("identify", len(buf))
+
+    matcher = _match_hint(buf, matchers, hint)
+
+    if matcher is None:
+        return None
+
+    result = matcher._probe(buf)
+
+    # types that never read a size would only waste the extra reads
+    if type(matcher)._get_size is FileType._get_size or not can_reread(obj):
+        return _enforce(matcher, result, buf, obj, limits)
+
+    to_read = len(buf)
+
+    # a full buffer without a size means the header is further in
+    while result.width == 0 and len(buf) == to_read and to_read < max_read:
+
+        to_read = min(to_read * 8, max_read)
+
+        buf = get_bytes(obj, to_read)
+
+        if instrument._active is not None:
+            instrument._active.record_bytes("identify", len(buf))
+
+        result = matcher._probe(buf)
+
+    return _enforce(matcher, result, buf, obj, limits)
+
+
+def _enforce(matcher, result, buf: bytearray, obj, limits):
+
+    if limits is not None:
+        limits.enforce(matcher, buf, get_file_size(obj))
+
+    return matcher, result, buf
@@ -0,0 +1,214 @@
+import os
+
+from . import instrument
+from .budget import get_active
+from .FileTypes import IMAGE as image_matchers
+from .match import _match
+
+
+# enough for every signature, including the dicom magic at byte 128,
+# and for the fixed offset sizes of png, gif, bmp, psd and webp
+_NUM_HEAD_BYTES = 512
+
+
+class RangeReader(object):
+    """
+    Random access reader for partially fetched files, e.g. HTTP range requests.
+    Subclasses implement read_at, every call of which is one round trip.
+    """
+
+    # ranges separated by at most this many bytes are fetched as one read
+    coalesce_gap = 0
+
+    def read_at(self, offset: int, length: int):
+        """
+        Reads up to length bytes starting at offset.
+
+        Returns:
+            bytes, shorter than length when the range runs past the end.
+        """
+        raise NotImplementedError
+
+    def read_ranges(self, ranges):
+        """
+        Reads several ranges, coalescing adjacent and overlapping ones
+        so they are fetched with a single read_at call.
+
+        Args:
+            ranges: list of (offset, length) tuples.
+
+        Returns:
+            list of bytes, one for each of the given ranges.
+        """
+        results = [b""] * len(ranges)
+
+        order = sorted(range(len(ranges)), key=lambda i: ranges[i][0])
+
+        i = 0
+        while i < len(order):
+
+            start = ranges[order[i]][0]
+            end = start + ranges[order[i]][1]
+
+            j = i + 1
+            while j < len(order) and ranges[order[j]][0] <= end + self.coalesce_gap:
+                end = max(end, ranges[order[j]][0] + ranges[order[j]][1])
+                j += 1
+
+            data = self.read_at(start, end - start)
+
+            for k in order[i:j]:
+                offset, length = ranges[k]
+                results[k] = data[offset - start : offset - start + length]
+
+            i = j
+
+        return results
+
+
+class FileRangeReader(RangeReader):
+    """
+    Range reader over a local file, given as a path or a binary file object.
+    """
+
+    def __init__(self, file):
+
+        self._owns_file = not hasattr(file, "read")
+
+        if self._owns_file:
+            file = open(file, "rb")
+
+        self.file = file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._owns_file:
+            self.file.close()
+
+    def read_at(self, offset: int, length: int):
+
+        if hasattr(os, "pread"):
+            try:
+                return os.pread(self.file.fileno(), length, offset)
+            except (AttributeError, OSError, ValueError):
+                pass
+
+        self.file.seek(offset)
+
+        return self.file.read(length)
+
+
+class MemoryRangeReader(RangeReader):
+    """
+    Range reader over bytes held in memory, which counts the
+    requests made so the round trips of a sizer can be checked.
+    """
+
+    def __init__(self, data):
+        self.data = bytes(data)
+        self.requests = []
+
+    @property
+    def request_count(self):
+        return len(self.requests)
+
+    @property
+    def bytes_read(self):
+        return sum(len(self.data[o : o + n]) for o, n in self.requests)
+
+    def read_at(self, offset: int, length: int):
+
+        self.requests.append((offset, length))
+
+        return self.data[offset : offset + length]
+
+
+def _run_sizer(sizer, reader: RangeReader, head: bytearray, is_whole_file: bool):
+
+    # (offset, bytes) of everything fetched so far
+    blocks = [(0, head)]
+
+    budget = get_active()
+
+    try:
+        ranges = next(sizer)
+
+        while True:
+
+            # every round trip of the sizer
+            if budget is not None:
+                budget.step()
+
+            results = [None] * len(ranges)
+            missing = []
+
+            for i, (offset, length) in enumerate(ranges):
+
+                if is_whole_file:
+                    results[i] = head[offset : offset + length]
+                    continue
+
+                for start, data in blocks:
+                    if start <= offset and offset + length <= start + len(data):
+                        results[i] = data[offset - start : offset - start + length]
+                        break
+                else:
+                    missing.append(i)
+
+            if missing:
+                fetched = reader.read_ranges([ranges[i] for i in missing])
+
+                for i, data in zip(missing, fetched):
+                    results[i] = data
+                    blocks.append((ranges[i][0], data))
+
+                if instrument._active is not None:
+                    length = sum(len(data) for data in fetched)
+                    instrument._active.record_bytes("read_size", length)
+
+                if budget is not None:
+                    budget.read(sum(len(data) for data in fetched))
+
+            ranges = sizer.send(results)
+
+    except StopIteration as e:
+        return e.value
+
+
+def read_size(
+    reader: RangeReader, matchers=image_matchers, head_size=_NUM_HEAD_BYTES
+):
+    """
+    Matches the file behind a range reader and reads its size,
+    fetching only the ranges the matched type needs.
+
+    Args:
+        reader: RangeReader for the file.
+        matchers: the type matchers to try, in order.
+        head_size: how many bytes to fetch with the first request.
+
+    Returns:
+        Tuple of the type instance and its (width, height) if a type matches.
+        Otherwise None.
+    """
+    head = bytearray(reader.read_at(0, head_size))
+
+    # a short read means the head already holds the whole file
+    is_whole_file = len(head) < head_size
+
+    if instrument._active is not None:
+        instrument._active.record_bytes("read_size", len(head))
+
+    matcher = _match(head, matchers)
+
+    if matcher is None:
+        return None
+
+    sizer = matcher._read_size(head)
+
+    return matcher, _run_sizer(sizer, reader, head, is_whole_file)
@@ -0,0 +1,271 @@
+"""
+Reads the headers of many files in the order they lie on disk, for scanning
+large trees where the time goes into seeks rather than matching.
+"""
+
+import os
+
+from .FileTypes import IMAGE as image_matchers
+from .FileTypes.base import FileType
+from .match import _match, _identify, _get_info
+from .utils import _NUM_SIGNATURE_BYTES, _MAX_PROBE_BYTES
+
+
+def _open(path):
+    """
+    Returns:
+        Tuple of the path, its file descriptor and stat result,
+        or of the path and two None if it can not be opened.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return path, None, None
+
+    try:
+        return path, fd, os.fstat(fd)
+    except OSError:
+        os.close(fd)
+        return path, None, None
+
+
+def _physical_order(opened):
+
+    stat = opened[2]
+
+    if stat is None:
+        return (-1, -1)
+
+    # inode numbers follow where the inodes, and mostly their data, are
+    # allocated on ext4, xfs and most other local filesystems
+    return (stat.st_dev, stat.st_ino)
+
+
+if hasattr(os, "posix_fadvise"):
+
+    def _advise(fd, to_read: int):
+
+        # only a hint: filesystems which can't read ahead refuse it
+        try:
+            os.posix_fadvise(fd, 0, to_read, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+
+else:
+
+    def _advise(fd, to_read: int):
+        pass
+
+
+if hasattr(os, "preadv"):
+
+    def _pread(fd, to_read: int):
+
+        # reads straight into the buffer the matchers get
+        buf = bytearray(to_read)
+        del buf[os.preadv(fd, [buf], 0) :]
+
+        return buf
+
+elif hasattr(os, "pread"):
+
+    def _pread(fd, to_read: int):
+        return bytearray(os.pread(fd, to_read, 0))
+
+else:
+
+    def _pread(fd, to_read: int):
+        os.lseek(fd, 0, os.SEEK_SET)
+        return bytearray(os.read(fd, to_read))
+
+
+def _read(fd, to_read: int):
+
+    if fd is None:
+        return None
+
+    try:
+        return _pread(fd, to_read)
+    except OSError:
+        # e.g. a directory
+        return None
+    finally:
+        os.close(fd)
+
+
+def _open_all(paths):
+    return [_open(path) for path in paths]
+
+
+def _read_all(opened, to_read: int):
+
+    headers = []
+
+    for path, fd, stat in opened:
+
+        buf = _read(fd, to_read)
+
+        headers.append((path, buf, stat.st_size if buf is not None else None))
+
+    return headers
+
+
+def _windows(paths, window: int):
+
+    batch = []
+
+    for path in paths:
+
+        batch.append(path)
+
+        if len(batch) == window:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _split(batch, parts: int):
+
+    # contiguous slices, so each thread reads its files in order
+    step = -(-len(batch) // parts)
+
+    return [batch[i : i + step] for i in range(0, len(batch), step)]
+
+
+def read_headers(paths, to_read=_NUM_SIGNATURE_BYTES, window=64, workers=4):
+    """
+    Reads the first bytes of every path, taking them a window at a time:
+    the files of a window are opened by a thread pool, sorted by device and
+    inode number, announced to the kernel with posix_fadvise(WILLNEED) so
+    their reads can be merged and ordered, and read with preadv by the pool
+    while the previous window is being handed out.
+
+    Args:
+        paths: iterable of paths, which may be a generator.
+        to_read: the number of bytes read from the start of each file.
+        window: the number of files sorted and read ahead together. Twice
+        as many file descriptors are open at most.
+        workers: the number of threads opening and reading files.
+
+    Returns:
+        Generator of (path, bytearray, file size) in the order the files
+        were read, with None for the bytearray and size when a file can
+        not be read.
+    """
+    # only scans need threads, so importing them is left to the first scan
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+
+        pending = ()
+
+        for batch in _windows(paths, window):
+
+            # a task per thread rather than per file, as handing a task to
+            # the pool takes about as long as reading a cached header
+            opened = sorted(
+                (
+                    item
+                    for items in pool.map(_open_all, _split(batch, workers))
+                    for item in items
+                ),
+                key=_physical_order,
+            )
+
+            for _, fd, _ in opened:
+                if fd is not None:
+                    _advise(fd, to_read)
+
+            reads = [
+                pool.submit(_read_all, part, to_read)
+                for part in _split(opened, workers)
+            ]
+
+            # the reads of this window run while the last one is consumed
+            for future in pending:
+                yield from future.result()
+
+            pending = reads
+
+        for future in pending:
+            yield from future.result()
+
+
+def scan(
+    paths,
+    matchers=image_matchers,
+    max_read=_MAX_PROBE_BYTES,
+    limits=None,
+    to_read=_NUM_SIGNATURE_BYTES,
+    window=64,
+    workers=4,
+):
+    """
+    Identifies every path like get_info, reading the headers through
+    read_headers. Files whose size lies past the first to_read bytes (e.g.
+    a jpeg with a large EXIF block) are read again on their own.
+
+    Args:
+        paths: iterable of paths, which may be a generator.
+        matchers, max_read, limits: see identify.
+        to_read, window, workers: see read_headers.
+
+    Returns:
+        Generator of (path, info.ImageInfo) in the order the files were
+        read, with None for files which can not be read or don't match.
+
+    Raises:
+        DecompressionBombError: if a header declares more than limits allow.
+    """
+    for path, buf, size in read_headers(paths, to_read, window, workers):
+
+        matcher = _match(buf, matchers) if buf is not None else None
+
+        if matcher is None:
+            yield path, None
+            continue
+
+        result = matcher._probe(buf)
+
+        # a full buffer without a whole size means the header is further in,
+        # as a short read can hold the width of a tiff but not its height
+        if (
+            (result.width == 0 or result.height == 0)
+            and len(buf) == to_read
+            and type(matcher)._get_size is not FileType._get_size
+        ):
+            identified = _identify(path, matchers, max_read, limits, None)
+
+            yield path, _get_info(*identified) if identified is not None else None
+            continue
+
+        if limits is not None:
+            limits.enforce(matcher, buf, size)
+
+        yield path, _get_info(matcher, result, buf)
+
+
+def iter_files(root):
+    """
+    Walks a directory tree with os.scandir, without following links.
+
+    Returns:
+        Generator of the paths of the regular files under root.
+    """
+    directories = [root]
+
+    while directories:
+
+        try:
+            entries = os.scandir(directories.pop())
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path
@@ -1,12 +1,14 @@
-# Python 2.7 workaround
-try:
-    import pathlib
-except ImportError:
-    pass
+import os
+
+from . import instrument
+from .budget import get_active
 
 
 _NUM_SIGNATURE_BYTES = 8192
 
+# upper bound on how far identify will re-read to find a header
+_MAX_PROBE_BYTES = 1 << 20
+
 
 def get_signature_bytes(path, to_read=_NUM_SIGNATURE_BYTES):
     """
@@ -54,7 +56,25 @@ def get_bytes(obj, to_read=_NUM_SIGNATURE_BYTES):
 
     Raises:
         TypeError: if obj is not a supported type.
+        budget.BudgetExceeded: if the bytes read exceed the active budget.
     """
+    if instrument._active is not None:
+        start = instrument.clock()
+        buf = _get_bytes(obj, to_read)
+        instrument._active.record_time("get_bytes", start)
+    else:
+        buf = _get_bytes(obj, to_read)
+
+    budget = get_active()
+
+    if budget is not None:
+        budget.read(len(buf))
+
+    return buf
+
+
+def _get_bytes(obj, to_read):
+
     if isinstance(obj, bytearray):
         return signature(obj, to_read)
 
@@ -67,7 +87,8 @@ def get_bytes(obj, to_read=_NUM_SIGNATURE_BYTES):
     if isinstance(obj, memoryview):
         return bytearray(signature(obj, to_read).tolist())
 
-    if isinstance(obj, pathlib.PurePath):
+    # pathlib paths, without importing pathlib
+    if isinstance(obj, os.PathLike):
         return get_signature_bytes(obj, to_read)
 
     if hasattr(obj, "read"):
@@ -76,7 +97,51 @@ def get_bytes(obj, to_read=_NUM_SIGNATURE_BYTES):
             obj.seek(0)
             magic_bytes = obj.read(to_read)
             obj.seek(start_pos)
-            return get_bytes(magic_bytes)
-        return get_bytes(obj.read(to_read))
+            return _get_bytes(magic_bytes, to_read)
+        return _get_bytes(obj.read(to_read), to_read)
 
     raise TypeError("Unsupported type as file input: %s" % type(obj))
+
+
+def can_reread(obj):
+    """
+    Checks whether get_bytes can be called again on the given input
+    with a larger read size and still start at the beginning of the file.
+
+    Args:
+        obj: any input accepted by get_bytes.
+
+    Returns:
+        False for file-like objects which can not seek, otherwise True.
+    """
+    if hasattr(obj, "read"):
+        return hasattr(obj, "tell") and hasattr(obj, "seek")
+
+    return True
+
+
+def get_file_size(obj):
+    """
+    Gets the length of the whole file behind an input of get_bytes.
+
+    Args:
+        obj: any input accepted by get_bytes.
+
+    Returns:
+        The length in bytes, or None for file-like objects which can not seek.
+    """
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return len(obj)
+
+    if not hasattr(obj, "read"):
+        return os.path.getsize(obj)
+
+    if not can_reread(obj):
+        return None
+
+    position = obj.tell()
+
+    try:
+        return obj.seek(0, os.SEEK_END)
+    finally:
+        obj.seek(position)
@@ -0,0 +1,166 @@
+"""
+Structural checks which tell truncated or corrupt files apart cheaply.
+"""
+
+import os
+
+from .budget import get_active
+from .FileTypes import IMAGE as image_matchers
+from .match import _match
+from .rangereader import FileRangeReader
+from .utils import can_reread, get_file_size, _NUM_SIGNATURE_BYTES
+
+
+class ValidationResult(object):
+    """
+    Outcome of validate. It is truthy when the structure is valid.
+
+    Attributes:
+        filetype: the matched type instance, or None.
+        valid: whether the structure is complete and consistent.
+        checked: whether the type has a structure that was checked,
+        types without one are valid once they match.
+        reason: why the structure is invalid, or None.
+        offset: where the structure ends when valid, otherwise where
+        the failure was found.
+    """
+
+    __slots__ = ("filetype", "valid", "checked", "reason", "offset")
+
+    def __init__(self, filetype, valid, checked, reason=None, offset=0):
+        self.filetype = filetype
+        self.valid = valid
+        self.checked = checked
+        self.reason = reason
+        self.offset = offset
+
+    def __bool__(self):
+        return self.valid
+
+    def __repr__(self):
+        fields = ", ".join(
+            "{}: {}".format(name, getattr(self, name)) for name in self.__slots__
+        )
+        return "<{} {}>".format(self.__class__.__name__, fields)
+
+
+class BlockReader(object):
+    """
+    Reads through a RangeReader in blocks, so the many small header reads
+    of a structure check which land close together share one read.
+    """
+
+    def __init__(self, reader, block_size=4096):
+        self.reader = reader
+        self.block_size = block_size
+        self.start = 0
+        self.data = b""
+        self.at_end = False
+
+    def read(self, offset: int, length: int):
+
+        start = offset - self.start
+
+        # the block holds the range, or already reaches the end of the file
+        if start >= 0 and (start + length <= len(self.data) or self.at_end):
+            return self.data[start : start + length]
+
+        size = max(length, self.block_size)
+
+        self.start = offset
+        self.data = self.reader.read_at(offset, size)
+        self.at_end = len(self.data) < size
+
+        budget = get_active()
+
+        if budget is not None:
+            budget.read(len(self.data))
+
+        return self.data[:length]
+
+
+def validate(obj, matchers=image_matchers, check_crc=False):
+    """
+    Matches the input and checks that its structure is complete, by
+    seeking from header to header instead of decoding the image data.
+
+    Checked are the jpeg segments up to the first scan and the EOI marker,
+    the png chunks up to IEND, the gif blocks up to the trailer, the boxes
+    of ISO-BMFF and jpeg 2000 files adding up to the file length, the
+    image file directories, field data and strips or tiles of tiff and cr2,
+    the RIFF chunk of webp, the file size of bmp and the image data of the
+    ico and cur entries.
+
+    Args:
+        obj: path to file, file-like object, bytes, bytearray or memoryview.
+        A file-like object which can't seek is read whole.
+        matchers: the type matchers to try, in order.
+        check_crc: whether to also check the CRC of every png chunk,
+        which reads the whole file.
+
+    Returns:
+        ValidationResult, which is falsy if the structure is invalid
+        or no type matches.
+
+    Raises:
+        TypeError: if obj is not a supported type.
+        budget.BudgetExceeded: if the bytes read exceed the active budget.
+    """
+    # the check seeks through all of the file, so a stream which can't seek
+    # is read whole
+    if hasattr(obj, "read") and not (
+        can_reread(obj) and getattr(obj, "seekable", lambda: True)()
+    ):
+        obj = obj.read()
+
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+
+        data = obj
+
+        budget = get_active()
+
+        def read(offset, length):
+
+            chunk = data[offset : offset + length]
+
+            # the checks use the methods of bytes, which slices of a
+            # memoryview don't have
+            if isinstance(chunk, memoryview):
+                chunk = bytes(chunk)
+
+            # the bytes checked count towards the active budget, as the
+            # blocks read from files do
+            if budget is not None:
+                budget.read(len(chunk))
+
+            return chunk
+
+        size = len(data)
+
+    elif isinstance(obj, (str, os.PathLike)) or hasattr(obj, "read"):
+
+        with FileRangeReader(obj) as reader:
+            size = get_file_size(reader.file)
+            return _validate(BlockReader(reader).read, size, matchers, check_crc)
+
+    else:
+        raise TypeError("Unsupported type as file input: %s" % type(obj))
+
+    return _validate(read, size, matchers, check_crc)
+
+
+def _validate(read, size: int, matchers, check_crc: bool):
+
+    matcher = _match(bytearray(read(0, _NUM_SIGNATURE_BYTES)), matchers)
+
+    if matcher is None:
+        return ValidationResult(None, False, False, "unknown file type")
+
+    result = matcher._validate(read, 0, size, check_crc)
+
+    if result is None:
+        return ValidationResult(matcher, True, False, None, size)
+
+    reason, offset = result
+
+    return ValidationResult(matcher, reason is None, True, reason, offset)
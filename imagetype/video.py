@@ -0,0 +1,437 @@
+"""
+Reads the tracks of ISO-BMFF based videos, such as mp4 and mov files,
+from the few boxes of their moov box which describe them.
+"""
+
+import os
+
+from .budget import get_active
+from .FileTypes import bytereader as br
+from .FileTypes.isobmff import IsoBmff
+from .rangereader import RangeReader, FileRangeReader, MemoryRangeReader
+
+
+# the first read, which holds the ftyp box and usually a moov box
+# written before the media data
+_HEAD_BYTES = 1 << 16
+
+# moov boxes up to this size are read whole, larger ones a window at a
+# time, hopping over the sample tables
+_MOOV_BYTES = 1 << 20
+
+_WINDOW_BYTES = 1 << 16
+
+# durations of all ones are unknown
+_UNKNOWN_DURATIONS = (0, (1 << 32) - 1, (1 << 64) - 1)
+
+
+class VideoTrack(object):
+    """
+    Description of one track of a video.
+
+    Attributes:
+        track_id: the id of the track.
+        kind: the handler type, e.g. vide, soun, hint, meta or text.
+        codec: the type of the first sample entry, e.g. avc1, hvc1 or mp4a.
+        duration: the length in seconds, None if unknown.
+        width, height: the size of the frames of visual tracks, otherwise 0.
+        rotation: the clockwise rotation of the frames when displayed,
+        0, 90, 180 or 270.
+        sample_rate, channels: of audio tracks, otherwise 0.
+    """
+
+    __slots__ = (
+        "track_id",
+        "kind",
+        "codec",
+        "duration",
+        "width",
+        "height",
+        "rotation",
+        "sample_rate",
+        "channels",
+    )
+
+    def __init__(self):
+        self.track_id = 0
+        self.kind = None
+        self.codec = None
+        self.duration = None
+        self.width = 0
+        self.height = 0
+        self.rotation = 0
+        self.sample_rate = 0
+        self.channels = 0
+
+    def __repr__(self):
+        fields = ", ".join(
+            "{}: {}".format(name, getattr(self, name)) for name in self.__slots__
+        )
+        return "<{} {}>".format(self.__class__.__name__, fields)
+
+
+class VideoInfo(object):
+    """
+    Description of a video and its tracks.
+
+    Attributes:
+        mime: the MIME type told by the brands of the ftyp box.
+        duration: the length in seconds, None if unknown.
+        tracks: list of VideoTrack in file order.
+    """
+
+    __slots__ = ("mime", "duration", "tracks")
+
+    def __init__(self, mime=None, duration=None, tracks=None):
+        self.mime = mime
+        self.duration = duration
+        self.tracks = [] if tracks is None else tracks
+
+    @property
+    def video(self):
+        """
+        The first visual track, or None.
+        """
+        for track in self.tracks:
+            if track.kind == "vide":
+                return track
+
+        return None
+
+    @property
+    def size(self):
+        """
+        The (width, height) of the first visual track, (0, 0) without one.
+        """
+        track = self.video
+
+        return (0, 0) if track is None else (track.width, track.height)
+
+    @property
+    def codec(self):
+        track = self.video
+
+        return None if track is None else track.codec
+
+    def __repr__(self):
+        fields = ", ".join(
+            "{}: {}".format(name, getattr(self, name)) for name in self.__slots__
+        )
+        return "<{} {}>".format(self.__class__.__name__, fields)
+
+
+class _Window(object):
+    """
+    The last bytes read, which boxes are looked up in before reading more.
+    """
+
+    def __init__(self, reader: RangeReader, offset: int, data: bytes):
+        self.reader = reader
+        self.offset = offset
+        self.data = data
+
+    def get(self, offset: int, length: int, ahead=_WINDOW_BYTES):
+
+        start = offset - self.offset
+
+        if start < 0 or start + length > len(self.data):
+
+            self.data = self.reader.read_at(offset, max(length, ahead))
+            self.offset = offset
+
+            budget = get_active()
+
+            if budget is not None:
+                budget.read(len(self.data))
+
+            start = 0
+
+        return self.data[start : start + length]
+
+
+def _iter_boxes(window: _Window, start: int, end):
+    """
+    Reads the headers of the boxes between start and end, or up to the
+    end of the file if end is None.
+
+    Returns:
+        Generator of (box type, offset of the body, offset of the end).
+    """
+    offset = start
+
+    budget = get_active()
+
+    while end is None or offset + 8 <= end:
+
+        if budget is not None:
+            budget.step()
+
+        header = window.get(offset, 16)
+
+        if len(header) < 8:
+            return
+
+        size = br.read_int(header, 4, 0)
+        box_type = bytes(header[4:8])
+        header_size = 8
+
+        # a size of 1 means a 64 bit size follows the type
+        if size == 1:
+
+            if len(header) < 16:
+                return
+
+            size = br.read_int(header, 8, 8)
+            header_size = 16
+
+        # a size of 0 means the box extends to the end of its parent
+        elif size == 0:
+
+            if end is None:
+                yield box_type, offset + header_size, None
+                return
+
+            size = end - offset
+
+        if size < header_size:
+            return
+
+        box_end = offset + size if end is None else min(offset + size, end)
+
+        yield box_type, offset + header_size, box_end
+
+        offset += size
+
+
+def _get_duration(duration: int, timescale: int):
+
+    if duration in _UNKNOWN_DURATIONS or timescale == 0:
+        return None
+
+    return duration / timescale
+
+
+def _read_duration(body: bytes):
+
+    # the start of mvhd and mdhd
+
+    # | version | flags  | creation | modification | timescale | duration
+    # | 1 byte  | 3 byte | 4 (8)    | 4 (8)        | 4 byte    | 4 (8)
+    if body[:1] == b"\x01":
+
+        if len(body) < 32:
+            return None
+
+        return _get_duration(br.read_int(body, 8, 24), br.read_int(body, 4, 20))
+
+    if len(body) < 20:
+        return None
+
+    return _get_duration(br.read_int(body, 4, 16), br.read_int(body, 4, 12))
+
+
+def _get_rotation(matrix: bytes):
+
+    # the a, b, c and d of the transformation, as 16.16 fixed point
+    a, b, _, c, d = (
+        br.read_int(matrix, 4, i, signed=True) for i in range(0, 20, 4)
+    )
+
+    if a == 0 and b > 0 and c < 0:
+        return 90
+
+    if a < 0 and d < 0:
+        return 180
+
+    if a == 0 and b < 0 and c > 0:
+        return 270
+
+    return 0
+
+
+def _read_tkhd(track: VideoTrack, body: bytes):
+
+    # | version | flags  | creation | modification | track id | reserved
+    # | 1 byte  | 3 byte | 4 (8)    | 4 (8)        | 4 byte   | 4 byte
+    # | duration | reserved | layer, group, volume | matrix  | width, height
+    # | 4 (8)    | 8 byte   | 8 byte               | 36 byte | 16.16 each
+    wide = body[:1] == b"\x01"
+
+    # the fields after the 64 bit times and duration of version 1
+    shift = 12 if wide else 0
+
+    if len(body) < 84 + shift:
+        return
+
+    track.track_id = br.read_int(body, 4, 20 if wide else 12)
+    track.rotation = _get_rotation(body[40 + shift : 60 + shift])
+
+    # the presentation size, for sample entries without their own
+    track.width = br.read_int(body, 4, 76 + shift) >> 16
+    track.height = br.read_int(body, 4, 80 + shift) >> 16
+
+
+def _read_stsd(track: VideoTrack, body: bytes):
+
+    # | version | flags  | entry count | first entry size | codec
+    # | 1 byte  | 3 byte | 4 byte      | 4 byte           | 4 byte
+    if len(body) < 16:
+        return
+
+    track.codec = body[12:16].decode("latin-1")
+
+    entry = body[8:]
+
+    # visual entries follow the 16 byte sample entry header with
+    # | pre defined, reserved | width  | height
+    # | 16 byte               | 2 byte | 2 byte
+    if track.kind == "vide" and len(entry) >= 36:
+
+        width = br.read_int(entry, 2, 32)
+        height = br.read_int(entry, 2, 34)
+
+        if width and height:
+            track.width, track.height = width, height
+
+    # audio entries follow it with
+    # | reserved | channels | sample size, pre defined, reserved | rate
+    # | 8 byte   | 2 byte   | 6 byte                             | 16.16
+    elif track.kind == "soun" and len(entry) >= 36:
+
+        track.channels = br.read_int(entry, 2, 24)
+        track.sample_rate = br.read_int(entry, 4, 32) >> 16
+
+
+def _read_trak(window: _Window, start: int, end: int):
+
+    track = VideoTrack()
+
+    # the tables of samples after stsd are never read
+    for box_type, body, box_end in _iter_boxes(window, start, end):
+
+        if box_type == b"tkhd":
+            _read_tkhd(track, window.get(body, 96))
+
+        elif box_type == b"mdia":
+
+            for box_type, body, box_end in _iter_boxes(window, body, box_end):
+
+                if box_type == b"mdhd":
+                    track.duration = _read_duration(window.get(body, 32))
+
+                elif box_type == b"hdlr":
+
+                    # | version, flags | pre defined | handler type
+                    # | 4 byte         | 4 byte      | 4 byte
+                    handler = window.get(body, 12)
+
+                    if len(handler) == 12:
+                        track.kind = handler[8:12].decode("latin-1")
+
+                elif box_type == b"minf":
+                    _read_minf(track, window, body, box_end)
+                    break
+
+            break
+
+    if track.kind != "vide":
+        track.width = track.height = 0
+
+    return track
+
+
+def _read_minf(track: VideoTrack, window: _Window, start: int, end: int):
+
+    for box_type, body, box_end in _iter_boxes(window, start, end):
+
+        if box_type != b"stbl":
+            continue
+
+        for box_type, body, _ in _iter_boxes(window, body, box_end):
+
+            if box_type == b"stsd":
+                _read_stsd(track, window.get(body, 52))
+                return
+
+        return
+
+
+def _open_reader(obj):
+
+    if isinstance(obj, RangeReader):
+        return obj, False
+
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return MemoryRangeReader(obj), False
+
+    if isinstance(obj, (str, os.PathLike)) or hasattr(obj, "read"):
+        return FileRangeReader(obj), True
+
+    raise TypeError("Unsupported type as file input: %s" % type(obj))
+
+
+def probe_video(obj):
+    """
+    Reads the duration of an ISO-BMFF based video, and the kind, codec,
+    duration and size of each of its tracks. Only the headers of the top
+    level boxes are read, seeking over the media data, then the moov box
+    in one read, or a window at a time hopping over the sample tables when
+    it is larger than 1 MiB. Only mvhd and the tkhd, mdhd, hdlr and stsd
+    boxes of each track are parsed. So a file takes two or three reads,
+    whether the moov box is before or after the media data.
+
+    Args:
+        obj: path to file, seekable file-like object, bytes or
+        rangereader.RangeReader.
+
+    Returns:
+        VideoInfo, or None if the file has no moov box.
+
+    Raises:
+        TypeError: if obj is not a supported type.
+    """
+    reader, owned = _open_reader(obj)
+
+    try:
+        return _probe_video(reader)
+    finally:
+        if owned:
+            reader.close()
+
+
+def _probe_video(reader: RangeReader):
+
+    head = reader.read_at(0, _HEAD_BYTES)
+
+    budget = get_active()
+
+    if budget is not None:
+        budget.read(len(head))
+
+    window = _Window(reader, 0, head)
+
+    for box_type, start, end in _iter_boxes(window, 0, None):
+
+        if box_type == b"moov" and end is not None:
+            break
+    else:
+        return None
+
+    # read the whole box when it is not in the window already
+    if end - start <= _MOOV_BYTES:
+        window.get(start, end - start)
+
+    # old quicktime files have no ftyp box
+    mime = IsoBmff._get_mime(bytearray(head[:4096])) or "video/quicktime"
+
+    info = VideoInfo(mime)
+
+    for box_type, body, box_end in _iter_boxes(window, start, end):
+
+        if box_type == b"mvhd":
+            info.duration = _read_duration(window.get(body, 32))
+
+        elif box_type == b"trak":
+            info.tracks.append(_read_trak(window, body, box_end))
+
+    return info
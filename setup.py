@@ -27,8 +27,6 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.5",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
@@ -37,8 +35,12 @@ setup(
         "Topic :: Utilities",
     ],
     platforms=["any"],
-    packages=find_packages(exclude=["dist", "build", "docs", "tests", "examples"]),
+    python_requires=">=3.7",
+    packages=find_packages(
+        exclude=["dist", "build", "docs", "tests", "examples", "benchmarks"]
+    ),
     package_data={"imagetype": ["LICENSE", "*.md"]},
+    extras_require={"batch": ["numpy"]},
     zip_safe=True,
     entry_points={
         "console_scripts": ["imagetype=imagetype.__main__:main"],
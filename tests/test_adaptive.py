@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+
+import pytest
+
+import imagetype
+from imagetype.adaptive import AdaptiveMatcher
+from imagetype.match import match
+
+from benchmarks.corpus import CORPUS, SAMPLES
+
+
+def _names(matchers):
+    return [type(matcher).__name__ for matcher in matchers]
+
+
+def _overlapping_pairs(adaptive):
+
+    for first, second in itertools.combinations(adaptive.matchers, 2):
+        if first.can_overlap(second):
+            yield first, second
+
+
+def _assert_overlapping_keep_their_order(adaptive):
+
+    order = [id(matcher) for matcher in adaptive.order]
+
+    for first, second in _overlapping_pairs(adaptive):
+        assert order.index(id(first)) < order.index(id(second)), _names(
+            (first, second)
+        )
+
+
+def _assert_matches_like_image_match(adaptive):
+
+    for name, data in CORPUS.items():
+
+        expected = imagetype.image_match(data)
+        matched = adaptive.match(data)
+
+        assert type(matched) is type(expected), name
+
+
+@pytest.mark.parametrize("compile", [True, False])
+def test_frequent_types_move_to_the_front(compile):
+
+    adaptive = AdaptiveMatcher(reorder_every=100, compile=compile)
+
+    assert _names(adaptive)[:3] == ["Dwg", "Xcf", "Jpeg"]
+
+    for _ in range(60):
+        adaptive.match(SAMPLES["jpg"])
+        adaptive.match(SAMPLES["png"])
+
+    # reordered after the 100th match, with as many jpeg as png
+    assert _names(adaptive)[:3] == ["Jpeg", "Apng", "Png"]
+
+    for _ in range(80):
+        adaptive.match(SAMPLES["webp"])
+
+    # and again after the 200th
+    counts = adaptive.get_profile()["counts"]
+
+    assert (counts["Jpeg"], counts["Png"], counts["Webp"]) == (60, 60, 80)
+
+    names = _names(adaptive)
+
+    # Png goes along with Apng, which has to be tried before it
+    assert names[:4] == ["Webp", "Jpeg", "Apng", "Png"]
+    assert names.index("Dwg") > names.index("Png")
+
+    _assert_overlapping_keep_their_order(adaptive)
+
+
+@pytest.mark.parametrize("compile", [True, False])
+@pytest.mark.parametrize(
+    "name, leading",
+    [
+        ("png", ["Apng", "Png"]),
+        ("cr2", ["Tiff", "Cr2"]),
+        # these overlap with many earlier types, which stay in front of them
+        ("tga", None),
+        ("svg", None),
+    ],
+)
+def test_overlapping_types_never_swap(compile, name, leading):
+
+    # a stream of only the later type of an overlapping pair
+    adaptive = AdaptiveMatcher(reorder_every=10, compile=compile)
+
+    matched = type(imagetype.image_match(SAMPLES[name])).__name__
+    before = _names(adaptive).index(matched)
+
+    for _ in range(100):
+        adaptive.match(SAMPLES[name])
+
+    if leading is not None:
+        assert _names(adaptive)[: len(leading)] == leading
+
+    assert _names(adaptive).index(matched) < before
+
+    _assert_overlapping_keep_their_order(adaptive)
+
+    # so the samples of the earlier type still match as that type
+    _assert_matches_like_image_match(adaptive)
+
+
+def test_overlap_pairs_include_the_known_ones():
+
+    pairs = {tuple(_names(pair)) for pair in _overlapping_pairs(AdaptiveMatcher())}
+
+    assert ("Apng", "Png") in pairs
+    assert ("Tiff", "Cr2") in pairs
+    assert ("Jpeg", "Png") not in pairs
+
+
+def test_every_order_of_counts_matches_like_image_match():
+
+    adaptive = AdaptiveMatcher()
+
+    for names in (sorted(SAMPLES), sorted(SAMPLES, reverse=True)):
+
+        counts = {type(m).__name__: 0 for m in adaptive.matchers}
+
+        for i, name in enumerate(names):
+            counts[type(imagetype.image_match(SAMPLES[name])).__name__] = i + 1
+
+        adaptive.set_profile({"counts": counts})
+
+        _assert_overlapping_keep_their_order(adaptive)
+        _assert_matches_like_image_match(adaptive)
+
+
+def test_freeze_and_match_keep_the_counts():
+
+    adaptive = AdaptiveMatcher(reorder_every=1)
+
+    adaptive.match(SAMPLES["png"])
+
+    counts = list(adaptive.counts)
+
+    # match.match only tries the types in the learned order
+    assert type(match(SAMPLES["jpg"], adaptive)).__name__ == "Jpeg"
+    assert adaptive.counts == counts
+
+    adaptive.freeze()
+
+    order = adaptive.order
+
+    assert type(adaptive.match(SAMPLES["jpg"])).__name__ == "Jpeg"
+    assert adaptive.counts == counts
+    assert adaptive.order == order
+
+
+def test_no_match():
+
+    adaptive = AdaptiveMatcher(reorder_every=1)
+
+    assert adaptive.match(b"garbage!" * 100) is None
+    assert sum(adaptive.counts) == 0
+
+
+def test_profile_round_trip(tmp_path):
+
+    adaptive = AdaptiveMatcher(reorder_every=10)
+
+    for _ in range(10):
+        adaptive.match(SAMPLES["gif"])
+
+    path = str(tmp_path / "profile.json")
+    adaptive.save(path)
+
+    loaded = AdaptiveMatcher.load(path)
+
+    assert loaded.frozen
+    assert loaded.counts == adaptive.counts
+    assert _names(loaded) == _names(adaptive)
+    assert _names(loaded)[0] == "Gif"
+
+    learning = AdaptiveMatcher.load(path, frozen=False)
+    learning.match(SAMPLES["gif"])
+
+    assert not learning.frozen
+    assert sum(learning.counts) == sum(adaptive.counts) + 1
+
+
+def test_profile_without_some_types():
+
+    adaptive = AdaptiveMatcher()
+    adaptive.set_profile({"counts": {"Gif": 5, "Unknown": 9}})
+
+    assert adaptive.get_profile()["counts"]["Jpeg"] == 0
+    assert _names(adaptive)[0] == "Gif"
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+import imagetype
+from imagetype.limits import DecompressionBombError, Limits
+
+from benchmarks.corpus import CORPUS, make_apng, make_png, png_chunk
+
+
+class _CountingFile(io.BytesIO):
+
+    bytes_read = 0
+
+    def read(self, *args):
+
+        data = super().read(*args)
+        self.bytes_read += len(data)
+
+        return data
+
+
+def _zip(members, compression=zipfile.ZIP_DEFLATED):
+
+    fp = io.BytesIO()
+
+    with zipfile.ZipFile(fp, "w", compression) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+    return fp.getvalue()
+
+
+def _tar(members, mode="w"):
+
+    fp = io.BytesIO()
+
+    with tarfile.open(fileobj=fp, mode=mode) as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+    return fp.getvalue()
+
+
+ARCHIVES = {
+    "stored.zip": lambda members: _zip(members, zipfile.ZIP_STORED),
+    "deflated.cbz": _zip,
+    "plain.tar": _tar,
+    "gzip.tar.gz": lambda members: _tar(members, "w:gz"),
+    "bzip2.tar.bz2": lambda members: _tar(members, "w:bz2"),
+    "xz.tar.xz": lambda members: _tar(members, "w:xz"),
+}
+
+
+@pytest.mark.parametrize("name", sorted(ARCHIVES))
+def test_members_identify_like_get_info(tmp_path, name):
+
+    members = {"images/" + key: data for key, data in CORPUS.items()}
+    members["notes.txt"] = b"not an image\n" * 100
+
+    path = tmp_path / name
+    path.write_bytes(ARCHIVES[name](members))
+
+    for obj in (str(path), path, io.BytesIO(path.read_bytes())):
+
+        scanned = list(imagetype.scan_archive(obj))
+
+        assert [member for member, _ in scanned] == list(members)
+
+        for member, info in scanned:
+            assert info == imagetype.get_info(members[member]), member
+
+
+def test_zip_members_in_the_order_of_their_data():
+
+    fp = io.BytesIO()
+
+    with zipfile.ZipFile(fp, "w") as archive:
+        archive.writestr("b/x.png", make_png())
+        archive.writestr("a/", b"")
+        archive.writestr("a/y.png", make_png(1, 2))
+
+        # the central directory lists them the other way around
+        archive.filelist.reverse()
+
+    assert zipfile.ZipFile(fp).namelist() == ["a/y.png", "a/", "b/x.png"]
+
+    scanned = list(imagetype.scan_archive(fp))
+
+    # and directories are left out
+    assert [member for member, _ in scanned] == ["b/x.png", "a/y.png"]
+    assert scanned[1][1].width == 1
+
+
+@pytest.mark.parametrize("name", ["stored.zip", "deflated.cbz", "plain.tar"])
+def test_only_the_headers_are_read(name):
+
+    # a png of 4MB, most of it in an IDAT chunk after the header
+    png = make_png(chunks=(png_chunk(b"IDAT", os.urandom(1 << 22)),))
+
+    fp = _CountingFile(ARCHIVES[name]({"large.png": png, "small.png": make_png()}))
+
+    assert [info.width for _, info in imagetype.scan_archive(fp)] == [640, 640]
+    assert fp.bytes_read < len(png) // 10
+
+
+def test_encrypted_zip_member():
+
+    data = bytearray(_zip({"secret.png": make_png(), "open.png": make_png()}))
+
+    # the encrypted flag, in the local and central header of the first member
+    for signature in (b"PK\x03\x04", b"PK\x01\x02"):
+        offset = data.index(signature) + (6 if signature == b"PK\x03\x04" else 8)
+        data[offset] |= 1
+
+    scanned = dict(imagetype.scan_archive(io.BytesIO(bytes(data))))
+
+    assert scanned["secret.png"] is None
+    assert scanned["open.png"].width == 640
+
+
+@pytest.mark.parametrize("name", ["deflated.cbz", "plain.tar"])
+def test_limits(name):
+
+    data = ARCHIVES[name]({"frames.png": make_apng(frames=1000)})
+
+    with pytest.raises(DecompressionBombError):
+        list(imagetype.scan_archive(io.BytesIO(data), limits=Limits(max_frames=100)))
+
+    [(_, info)] = imagetype.scan_archive(io.BytesIO(data))
+
+    assert info.frames == 1000
+
+
+def test_not_an_archive(tmp_path):
+
+    path = tmp_path / "image.png"
+    path.write_bytes(make_png())
+
+    with pytest.raises(ValueError):
+        list(imagetype.scan_archive(str(path)))
+
+    with pytest.raises(ValueError):
+        list(imagetype.scan_archive(io.BytesIO(make_png())))
+
+    with pytest.raises(TypeError):
+        list(imagetype.scan_archive(make_png()))
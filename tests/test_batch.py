@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from imagetype.batch import match_array
+from imagetype.FileTypes import IMAGE, VIDEO
+
+from benchmarks.corpus import (
+    CORPUS,
+    make_apng,
+    make_isobmff,
+    make_mp4,
+    make_png,
+    png_chunk,
+)
+
+
+# the types match_array reads a size for
+SIZED = ("Png", "Apng", "Gif", "Bmp", "Psd", "Webp", "Qoi", "Dds")
+
+
+def _headers(samples, length: int):
+
+    headers = np.zeros((len(samples), length), dtype=np.uint8)
+
+    for i, data in enumerate(samples):
+        data = data[:length]
+        headers[i, : len(data)] = np.frombuffer(data, dtype=np.uint8)
+
+    return headers
+
+
+def _first_match(header: bytes, matchers):
+
+    for index, matcher in enumerate(matchers):
+        if matcher.match(bytearray(header)):
+            return index
+
+    return -1
+
+
+@pytest.mark.parametrize("length", [16, 64, 256])
+def test_rows_match_like_the_matchers(length):
+
+    names = sorted(CORPUS)
+    headers = _headers([CORPUS[name] for name in names], length)
+
+    kinds, widths, heights = match_array(headers)
+
+    assert len(kinds) == len(widths) == len(heights) == len(names)
+
+    for i, name in enumerate(names):
+
+        header = headers[i].tobytes()
+        index = _first_match(header, IMAGE)
+
+        assert kinds[i] == index, name
+
+        if index >= 0 and type(IMAGE[index]).__name__ in SIZED:
+            size = IMAGE[index].get_size(bytearray(header))
+        else:
+            size = (0, 0)
+
+        assert (widths[i], heights[i]) == size, name
+
+
+def test_apng_with_chunks_before_actl():
+
+    # acTL after another chunk is found by walking the chunks of that row
+    text = png_chunk(b"tEXt", b"a\x00b")
+
+    headers = _headers(
+        [make_apng(chunks=(text,)), make_apng(), make_png(), make_png(chunks=(text,))],
+        128,
+    )
+
+    kinds, _, _ = match_array(headers)
+
+    assert [type(IMAGE[kind]).__name__ for kind in kinds] == [
+        "Apng",
+        "Apng",
+        "Png",
+        "Png",
+    ]
+
+
+def test_given_matchers():
+
+    samples = [
+        make_mp4(),
+        make_isobmff(b"avif", (b"mif1", b"avif")),
+        make_png(),
+        make_isobmff(),
+    ]
+
+    kinds, _, _ = match_array(_headers(samples, 64), VIDEO)
+
+    expected = [_first_match(data[:64], VIDEO) for data in samples]
+
+    assert list(kinds) == expected
+    assert type(VIDEO[kinds[0]]).__name__ == "Mp4"
+    assert list(kinds[1:]) == [-1, -1, -1]
+
+
+def test_no_rows():
+
+    kinds, widths, heights = match_array(np.zeros((0, 64), dtype=np.uint8))
+
+    assert len(kinds) == len(widths) == len(heights) == 0
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        np.zeros(64, dtype=np.uint8),
+        np.zeros((2, 64), dtype=np.int32),
+        [[0] * 64],
+    ],
+)
+def test_headers_must_be_a_2d_uint8_array(headers):
+
+    with pytest.raises(ValueError):
+        match_array(headers)
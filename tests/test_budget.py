@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import io
+import struct
+import threading
+
+import pytest
+
+from imagetype import get_info, probe_video
+from imagetype.budget import Budget, BudgetExceeded, get_active
+from imagetype.carve import carve
+from imagetype.validate import validate
+from imagetype.FileTypes.libisobmff import MediaFile
+
+from benchmarks.corpus import box, make_jpeg, make_png, png_chunk
+from benchmarks.fuzz import HOSTILE
+
+
+def _deep_moov(depth=5000):
+    """
+    An mp4 of moov boxes nested inside each other.
+    """
+    nested = b""
+
+    for _ in range(depth):
+        nested = struct.pack(">I", 8 + len(nested)) + b"moov" + nested
+
+    return box(b"ftyp", b"isom\x00\x00\x00\x00isomavc1") + nested
+
+
+def _media_file(tmp_path, data: bytes):
+
+    path = tmp_path / "file"
+    path.write_bytes(data)
+
+    MediaFile().read(str(path))
+
+
+@pytest.mark.parametrize(
+    "make, call, limit",
+    [
+        (HOSTILE["jpeg segments"], "get_info", "max_iterations"),
+        (HOSTILE["tiff fields"], "get_info", "max_entries"),
+        (HOSTILE["tiff chain"], "validate", "max_iterations"),
+        (HOSTILE["ico count"], "get_info", "max_entries"),
+        (HOSTILE["apng chunks"], "get_info", "max_iterations"),
+        (HOSTILE["heic boxes"], "get_info", "max_bytes"),
+        (HOSTILE["heic iloc"], "MediaFile", "max_entries"),
+        (HOSTILE["mp4 stsz"], "MediaFile", "max_entries"),
+        (HOSTILE["mp4 boxes"], "probe_video", "max_iterations"),
+        (_deep_moov, "MediaFile", "max_iterations"),
+    ],
+)
+def test_crafted_files_run_out_of_the_budget(tmp_path, make, call, limit):
+
+    calls = {
+        "get_info": get_info,
+        "validate": validate,
+        "probe_video": probe_video,
+        "MediaFile": lambda data: _media_file(tmp_path, data),
+    }
+
+    data = make()
+
+    with pytest.raises(BudgetExceeded) as raised:
+        with Budget(max_iterations=1000, max_bytes=1 << 20, max_entries=1000):
+            calls[call](data)
+
+    assert raised.value.limit == limit
+    assert raised.value.value > raised.value.maximum
+
+
+def test_nested_budget_keeps_its_counts():
+
+    data = make_jpeg()
+
+    with Budget() as budget:
+        get_info(data)
+
+    iterations = budget.iterations
+
+    assert iterations > 0
+
+    with budget:
+        get_info(data)
+
+        with budget:
+            get_info(data)
+
+        assert budget.iterations == 2 * iterations
+
+    # entering it again around the next call starts over
+    with budget:
+        get_info(data)
+
+    assert budget.iterations == iterations
+
+    budget.max_iterations = iterations
+
+    with pytest.raises(BudgetExceeded):
+        with budget:
+            get_info(data)
+
+            with budget:
+                get_info(data)
+
+
+def test_budget_is_entered_by_one_thread_at_a_time():
+
+    budget = Budget(max_iterations=1000)
+
+    entered = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def hold():
+
+        try:
+            with budget:
+                entered.set()
+                release.wait(5)
+                get_info(make_jpeg())
+
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+
+    assert entered.wait(5)
+
+    with pytest.raises(RuntimeError):
+        with budget:
+            pass
+
+    release.set()
+    thread.join()
+
+    # the other thread leaves its with as it entered it
+    assert errors == []
+    assert budget.iterations > 0
+
+    # and once it left, the budget can be entered here
+    with budget:
+        get_info(make_jpeg())
+
+
+def test_tasks_started_inside_a_budget_share_it():
+
+    budget = Budget()
+
+    async def call():
+
+        assert get_active() is budget
+
+        with budget:
+            get_info(make_jpeg())
+
+        return budget.iterations
+
+    async def main():
+
+        with budget:
+            first = await asyncio.get_running_loop().create_task(call())
+            second = await asyncio.get_running_loop().create_task(call())
+
+        return first, second
+
+    first, second = asyncio.run(main())
+
+    assert 0 < first < second
+    assert get_active() is None
+
+
+def test_budget_is_entered_by_one_task_at_a_time():
+
+    budget = Budget()
+
+    async def hold(entered, release):
+
+        with budget:
+            entered.set()
+            await release.wait()
+
+    async def main():
+
+        entered, release = asyncio.Event(), asyncio.Event()
+
+        task = asyncio.get_running_loop().create_task(hold(entered, release))
+
+        await entered.wait()
+
+        with pytest.raises(RuntimeError):
+            with budget:
+                pass
+
+        release.set()
+
+        await task
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("make", [bytes, memoryview, io.BytesIO])
+def test_validate_charges_the_bytes_it_reads(make):
+
+    data = make_png(chunks=(png_chunk(b"tEXt", bytes(100000)),))
+
+    with Budget() as budget:
+        assert validate(make(data), check_crc=True)
+
+    assert budget.bytes_read >= len(data)
+
+    with pytest.raises(BudgetExceeded) as raised:
+        with Budget(max_bytes=10000):
+            validate(make(data), check_crc=True)
+
+    assert raised.value.limit == "max_bytes"
+
+
+@pytest.mark.parametrize("make", [bytes, io.BytesIO])
+def test_carve_charges_the_bytes_it_searches(make):
+
+    data = bytes(100000) + make_png() + bytes(100000)
+
+    with Budget() as budget:
+        assert len(list(carve(make(data)))) == 1
+
+    assert budget.bytes_read >= len(data)
+
+    with pytest.raises(BudgetExceeded):
+        with Budget(max_bytes=50000):
+            list(carve(make(data), chunk_size=1 << 15))
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+from imagetype.carve import carve
+
+from benchmarks.carve import make_image
+from benchmarks.corpus import SAMPLES
+
+
+# types reported without a length, and types never reported, see carve
+NO_LENGTH = {"psd", "hdr", "exr", "xcf", "qoi", "dds", "ktx2"}
+NOT_REPORTED = {"dcm", "dwg", "jxr", "jxl"}
+
+# types whose structure ends before the padding of the synthetic samples
+PADDED = {"tif", "cr2", "jpx"}
+
+
+def test_image_is_reproducible():
+
+    assert make_image(1 << 20, 20, seed=1) == make_image(1 << 20, 20, seed=1)
+    assert make_image(1 << 20, 20, seed=1) != make_image(1 << 20, 20, seed=2)
+
+
+def test_placed_files_are_found():
+
+    image, placed = make_image(4 << 20, 200, seed=3)
+
+    found = {offset: length for offset, length, _, _ in carve(image)}
+
+    for offset, name in placed.items():
+
+        if name in NOT_REPORTED:
+            assert offset not in found
+            continue
+
+        assert offset in found, name
+
+        if name in NO_LENGTH:
+            assert found[offset] is None, name
+
+        elif name in PADDED:
+            assert found[offset] <= len(SAMPLES[name]), name
+
+        else:
+            assert found[offset] == len(SAMPLES[name]), name
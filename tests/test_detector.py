@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import imagetype
+from imagetype.detector import Detector
+
+from benchmarks.corpus import SAMPLES, make_jpeg
+
+
+def _detect(data: bytes, chunk_size: int):
+
+    detector = Detector()
+
+    for i in range(0, len(data), chunk_size):
+        if not detector.feed(data[i : i + chunk_size]):
+            break
+
+    return detector, detector.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, None])
+@pytest.mark.parametrize("name", sorted(SAMPLES))
+def test_chunks_detect_like_get_info(name, chunk_size):
+
+    data = SAMPLES[name]
+
+    _, detected = _detect(data, chunk_size or len(data))
+
+    info = imagetype.get_info(data)
+
+    assert detected is not None
+
+    filetype, size = detected
+
+    assert filetype.mime == info.mime
+    assert size == (info.width or 0, info.height or 0)
+
+
+def test_no_match_stops_once_the_head_arrived():
+
+    detector = Detector()
+
+    assert detector.feed(b"garbage!")
+    assert not detector.decided
+
+    assert not detector.feed(b"garbage!" * 100)
+    assert detector.decided
+    assert detector.done
+    assert detector.filetype is None
+
+    assert detector.close() is None
+
+
+def test_no_match_of_a_short_file():
+
+    detector = Detector()
+
+    assert detector.feed(b"garbage!")
+    assert detector.close() is None
+    assert detector.decided
+
+
+def test_empty_file():
+
+    assert Detector().close() is None
+
+
+def test_type_is_known_before_the_size():
+
+    detector = Detector()
+
+    assert detector.feed(b"\xff\xd8\xff")
+
+    assert detector.decided
+    assert detector.filetype.mime == "image/jpeg"
+    assert detector.size is None
+
+
+def test_further_chunks_are_ignored_once_done():
+
+    # longer than the head, which a shorter file has to be closed to end
+    data = make_jpeg() + bytes(1024)
+
+    detector = Detector()
+
+    assert not detector.feed(data)
+    assert detector.done
+
+    assert not detector.feed(b"more")
+    assert detector.bytes_fed == len(data) + 4
+    assert detector.close()[1] == (800, 600)
+
+    with pytest.raises(ValueError):
+        detector.feed(b"after close")
+
+
+def test_only_the_head_is_kept_past_a_large_segment():
+
+    data = make_jpeg(exif=65000)
+
+    detector = Detector()
+    buffered = 0
+
+    for i in range(0, len(data), 1000):
+        detector.feed(data[i : i + 1000])
+        buffered = max(buffered, detector.buffered)
+
+    assert detector.close()[1] == (800, 600)
+    assert buffered < 2048
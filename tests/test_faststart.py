@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+
+import os
+import struct
+
+import pytest
+
+from imagetype.faststart import faststart
+
+from benchmarks.corpus import box, full_box, make_mp4
+
+
+def _boxes(data: bytes, start: int, end: int):
+
+    offset = start
+
+    while offset < end:
+
+        size, box_type = struct.unpack(">I4s", data[offset : offset + 8])
+        header_size = 8
+
+        if size == 1:
+            size = struct.unpack(">Q", data[offset + 8 : offset + 16])[0]
+            header_size = 16
+
+        yield box_type, offset, offset + header_size, offset + size
+
+        offset += size
+
+
+def _chunk_offsets(data: bytes):
+    """
+    Returns:
+        list of the chunk offsets of every stco and co64 box, in file order,
+        and the set of their box types.
+    """
+    offsets = []
+    types = set()
+
+    def walk(start, end):
+
+        for box_type, _, body, box_end in _boxes(data, start, end):
+
+            if box_type in (b"moov", b"trak", b"mdia", b"minf", b"stbl"):
+                walk(body, box_end)
+
+            elif box_type in (b"stco", b"co64"):
+                types.add(box_type)
+                width = 8 if box_type == b"co64" else 4
+                count = struct.unpack(">I", data[body + 4 : body + 8])[0]
+                offsets.extend(
+                    int.from_bytes(data[at : at + width], "big")
+                    for at in range(body + 8, body + 8 + count * width, width)
+                )
+
+    walk(0, len(data))
+
+    return offsets, types
+
+
+def _item_extents(data: bytes):
+    """
+    Returns:
+        list of (item id, construction method, offset, length) of every
+        extent in the iloc box of a version 1 top level meta box.
+    """
+    meta = next(b for b in _boxes(data, 0, len(data)) if b[0] == b"meta")
+    iloc = next(b for b in _boxes(data, meta[2] + 4, meta[3]) if b[0] == b"iloc")
+
+    body = data[iloc[2] : iloc[3]]
+
+    offset_size, length_size = body[4] >> 4, body[4] & 0x0F
+    base_offset_size = body[5] >> 4
+
+    def read(at, size):
+        return int.from_bytes(body[at : at + size], "big"), at + size
+
+    count, i = read(6, 2)
+
+    extents = []
+
+    for _ in range(count):
+        item_id, i = read(i, 2)
+        method, i = read(i, 2)
+        _, i = read(i, 2)
+        base_offset, i = read(i, base_offset_size)
+        extent_count, i = read(i, 2)
+
+        for _ in range(extent_count):
+            offset, i = read(i, offset_size)
+            length, i = read(i, length_size)
+            extents.append((item_id, method & 0x0F, base_offset + offset, length))
+
+    return extents
+
+
+def _items(at, order, base_offset_size):
+    """
+    Returns:
+        list of (item id, construction method, base offset, extents) of two
+        items in the media data, one spanning both media data boxes when
+        there are two, and one in idat.
+    """
+    # item 1 has two extents at offsets of the file, item 2 one extent
+    # relative to its base offset when there is one
+    items = [(1, 0, 0, [(at("mdat", 0), 16), (at("mdat", 100), 32)])]
+
+    if base_offset_size:
+        items += [(2, 0, at("mdat", 64), [(8, 24)])]
+    else:
+        items += [(2, 0, 0, [(at("mdat", 72), 24)])]
+
+    if "mdat2" in order and base_offset_size:
+        span = at("mdat2", 16) - at("mdat", 0)
+        items += [(4, 0, at("mdat", 0), [(0, 16), (span, 16)])]
+
+    elif "mdat2" in order:
+        items += [(4, 0, 0, [(at("mdat", 0), 16), (at("mdat2", 16), 16)])]
+
+    return items + [(3, 1, 0, [(0, 4)])]
+
+
+def _meta(items, base_offset_size: int):
+
+    iloc = b"\x44" + bytes([base_offset_size << 4]) + struct.pack(">H", len(items))
+
+    for item_id, method, base_offset, extents in items:
+        iloc += struct.pack(">HHH", item_id, method, 0)
+        iloc += base_offset.to_bytes(base_offset_size, "big")
+        iloc += struct.pack(">H", len(extents))
+        iloc += b"".join(struct.pack(">II", *extent) for extent in extents)
+
+    hdlr = full_box(b"hdlr", b"\x00" * 4 + b"pict" + b"\x00" * 12 + b"\x00")
+
+    return full_box(
+        b"meta",
+        hdlr + full_box(b"iloc", iloc, version=1) + box(b"idat", b"\x01\x02\x03\x04"),
+    )
+
+
+def _moov(offsets):
+
+    stco = full_box(
+        b"stco", struct.pack(">I%dI" % len(offsets), len(offsets), *offsets)
+    )
+
+    for box_type in (b"stbl", b"minf", b"mdia", b"trak", b"moov"):
+        stco = box(box_type, stco)
+
+    return stco
+
+
+def _layout(order, base_offset_size=4, items=_items):
+    """
+    Returns:
+        A file of an ftyp box and then the boxes of order: "mdat" and
+        "mdat2" boxes of random bytes, a "meta" box whose iloc box holds
+        the locations of items, and a "moov" box whose stco box holds
+        chunks in the media data.
+    """
+    ftyp = box(b"ftyp", b"heic\x00\x00\x00\x00mif1heic")
+
+    media = {"mdat": os.urandom(256), "mdat2": os.urandom(128)}
+
+    def build(starts):
+
+        def at(name, offset):
+            return starts.get(name, 0) + 8 + offset
+
+        chunks = [at("mdat", offset) for offset in (0, 32, 128, 200)]
+
+        if "mdat2" in order:
+            chunks.append(at("mdat2", 10))
+
+        boxes = {
+            "mdat": box(b"mdat", media["mdat"]),
+            "mdat2": box(b"mdat", media["mdat2"]),
+            "meta": _meta(items(at, order, base_offset_size), base_offset_size),
+            "moov": _moov(chunks),
+        }
+
+        return [ftyp] + [boxes[name] for name in order]
+
+    # the sizes of the boxes don't depend on the offsets in them
+    starts = {}
+    position = len(ftyp)
+
+    for name, data in zip(order, build({})[1:]):
+        starts[name] = position
+        position += len(data)
+
+    return b"".join(build(starts))
+
+
+def _write(tmp_path, data: bytes, name="source"):
+
+    path = tmp_path / name
+    path.write_bytes(data)
+
+    return str(path)
+
+
+def _assert_same_chunks(before: bytes, after: bytes, chunk_size: int):
+
+    old_offsets, _ = _chunk_offsets(before)
+    new_offsets, types = _chunk_offsets(after)
+
+    assert len(new_offsets) == len(old_offsets) > 0
+
+    for old, new in zip(old_offsets, new_offsets):
+        assert after[new : new + chunk_size] == before[old : old + chunk_size]
+
+    return types
+
+
+def _moov_first(data: bytes):
+
+    types = [box_type for box_type, _, _, _ in _boxes(data, 0, len(data))]
+
+    return types.index(b"moov") < types.index(b"mdat")
+
+
+def test_chunk_offsets_point_at_the_same_media_data(tmp_path):
+
+    before = make_mp4(moov_at_end=True, payload=4096, chunks=8)
+    source = _write(tmp_path, before)
+
+    assert faststart(source)
+
+    after = open(source, "rb").read()
+
+    assert len(after) == len(before)
+    assert _moov_first(after)
+    assert _assert_same_chunks(before, after, 4096 // 16) == {b"stco"}
+
+
+def test_chunk_offsets_grow_into_co64(tmp_path, monkeypatch):
+
+    before = make_mp4(moov_at_end=True, payload=4096, chunks=8)
+    source = _write(tmp_path, before)
+
+    old_offsets, _ = _chunk_offsets(before)
+
+    # the offsets moved behind the moov box no longer fit 32 bits
+    monkeypatch.setattr("imagetype.faststart._UINT32_MAX", max(old_offsets))
+
+    assert faststart(source)
+
+    after = open(source, "rb").read()
+
+    assert _moov_first(after)
+    assert _assert_same_chunks(before, after, 4096 // 16) == {b"co64"}
+
+
+@pytest.mark.parametrize("base_offset_size", [0, 4])
+def test_item_locations_point_at_the_same_data(tmp_path, base_offset_size):
+
+    before = _layout(["mdat", "meta"], base_offset_size)
+    source = _write(tmp_path, before)
+
+    assert faststart(source)
+
+    after = open(source, "rb").read()
+
+    types = [box_type for box_type, _, _, _ in _boxes(after, 0, len(after))]
+
+    assert types == [b"ftyp", b"meta", b"mdat"]
+
+    old_extents = _item_extents(before)
+    new_extents = _item_extents(after)
+
+    assert len(new_extents) == len(old_extents) == 4
+
+    for old, new in zip(old_extents, new_extents):
+
+        item_id, method, old_offset, length = old
+
+        # only the data in the file moves, not the data in idat
+        if method != 0:
+            assert new == old
+            continue
+
+        new_offset = new[2]
+
+        assert new_offset != old_offset
+        assert after[new_offset : new_offset + length] == before[
+            old_offset : old_offset + length
+        ]
+
+
+@pytest.mark.parametrize("base_offset_size", [0, 4])
+@pytest.mark.parametrize(
+    "order",
+    [
+        ["meta", "mdat", "moov"],
+        ["moov", "mdat", "meta"],
+        ["mdat", "meta", "mdat2"],
+        ["mdat", "moov", "meta", "mdat2"],
+    ],
+)
+def test_every_box_holding_offsets_is_patched(tmp_path, order, base_offset_size):
+
+    before = _layout(order, base_offset_size)
+    source = _write(tmp_path, before)
+
+    assert faststart(source)
+
+    after = open(source, "rb").read()
+
+    types = [box_type for box_type, _, _, _ in _boxes(after, 0, len(after))]
+
+    assert types.index(b"mdat") > max(
+        i for i, box_type in enumerate(types) if box_type in (b"moov", b"meta")
+    )
+
+    if "moov" in order:
+        _assert_same_chunks(before, after, 16)
+
+    for old, new in zip(_item_extents(before), _item_extents(after)):
+
+        _, _, old_offset, length = old
+        _, _, new_offset, _ = new
+
+        assert after[new_offset : new_offset + length] == before[
+            old_offset : old_offset + length
+        ]
+
+
+def test_item_location_which_would_turn_negative_raises(tmp_path):
+
+    def items(at, order, base_offset_size):
+
+        # an item in the meta box itself, which moves ahead of the media
+        # data, from a base offset of 0
+        return [(1, 0, 0, [(at("meta", 0), 8)])]
+
+    source = _write(tmp_path, _layout(["mdat", "meta"], 4, items))
+
+    with pytest.raises(ValueError):
+        faststart(source)
+
+
+@pytest.mark.parametrize("missing", [False, True])
+def test_copies_without_the_kernel(tmp_path, monkeypatch, missing):
+
+    def fail(*args):
+        raise OSError("not supported")
+
+    for name in ("copy_file_range", "sendfile"):
+        if missing:
+            monkeypatch.delattr(os, name, raising=False)
+        else:
+            monkeypatch.setattr(os, name, fail, raising=False)
+
+    monkeypatch.setattr("imagetype.faststart._COPY_BYTES", 1000)
+
+    before = make_mp4(moov_at_end=True, payload=4096, chunks=8)
+    source = _write(tmp_path, before)
+    destination = str(tmp_path / "destination")
+
+    assert faststart(source, destination)
+
+    after = open(destination, "rb").read()
+
+    assert open(source, "rb").read() == before
+    assert _assert_same_chunks(before, after, 4096 // 16) == {b"stco"}
+
+
+def test_keeps_the_mode_of_the_source(tmp_path):
+
+    source = _write(tmp_path, make_mp4(moov_at_end=True, payload=4096, chunks=8))
+
+    os.chmod(source, 0o644)
+
+    assert faststart(source)
+
+    assert os.stat(source).st_mode & 0o7777 == 0o644
+
+    assert not [name for name in os.listdir(str(tmp_path)) if name != "source"]
+
+
+def test_destination_of_the_source_itself_replaces_it(tmp_path):
+
+    before = make_mp4(moov_at_end=True, payload=4096, chunks=8)
+    source = _write(tmp_path, before)
+
+    assert faststart(source, os.path.join(str(tmp_path), ".", "source"))
+
+    after = open(source, "rb").read()
+
+    assert _moov_first(after)
+    assert _assert_same_chunks(before, after, 4096 // 16) == {b"stco"}
+
+
+def test_leaves_a_file_without_moved_boxes(tmp_path):
+
+    before = make_mp4(payload=4096, chunks=8)
+    source = _write(tmp_path, before)
+
+    assert not faststart(source)
+
+    assert open(source, "rb").read() == before
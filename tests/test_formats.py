@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+import struct
+
+import pytest
+
+import imagetype
+from imagetype.FileTypes.image import Dds, Exr, Hdr, Jxl, Ktx2, Pcx, Qoi, Tga
+
+from benchmarks.corpus import (
+    make_dds,
+    make_exr,
+    make_hdr,
+    make_jxl,
+    make_ktx2,
+    make_pcx,
+    make_qoi,
+    make_tga,
+)
+
+
+def _set(data: bytes, offset: int, value: bytes):
+
+    data = bytearray(data)
+    data[offset : offset + len(value)] = value
+
+    return bytes(data)
+
+
+SIZES = [
+    (Jxl, make_jxl(1000, 517), (1000, 517)),
+    (Jxl, make_jxl(70000, 3), (70000, 3)),
+    (Jxl, make_jxl(257, 8, container=True), (257, 8)),
+    (Qoi, make_qoi(1, 2), (1, 2)),
+    (Tga, make_tga(65535, 1), (65535, 1)),
+    (Pcx, make_pcx(320, 240), (320, 240)),
+    (Exr, make_exr(3, 5), (3, 5)),
+    (Hdr, make_hdr(1, 9999), (1, 9999)),
+    (Dds, make_dds(512, 256), (512, 256)),
+    (Ktx2, make_ktx2(4, 8, faces=1), (4, 8)),
+]
+
+
+@pytest.mark.parametrize("filetype, data, size", SIZES)
+def test_sizes(filetype, data, size):
+
+    assert filetype().get_size(bytearray(data)) == size
+
+    assert isinstance(imagetype.image_match(data), filetype)
+
+    info = imagetype.get_info(data)
+
+    assert (info.width, info.height) == size
+
+
+@pytest.mark.parametrize("filetype, data, size", SIZES)
+def test_truncated_headers_have_no_size(filetype, data, size):
+
+    for length in (0, 4):
+        assert filetype().get_size(bytearray(data[:length])) == (0, 0)
+
+
+@pytest.mark.parametrize(
+    "filetype, data",
+    [
+        (Jxl, _set(make_jxl(), 1, b"\x0b")),
+        (Qoi, _set(make_qoi(), 3, b"g")),
+        # a type of 5, which tga does not have
+        (Tga, _set(make_tga(), 2, b"\x05")),
+        # a bit depth of 7
+        (Tga, _set(make_tga(), 16, b"\x07")),
+        # an encoding of 7, only 1 (rle) exists
+        (Pcx, _set(make_pcx(), 2, b"\x07")),
+        (Exr, _set(make_exr(), 3, b"\x02")),
+        (Hdr, make_hdr().replace(b"RADIANCE", b"RADIANXE")),
+        # a header size other than 124
+        (Dds, _set(make_dds(), 4, b"\x7d")),
+        (Ktx2, _set(make_ktx2(), 11, b"\x00")),
+    ],
+)
+def test_rejected(filetype, data):
+
+    assert not filetype().match(bytearray(data))
+    assert filetype().get_size(bytearray(data)) == (0, 0)
+    assert not isinstance(imagetype.image_match(data), filetype)
+
+
+def test_exr_window_with_swapped_bounds():
+
+    window = struct.pack("<iiii", 0, 0, 1919, 1079)
+
+    for swapped in ((1919, 0, 0, 1079), (0, 1079, 1919, 0)):
+
+        data = make_exr().replace(window, struct.pack("<iiii", *swapped), 1)
+
+        assert Exr().get_size(bytearray(data)) == (0, 0)
+
+    # a window away from the origin, with negative bounds
+    data = make_exr().replace(window, struct.pack("<iiii", -10, -20, 9, 19), 1)
+
+    assert Exr().get_size(bytearray(data)) == (20, 40)
+
+
+def test_pcx_window_with_swapped_bounds():
+
+    data = _set(make_pcx(), 4, struct.pack("<HHHH", 100, 0, 10, 239))
+
+    assert Pcx().get_size(bytearray(data)) == (0, 0)
+
+
+def test_hdr_without_resolution():
+
+    data = make_hdr().replace(b"-Y 512 +X 768", b"-Q 512 +X 768")
+
+    assert Hdr().get_size(bytearray(data)) == (0, 0)
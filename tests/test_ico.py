@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from imagetype.FileTypes.image import Ico
+
+from benchmarks.corpus import make_ico
+
+
+ENTRIES = ((16, 16, 32), (32, 32, 32), (300, 300, 32))
+
+SIZES = [(16, 16), (32, 32), (300, 300)]
+
+
+def test_sizes_read_through_the_image_headers():
+
+    assert Ico().get_sizes(make_ico(ENTRIES)) == SIZES
+
+
+def test_truncated_image_keeps_the_directory_size():
+
+    data = make_ico(ENTRIES)
+
+    # cut inside the png of the last entry, which the directory says is 44
+    data = data[: len(data) - 60]
+
+    sizes = Ico().get_sizes(data)
+
+    assert sizes == [(16, 16), (32, 32), (300 % 256, 300 % 256)]
+
+    with pytest.raises(ValueError):
+        Ico().get_sizes(data, strict=True)
+
+
+def test_truncated_directory_gives_the_entries_it_holds():
+
+    data = make_ico(ENTRIES)[: 6 + 16 * 2 + 8]
+
+    assert len(Ico().get_sizes(data)) == 2
+
+    with pytest.raises(ValueError):
+        Ico().get_entries(data, strict=True)
+
+
+def test_not_an_ico():
+
+    assert Ico().get_sizes(b"\x89PNG\r\n\x1a\n" + bytes(64)) == []
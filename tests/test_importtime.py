@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+import subprocess
+import sys
+
+from benchmarks.importtime import FORBIDDEN
+
+
+def _imported_modules():
+
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, imagetype; print('\\n'.join(sys.modules))",
+        ],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stdout
+
+    return set(output.split())
+
+
+def test_import_leaves_out_slow_modules():
+
+    modules = _imported_modules()
+
+    assert not modules.intersection(FORBIDDEN)
+
+
+def test_archive_and_video_are_imported_on_first_use():
+
+    modules = _imported_modules()
+
+    assert "imagetype.archive" not in modules
+    assert "imagetype.video" not in modules
+
+    import imagetype
+
+    assert imagetype.scan_archive.__module__ == "imagetype.archive"
+    assert imagetype.probe_video.__module__ == "imagetype.video"
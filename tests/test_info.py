@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+
+import pytest
+
+import imagetype
+from imagetype.info import FLAG_ALPHA, ImageInfo, ImageInfoArray
+
+from benchmarks.corpus import SAMPLES
+
+
+def test_get_info_returns_records():
+
+    for data in SAMPLES.values():
+
+        info = imagetype.get_info(data)
+
+        assert info is None or isinstance(info, ImageInfo)
+
+
+def test_record_is_immutable():
+
+    info = ImageInfo("image/png", "png", 640, 480, None, FLAG_ALPHA)
+
+    with pytest.raises(AttributeError):
+        info.width = 1
+
+
+def test_record_and_array_pickle_round_trip():
+
+    infos = [
+        ImageInfo("image/png", "png", 640, 480, None, FLAG_ALPHA),
+        ImageInfo("image/gif", "gif", 320, 200, 12, 0),
+    ]
+
+    assert pickle.loads(pickle.dumps(infos)) == infos
+
+    array = ImageInfoArray(infos * 1000)
+
+    assert list(pickle.loads(pickle.dumps(array))) == infos * 1000
+
+    # the array pickles at about its packed size
+    assert len(pickle.dumps(array)) < 2000 * array.RECORD.size + 200
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+
+import imagetype
+
+from benchmarks.corpus import make_isobmff, make_mp4
+
+
+def _files():
+
+    # every distinct ftyp box is a new entry of the brand cache
+    return [
+        make_isobmff(brand=b"heic", compatible=(b"mif1", b"heic")),
+        make_isobmff(brand=b"mif1", compatible=(b"mif1", b"avif")),
+        make_isobmff(brand=b"heix", compatible=(b"mif1", b"heix")),
+        make_mp4(payload=4096, chunks=2),
+    ] + [
+        make_isobmff(brand=b"mif1", compatible=(b"mif1", b"heic", i.to_bytes(4, "big")))
+        for i in range(400)
+    ]
+
+
+def test_brands_classify_the_same_from_every_thread():
+
+    files = _files()
+
+    expected = [imagetype.image_match(data) for data in files]
+
+    assert [matcher.mime for matcher in expected[:3]] == [
+        "image/heic",
+        "image/avif",
+        "image/heic",
+    ]
+    assert expected[3] is None
+
+    with ThreadPoolExecutor(8) as pool:
+        for _ in range(5):
+            assert list(pool.map(imagetype.image_match, files)) == expected
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import struct
+
+import pytest
+
+import imagetype
+from imagetype.FileTypes.image import Jpeg
+from imagetype.rangereader import MemoryRangeReader, read_size
+
+from benchmarks.corpus import make_jpeg
+
+
+def _with_frame_marker(marker: int, tables=False):
+    """
+    Returns:
+        A 30x20 jpeg whose frame header has the given marker, after a
+        huffman table segment when tables is set.
+    """
+    jpeg = make_jpeg(30, 20)
+
+    i = jpeg.index(b"\xff\xc0")
+
+    # a DHT segment (0xC4) is in the range of the frame markers, but no frame
+    dht = b"\xff\xc4" + struct.pack(">H", 21) + bytes(19) if tables else b""
+
+    return jpeg[:i] + dht + bytes([0xFF, marker]) + jpeg[i + 2 :]
+
+
+@pytest.mark.parametrize("tables", [False, True])
+@pytest.mark.parametrize(
+    "marker",
+    # baseline, extended sequential, progressive, lossless, and the
+    # arithmetic coded frames
+    [0xC0, 0xC1, 0xC2, 0xC3, 0xC9, 0xCA, 0xCB],
+)
+def test_every_frame_marker_sizes_alike(marker, tables):
+
+    data = _with_frame_marker(marker, tables)
+
+    assert Jpeg().get_size(data) == (30, 20)
+    assert read_size(MemoryRangeReader(data))[1] == (30, 20)
+
+    matcher, probe = imagetype.identify(data)
+
+    assert isinstance(matcher, Jpeg)
+    assert (probe.width, probe.height) == (30, 20)
+
+    info = imagetype.get_info(data)
+
+    assert (info.width, info.height) == (30, 20)
+
+
+def test_no_frame_header():
+
+    jpeg = make_jpeg(30, 20)
+
+    i = jpeg.index(b"\xff\xc0")
+
+    # the frame header turned into an APP segment of the same length
+    data = jpeg[:i] + b"\xff\xe5" + jpeg[i + 2 :]
+
+    assert Jpeg().get_size(data) == (0, 0)
+    assert read_size(MemoryRangeReader(data))[1] == (0, 0)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import io
+
+from imagetype.FileTypes.libisobmff import MediaFile
+
+from benchmarks.corpus import box, full_box
+
+
+def _read(tmp_path, data: bytes):
+
+    path = tmp_path / "file.heic"
+    path.write_bytes(data)
+
+    media_file = MediaFile()
+    media_file.read(str(path))
+
+    return media_file
+
+
+def _heic_with_two_images():
+
+    ftyp = box(b"ftyp", b"heic\x00\x00\x00\x00mif1heic")
+
+    ispe = full_box(b"ispe", (512).to_bytes(4, "big") * 2)
+    ispe += full_box(b"ispe", (4032).to_bytes(4, "big") + (3024).to_bytes(4, "big"))
+
+    return ftyp + full_box(b"meta", box(b"iprp", box(b"ipco", ispe)))
+
+
+def test_subboxes_hold_the_first_box_of_each_type(tmp_path):
+
+    media_file = _read(tmp_path, _heic_with_two_images())
+
+    ipco = media_file.get_box("ipco")
+
+    assert ipco.subboxes["ispe"] is ipco.children[0]
+    assert ipco.get_child("ispe") is ipco.children[0]
+    assert ipco.get_children("ispe") == ipco.children
+
+    assert set(media_file.subboxes) == {"ftyp", "meta"}
+    assert media_file.subboxes["meta"] is media_file.meta
+
+
+def test_get_boxes_finds_every_box_in_order(tmp_path):
+
+    media_file = _read(tmp_path, _heic_with_two_images())
+
+    sizes = [(ispe.width, ispe.height) for ispe in media_file.get_boxes("ispe")]
+
+    assert sizes == [(512, 512), (4032, 3024)]
+
+
+def test_show_all_prints_inner_boxes_first(tmp_path):
+
+    media_file = _read(tmp_path, _heic_with_two_images())
+
+    output = io.StringIO()
+
+    with contextlib.redirect_stdout(output):
+        media_file.show_all(media_file.subboxes)
+
+    printed = [line for line in output.getvalue().split() if line.isalpha()]
+
+    # subboxes only hold the first ispe box
+    assert printed == ["ftyp", "ispe", "ipco", "iprp", "meta"]
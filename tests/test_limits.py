@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+import struct
+
+import pytest
+
+import imagetype
+from imagetype.limits import DecompressionBombError, Limits
+from imagetype.FileTypes.image import Apng, Heic, Ico
+
+from benchmarks.corpus import box, full_box, make_apng, make_ico, make_jpeg
+
+
+def _heic_grid(tiles):
+    """
+    Returns:
+        A 4000x3000 heic whose grid declares tiles of the given sizes, each
+        with its own ispe box.
+    """
+    ftyp = box(b"ftyp", b"heic\x00\x00\x00\x00mif1heic")
+
+    ipco = b"".join(
+        full_box(b"ispe", struct.pack(">II", width, height))
+        for width, height in [(4000, 3000)] + list(tiles)
+    )
+
+    hdlr = full_box(b"hdlr", b"\x00" * 4 + b"pict" + b"\x00" * 12 + b"\x00")
+
+    meta = full_box(b"meta", hdlr + box(b"iprp", box(b"ipco", ipco)))
+
+    return ftyp + meta + box(b"mdat", b"\x00" * 64)
+
+
+def _raises(limit, call, *args, **kwargs):
+
+    with pytest.raises(DecompressionBombError) as raised:
+        call(*args, **kwargs)
+
+    assert raised.value.limit == limit
+    assert raised.value.value > raised.value.maximum
+
+    return raised.value
+
+
+def test_every_ico_entry_is_checked():
+
+    # the first entry is the size, the second one declares a wider png
+    data = bytearray(make_ico(((16, 16, 32), (512, 512, 32))))
+
+    _raises("max_width", Ico().get_size, data, Limits(max_width=300))
+    _raises("max_height", Ico().get_size, data, Limits(max_height=300))
+
+    assert Ico().get_size(data, Limits(max_width=512, max_height=512)) == (16, 16)
+
+
+def test_ico_entries_count_as_frames():
+
+    data = make_ico()
+
+    _raises("max_frames", imagetype.identify, data, limits=Limits(max_frames=2))
+
+    assert imagetype.identify(data, limits=Limits(max_frames=3)) is not None
+
+
+def test_every_heic_tile_is_checked():
+
+    data = bytearray(_heic_grid([(512, 512)] * 3 + [(100000, 100000)]))
+
+    _raises("max_megapixels", Heic().get_size, data, Limits(max_megapixels=50))
+    _raises("max_width", Heic().get_size, data, Limits(max_width=65535))
+
+    assert Heic().get_size(data, Limits(max_megapixels=1e4)) == (4000, 3000)
+
+
+def test_apng_frames_from_actl():
+
+    data = make_apng(frames=1000)
+
+    _raises("max_frames", Apng().get_size, bytearray(data), Limits(max_frames=100))
+    _raises("max_frames", imagetype.get_info, data, limits=Limits(max_frames=100))
+
+    info = imagetype.get_info(data, limits=Limits(max_frames=1000))
+
+    assert info.frames == 1000
+
+
+def test_pixels_per_byte_of_a_small_file():
+
+    # 64x32 pixels for each of a million frames, in a file of 100 bytes
+    data = make_apng(frames=10**6)
+
+    error = _raises(
+        "max_pixels_per_byte",
+        imagetype.identify,
+        data,
+        limits=Limits(max_pixels_per_byte=1000),
+    )
+
+    assert error.value == 64 * 32 * 10**6 / len(data)
+
+    assert imagetype.identify(data, limits=Limits(max_pixels_per_byte=1e8))
+
+
+def test_sizes_within_the_limits_pass():
+
+    limits = Limits(
+        max_width=800,
+        max_height=600,
+        max_megapixels=0.48,
+        max_frames=1,
+        max_pixels_per_byte=1e4,
+    )
+
+    info = imagetype.get_info(make_jpeg(800, 600), limits=limits)
+
+    assert (info.width, info.height) == (800, 600)
+
+    _raises("max_width", imagetype.get_info, make_jpeg(801, 600), limits=limits)
+    _raises(
+        "max_megapixels",
+        imagetype.get_info,
+        make_jpeg(800, 601),
+        limits=Limits(max_megapixels=0.48),
+    )
+
+
+def test_check_without_a_type():
+
+    Limits(max_frames=2).check([(10, 10)], frames=2)
+
+    with pytest.raises(DecompressionBombError, match="frames of 3"):
+        Limits(max_frames=2).check([(10, 10)] * 3)
+
+    # an exceeded limit is a ValueError, which the callers already handle
+    assert issubclass(DecompressionBombError, ValueError)
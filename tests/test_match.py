@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import imagetype
+from imagetype.FileTypes import IMAGE
+
+from benchmarks.corpus import SAMPLES
+
+
+# a plain list of the image types, which the hint applies to
+MATCHERS = list(IMAGE)
+
+
+@pytest.mark.parametrize("name", sorted(SAMPLES))
+@pytest.mark.parametrize("hint", [None, "upload.png", "upload.jpg", "image/gif"])
+def test_hint_never_changes_the_result(name, hint):
+
+    data = SAMPLES[name]
+
+    expected = imagetype.image_match(data)
+
+    assert imagetype.match(data, MATCHERS, hint) is expected
+    assert imagetype.match(data, IMAGE, hint) is expected
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import struct
+
+import pytest
+
+from imagetype.rangereader import MemoryRangeReader, read_size
+
+from benchmarks.corpus import make_gif, make_isobmff, make_jpeg, make_png, make_webp
+
+
+def _add_tables(jpeg: bytes, count: int):
+
+    # quantization tables between the EXIF block and the frame header
+    table = b"\xff\xdb" + struct.pack(">H", 67) + bytes(65)
+
+    i = jpeg.index(b"\xff\xc0")
+
+    return jpeg[:i] + table * count + jpeg[i:]
+
+
+@pytest.mark.parametrize(
+    "data, size, requests",
+    [
+        (make_jpeg(), (800, 600), 1),
+        (make_jpeg(exif=65000), (800, 600), 2),
+        (_add_tables(make_jpeg(exif=65000), 2), (800, 600), 2),
+        (make_png(), (640, 480), 1),
+        (make_gif(), (320, 200), 1),
+        (make_webp(), (400, 300), 1),
+        (make_webp(kind="VP8L"), (400, 300), 1),
+        (make_webp(kind="VP8X"), (400, 300), 1),
+        (make_isobmff(), (4032, 3024), 1),
+        (make_isobmff(meta_padding=100000), (4032, 3024), 2),
+    ],
+)
+def test_round_trips(data, size, requests):
+
+    reader = MemoryRangeReader(data)
+
+    _, read = read_size(reader)
+
+    assert read == size
+    assert reader.request_count == requests
+
+
+def test_segments_after_large_block_in_one_window():
+
+    reader = MemoryRangeReader(_add_tables(make_jpeg(exif=65000), 2))
+
+    read_size(reader)
+
+    # the head, then one window holding both tables and the frame header
+    assert reader.requests == [(0, 512), (65022, 512)]
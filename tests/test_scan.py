@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+import imagetype
+from imagetype.limits import DecompressionBombError, Limits
+from imagetype.scan import iter_files, read_headers, scan
+
+from benchmarks.corpus import CORPUS, make_apng, write_corpus
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    return write_corpus(str(tmp_path))
+
+
+def _inode(path):
+    return os.stat(path).st_ino
+
+
+@pytest.mark.parametrize("window, workers", [(1, 1), (3, 2), (7, 4), (64, 4)])
+def test_headers_are_read_in_inode_order_per_window(corpus, window, workers):
+
+    paths = sorted(corpus.values(), key=_inode, reverse=True)
+
+    headers = list(read_headers(iter(paths), 100, window, workers))
+
+    read = [path for path, _, _ in headers]
+
+    for start in range(0, len(paths), window):
+
+        part = read[start : start + window]
+
+        # every window is read on its own, sorted by inode
+        assert sorted(part) == sorted(paths[start : start + window])
+        assert part == sorted(part, key=_inode)
+
+    for path, buf, size in headers:
+
+        with open(path, "rb") as fp:
+            data = fp.read()
+
+        assert buf == data[:100]
+        assert size == len(data)
+
+
+def test_files_which_can_not_be_read(tmp_path):
+
+    empty = tmp_path / "empty"
+    empty.write_bytes(b"")
+
+    paths = [str(tmp_path / "missing"), str(tmp_path), str(empty)]
+
+    headers = {path: (buf, size) for path, buf, size in read_headers(paths)}
+
+    assert headers == {
+        paths[0]: (None, None),
+        paths[1]: (None, None),
+        paths[2]: (bytearray(), 0),
+    }
+
+    assert dict(scan(paths)) == dict.fromkeys(paths)
+
+
+def test_scan_identifies_like_get_info(corpus):
+
+    scanned = dict(scan(corpus.values(), window=5))
+
+    assert sorted(scanned) == sorted(corpus.values())
+
+    for name, path in corpus.items():
+        assert scanned[path] == imagetype.get_info(path), name
+
+
+@pytest.mark.parametrize("to_read", [32, 256])
+def test_sizes_past_the_header_are_read_again(corpus, to_read):
+
+    # most sizes lie past reads this short, and some only half of them
+    scanned = dict(scan(corpus.values(), to_read=to_read))
+
+    for name, path in corpus.items():
+
+        info = scanned[path]
+
+        # types needing more bytes to match are not matched, as with get_info
+        if info is None:
+            assert imagetype.get_info(CORPUS[name][:to_read]) is None, name
+            continue
+
+        expected = imagetype.get_info(path)
+
+        assert (info.width, info.height) == (expected.width, expected.height), name
+
+
+def test_scan_of_other_files(tmp_path):
+
+    path = tmp_path / "text"
+    path.write_bytes(b"not an image\n" * 100)
+
+    assert list(scan([str(path)])) == [(str(path), None)]
+
+
+def test_scan_enforces_limits(tmp_path):
+
+    path = tmp_path / "apng"
+    path.write_bytes(make_apng(frames=1000))
+
+    with pytest.raises(DecompressionBombError):
+        list(scan([str(path)], limits=Limits(max_frames=100)))
+
+    [(_, info)] = scan([str(path)], limits=Limits(max_frames=1000))
+
+    assert info.frames == 1000
+
+
+def test_iter_files(corpus, tmp_path):
+
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+    (nested / "file").write_bytes(b"x")
+
+    os.symlink(str(nested), str(tmp_path / "link"))
+    os.symlink(str(nested / "file"), str(tmp_path / "file-link"))
+
+    found = sorted(iter_files(str(tmp_path)))
+
+    assert found == sorted(list(corpus.values()) + [str(nested / "file")])
+    assert len(CORPUS) == len(corpus)
+
+    assert list(iter_files(str(tmp_path / "missing"))) == []
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import imagetype
+from imagetype.FileTypes.image import Svg
+from imagetype.rangereader import MemoryRangeReader, read_size
+
+from benchmarks.corpus import make_svg
+
+
+ROOT = b'<svg xmlns="http://www.w3.org/2000/svg" width="64" height="32"/>'
+
+
+def _utf16(text: bytes, byteorder: str):
+
+    bom = "\ufeff".encode("utf-16-" + byteorder)
+
+    return bom + text.decode("ascii").encode("utf-16-" + byteorder)
+
+
+@pytest.mark.parametrize(
+    "data, size",
+    [
+        (make_svg(), (640, 480)),
+        (make_svg("2in", "10mm"), (192, round(10 * 96 / 25.4))),
+        (make_svg(None, None, view_box="0 0 300 200"), (300, 200)),
+        (ROOT, (64, 32)),
+        (b"\xef\xbb\xbf" + ROOT, (64, 32)),
+        (b" \n\t" + ROOT, (64, 32)),
+        (_utf16(ROOT, "le"), (64, 32)),
+        (_utf16(ROOT, "be"), (64, 32)),
+        (b"<!DOCTYPE svg [<!ELEMENT svg ANY>]>\n" + ROOT, (64, 32)),
+        (b"<!-- <html> -->" + ROOT, (64, 32)),
+        (ROOT.replace(b"<svg xmlns=", b"<s:svg xmlns:s="), (64, 32)),
+    ],
+)
+def test_svg_roots(data, size):
+
+    assert Svg().match(bytearray(data))
+    assert Svg().get_size(bytearray(data)) == size
+
+    assert isinstance(imagetype.image_match(data), Svg)
+    assert read_size(MemoryRangeReader(data))[1] == size
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"<!DOCTYPE html>\n<html><body><svg width='1' height='1'/></body></html>",
+        b'<?xml version="1.0"?>\n<rss version="2.0"><svg/></rss>',
+        b"<!-- <svg width='1' height='1'/> -->",
+        b"<!-- <svg width='1' height='1'/> --><html/>",
+        b"<!DOCTYPE x [<!ENTITY e '<svg/>'>]>",
+        b"<svg width='1' height='1'",
+        b"svg, but not markup",
+    ],
+)
+def test_not_svg(data):
+
+    assert not Svg().match(bytearray(data))
+    assert not isinstance(imagetype.image_match(data), Svg)
+
+
+def test_root_past_the_prefix():
+
+    # the comment mentions svg, but the root element is beyond the prefix
+    data = b"<!-- <svg> " + b"x" * 200 + b" -->" + ROOT
+
+    assert not Svg(max_prefix=100).match(bytearray(data))
+    assert Svg().match(bytearray(data))
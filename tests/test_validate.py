@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+
+from imagetype.validate import validate
+
+from benchmarks.corpus import make_gif, make_jpeg, make_png
+
+
+class _Stream(io.RawIOBase):
+    """
+    A file object which can't seek, as a pipe or socket.
+    """
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._data.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def _corrupt(data: bytes, offset: int, value: bytes):
+
+    data = bytearray(data)
+    data[offset : offset + len(value)] = value
+
+    return bytes(data)
+
+
+SAMPLES = {"jpeg": make_jpeg(), "png": make_png(), "gif": make_gif()}
+
+
+@pytest.mark.parametrize("name", sorted(SAMPLES))
+def test_complete_files_are_valid(name):
+
+    data = SAMPLES[name]
+
+    result = validate(data, check_crc=True)
+
+    assert result
+    assert result.checked
+    assert result.reason is None
+    assert result.offset == len(data)
+    assert result.filetype.extension == name.replace("jpeg", "jpg")
+
+
+@pytest.mark.parametrize(
+    "name, reason",
+    [
+        ("jpeg", "missing EOI marker"),
+        ("png", "missing IEND chunk"),
+        ("gif", "truncated image descriptor"),
+    ],
+)
+def test_truncated_files_are_invalid(name, reason):
+
+    data = SAMPLES[name][:-10]
+
+    result = validate(data)
+
+    assert not result
+    assert result.checked
+    assert result.reason == reason
+    assert result.offset <= len(data)
+
+
+@pytest.mark.parametrize(
+    "name, offset, value, reason",
+    [
+        # a segment marker the jpeg has no room for
+        ("jpeg", 4, b"\xff\xf0", "truncated segment"),
+        # a chunk length past the end of the png
+        ("png", 8, b"\x7f\xff\xff\xff", "truncated chunk"),
+        # a trailer which is no block
+        ("gif", -1, b"\x00", "invalid block"),
+    ],
+)
+def test_corrupt_files_are_invalid(name, offset, value, reason):
+
+    data = SAMPLES[name]
+
+    result = validate(_corrupt(data, offset % len(data), value))
+
+    assert not result
+    assert result.reason == reason
+
+
+def test_check_crc_finds_a_flipped_bit():
+
+    data = SAMPLES["png"]
+
+    corrupt = _corrupt(data, data.index(b"IDAT") + 6, b"\x00")
+
+    assert validate(corrupt)
+
+    result = validate(corrupt, check_crc=True)
+
+    assert not result
+    assert result.reason == "chunk CRC mismatch"
+
+
+def test_unknown_files_are_invalid():
+
+    result = validate(b"not an image at all")
+
+    assert not result
+    assert not result.checked
+    assert result.filetype is None
+    assert result.reason == "unknown file type"
+
+
+@pytest.mark.parametrize(
+    "make",
+    [
+        bytes,
+        bytearray,
+        memoryview,
+        io.BytesIO,
+        _Stream,
+        lambda data: io.BufferedReader(_Stream(data)),
+    ],
+)
+@pytest.mark.parametrize("name", sorted(SAMPLES))
+def test_inputs_validate_alike(name, make):
+
+    for data in (SAMPLES[name], SAMPLES[name][:-10]):
+
+        expected = validate(data, check_crc=True)
+        result = validate(make(data), check_crc=True)
+
+        assert (result.valid, result.reason, result.offset) == (
+            expected.valid,
+            expected.reason,
+            expected.offset,
+        )
+
+
+def test_paths(tmp_path):
+
+    path = tmp_path / "truncated.png"
+    path.write_bytes(SAMPLES["png"][:-10])
+
+    assert validate(str(path)).reason == "missing IEND chunk"
+    assert validate(path).reason == "missing IEND chunk"
+
+
+def test_unsupported_input():
+
+    with pytest.raises(TypeError):
+        validate(42)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+
+import imagetype
+from imagetype.rangereader import MemoryRangeReader
+
+from benchmarks.corpus import box, make_mp4
+
+
+def _probe(data: bytes):
+
+    reader = MemoryRangeReader(data)
+
+    return imagetype.probe_video(reader), reader
+
+
+@pytest.mark.parametrize("moov_at_end", [False, True])
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270])
+def test_tracks(moov_at_end, rotation):
+
+    data = make_mp4(1280, 720, seconds=7, rotation=rotation, moov_at_end=moov_at_end)
+
+    info, reader = _probe(data)
+
+    assert info.mime == "video/mp4"
+    assert info.duration == 7
+    assert info.size == (1280, 720)
+    assert info.codec == "avc1"
+
+    video, audio = info.tracks
+
+    assert video is info.video
+    assert (video.track_id, video.kind, video.codec) == (1, "vide", "avc1")
+    assert (video.width, video.height, video.rotation) == (1280, 720, rotation)
+    assert video.duration == 7
+
+    assert (audio.track_id, audio.kind, audio.codec) == (2, "soun", "mp4a")
+    assert (audio.sample_rate, audio.channels) == (44100, 2)
+    assert (audio.width, audio.height) == (0, 0)
+    assert audio.duration == 7
+
+    # the media data is seeked over, whichever side of it moov is on
+    assert reader.request_count == (2 if moov_at_end else 1)
+    assert reader.bytes_read < len(data) // 10
+
+
+@pytest.mark.parametrize("moov_at_end", [False, True])
+def test_large_moov_is_read_a_window_at_a_time(moov_at_end):
+
+    # sample tables of 1.6MB, which the windows hop over
+    data = make_mp4(chunks=200000, moov_at_end=moov_at_end)
+
+    info, reader = _probe(data)
+
+    assert info.size == (1920, 1080)
+    assert [track.kind for track in info.tracks] == ["vide", "soun"]
+
+    assert reader.request_count <= 3
+    assert reader.bytes_read < (1 << 20) // 4
+
+
+@pytest.mark.parametrize(
+    "brand, mime",
+    [
+        (b"isom", "video/mp4"),
+        (b"qt  ", "video/quicktime"),
+        (b"M4V ", "video/x-m4v"),
+    ],
+)
+def test_mime_from_the_brands(brand, mime):
+
+    info, _ = _probe(make_mp4(brand=brand, compatible=(brand,), large_offsets=True))
+
+    assert info.mime == mime
+    assert info.size == (1920, 1080)
+
+
+def test_inputs(tmp_path):
+
+    data = make_mp4(640, 360, moov_at_end=True)
+
+    path = tmp_path / "video.mp4"
+    path.write_bytes(data)
+
+    for obj in (str(path), path, io.BytesIO(data), data, bytearray(data)):
+        assert imagetype.probe_video(obj).size == (640, 360)
+
+    with open(str(path), "rb") as fp:
+        assert imagetype.probe_video(fp).size == (640, 360)
+
+        # a file object it was given is left open
+        assert not fp.closed
+
+    with pytest.raises(TypeError):
+        imagetype.probe_video(1)
+
+
+def test_without_moov():
+
+    ftyp = box(b"ftyp", b"isom\x00\x00\x00\x00isom")
+
+    assert imagetype.probe_video(ftyp + box(b"mdat", bytes(100))) is None
+    assert imagetype.probe_video(b"") is None
+
+
+def test_moov_cut_short():
+
+    # the end of the sample tables is missing, the track headers are there
+    data = make_mp4(moov_at_end=True)
+
+    info = imagetype.probe_video(data[:-100])
+
+    assert info.size == (1920, 1080)
+    assert [track.kind for track in info.tracks] == ["vide", "soun"]